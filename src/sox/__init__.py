@@ -1,4 +1,8 @@
+from sox._lazy import lazy_attributes
+
 __all__ = ["plant", "filter", "sensor", "system", "utils"]
 
-from . import filter, plant, sensor, system
 from .utils import *
+
+# subpackages are imported on first access, so e.g. `from sox.filter import ExtendedKalmanFilter` does not load pybamm
+__getattr__, __dir__ = lazy_attributes(__name__, {name: (f".{name}", None) for name in __all__})
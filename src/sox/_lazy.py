@@ -0,0 +1,35 @@
+import importlib
+import sys
+
+
+def lazy_attributes(package: str, attributes: dict):
+    """Returns module-level `__getattr__` and `__dir__` functions that import package attributes on first access.
+
+    Submodules are imported only when one of their attributes is used, so importing the package itself stays cheap.
+    Loaded attributes are stored on the package, so later accesses are plain attribute lookups.
+
+    Args:
+        package (str): Name of the package, i.e. `__name__` of its `__init__` module.
+        attributes (dict): Maps each attribute name to `(submodule, name)`, with the submodule relative to the package
+            and name None for the submodule itself.
+
+    Returns:
+        tuple: `__getattr__` and `__dir__` functions for the package module.
+    """
+
+    def __getattr__(name):
+        if name not in attributes:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        submodule = attributes[name][0]
+        module = importlib.import_module(submodule, package)
+        # binds every attribute of the submodule at once, which also replaces the submodule binding that the import
+        # system adds to the package when an attribute shares the submodule's name, e.g. `snapshot`
+        for other, (other_submodule, attribute) in attributes.items():
+            if other_submodule == submodule:
+                setattr(sys.modules[package], other, module if attribute is None else getattr(module, attribute))
+        return getattr(sys.modules[package], name)
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(attributes))
+
+    return __getattr__, __dir__
@@ -1,3 +1,34 @@
-from .coulomb_count import *
-from .extended_kalman_filter import *
-from .unscented_kalman_filter import *
+from sox._lazy import lazy_attributes
+
+_attributes = {
+    "CoulombCount": (".coulomb_count", "CoulombCount"),
+    "CoulombCountVariableCapacity": (".coulomb_count", "CoulombCountVariableCapacity"),
+    "BatchExtendedKalmanFilter": (".extended_kalman_filter", "BatchExtendedKalmanFilter"),
+    "ExtendedKalmanFilter": (".extended_kalman_filter", "ExtendedKalmanFilter"),
+    "InteractingMultipleModel": (".interacting_multiple_model", "InteractingMultipleModel"),
+    "ParticleFilter": (".particle_filter", "ParticleFilter"),
+    "stratified_resample": (".particle_filter", "stratified_resample"),
+    "systematic_resample": (".particle_filter", "systematic_resample"),
+    "Estimates": (".runner", "Estimates"),
+    "run": (".runner", "run"),
+    "ExtendedRTSSmoother": (".smoother", "ExtendedRTSSmoother"),
+    "RTSSmoother": (".smoother", "RTSSmoother"),
+    "SmoothedEstimates": (".smoother", "SmoothedEstimates"),
+    "UnscentedRTSSmoother": (".smoother", "UnscentedRTSSmoother"),
+    "load_snapshots": (".snapshot", "load_snapshots"),
+    "restore": (".snapshot", "restore"),
+    "save_snapshots": (".snapshot", "save_snapshots"),
+    "snapshot": (".snapshot", "snapshot"),
+    "snapshot_dtype": (".snapshot", "snapshot_dtype"),
+    "SquareRootUnscentedKalmanFilter": (".square_root_unscented_kalman_filter", "SquareRootUnscentedKalmanFilter"),
+    "cholupdate": (".square_root_unscented_kalman_filter", "cholupdate"),
+    "qr_factor": (".square_root_unscented_kalman_filter", "qr_factor"),
+    "TheveninExtendedKalmanFilter": (".thevenin_kalman_filter", "TheveninExtendedKalmanFilter"),
+    "TheveninUnscentedKalmanFilter": (".thevenin_kalman_filter", "TheveninUnscentedKalmanFilter"),
+    "MerweSigmaPoints": (".unscented_kalman_filter", "MerweSigmaPoints"),
+    "UnscentedKalmanFilter": (".unscented_kalman_filter", "UnscentedKalmanFilter"),
+    "unscented_transform": (".unscented_kalman_filter", "unscented_transform"),
+}
+
+__all__ = list(_attributes)
+__getattr__, __dir__ = lazy_attributes(__name__, _attributes)
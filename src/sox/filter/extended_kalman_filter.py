@@ -1,6 +1,7 @@
 import numpy as np
+from scipy.linalg import lu_factor, lu_solve
 
-from sox.utils import handle_matrix, handle_vector
+from sox.utils import handle_batch_vector, handle_matrix, handle_vector
 
 
 class ExtendedKalmanFilter:
@@ -13,6 +14,8 @@ class ExtendedKalmanFilter:
         R (array_like): Measurement noise covariance, shape (k, k)
         x0 (array_like): Initial state estimate, shape (n, 1)
         P0 (array_like): Initial error covariance, shape (n, n)
+        inplace (bool, optional): If True, work buffers are preallocated and predict/update overwrite x and P
+            in place without explicit matrix inversion. Defaults to False.
 
     Attributes:
         F (array_like): State transition matrix, shape (n, n)
@@ -24,9 +27,11 @@ class ExtendedKalmanFilter:
         x0 (array_like): Initial state estimate, shape (n, 1)
         P0 (array_like): Initial error covariance, shape (n, n)
         I (array_like): Identity matrix, shape (n, n)
+        y (array_like): Measurement residual (innovation) of the last update, shape (k, 1)
+        inplace (bool): Whether predict/update run on preallocated buffers
     """
 
-    def __init__(self, F, B, Q, R, x0, P0):
+    def __init__(self, F, B, Q, R, x0, P0, inplace=False):
         self.F = handle_matrix(F)  # State transition matrix
         self.B = handle_matrix(B)  # Control input matrix
         self.Q = handle_matrix(Q)  # Process noise covariance
@@ -37,6 +42,27 @@ class ExtendedKalmanFilter:
         self.P0 = handle_matrix(P0)  # Initial error covariance
 
         self.I = np.eye(F.shape[0])  # Identity matrix
+        self.y = np.zeros((self.R.shape[0], 1))  # Measurement residual
+
+        self.inplace = inplace
+        if inplace:
+            self.x = self.x.astype(float)  # owns its buffer, so x0 is never overwritten
+            self.P = self.P.astype(float)
+            self._allocate_buffers()
+
+    def _allocate_buffers(self):
+        """Preallocates work buffers for in-place predict/update"""
+        n, k = self.x.shape[0], self.R.shape[0]
+        self._xn = np.zeros((n, 1))  # state work vector
+        self._Bu = np.zeros((n, 1))  # control contribution
+        self._z = np.zeros((k, 1))  # measurement
+        self._nn = np.zeros((n, n))  # covariance work matrix
+        self._nn2 = np.zeros((n, n))  # second covariance work matrix
+        self._PHt = np.zeros((n, k))  # P @ H.T
+        self._S = np.zeros((k, k))  # innovation covariance
+        self._K = np.zeros((n, k))  # Kalman gain
+        self._lu = np.zeros((k, k), order="F")  # LU factors of S, Fortran order so LAPACK works in place
+        self._Kt = np.zeros((k, n), order="F")  # K^T, solved in place
 
     def predict(self, u):
         """Predicts the next state estimate based on control input u
@@ -44,6 +70,9 @@ class ExtendedKalmanFilter:
         Args:
             u (array_like): Control input, shape (m, 1)
         """
+        if self.inplace:
+            return self._predict_inplace(u)
+
         u = handle_vector(u)
 
         self.x = self.F @ self.x + self.B @ u
@@ -63,6 +92,9 @@ class ExtendedKalmanFilter:
         Raises:
             ValueError: If z, hx, or h_jacobian have invalid shapes
         """
+        if self.inplace:
+            return self._update_inplace(z, hx, h_jacobian, R, hx_args, hj_args)
+
         z = handle_vector(z)
 
         if not isinstance(hx_args, tuple):
@@ -72,14 +104,165 @@ class ExtendedKalmanFilter:
         if R is None:
             R = self.R
 
-        y = z - hx(self.x, *hx_args)
+        self.y = z - hx(self.x, *hx_args)
         H = h_jacobian(self.x, *hj_args)
         S = H @ self.P @ H.T + R
         K = self.P @ H.T @ np.linalg.inv(S)
-        self.x = self.x + K @ y
+        self.x = self.x + K @ self.y
         self.P = (self.I - K @ H) @ self.P
 
+    def _predict_inplace(self, u):
+        """Predict step that writes into preallocated buffers
+
+        Raises:
+            ValueError: If u is a scalar and B has more than one column.
+        """
+        if np.isscalar(u):  # single input, avoids wrapping the scalar
+            if self.B.shape[1] != 1:
+                raise ValueError(f"A scalar u needs B with one column. Got B of shape {self.B.shape}.")
+            np.multiply(self.B, u, out=self._Bu)
+        else:
+            np.matmul(self.B, handle_vector(u), out=self._Bu)
+        np.matmul(self.F, self.x, out=self._xn)
+        np.add(self._xn, self._Bu, out=self.x)
+
+        np.matmul(self.F, self.P, out=self._nn)
+        np.matmul(self._nn, self.F.T, out=self.P)
+        self.P += self.Q
+
+    def _update_inplace(self, z, hx, h_jacobian, R, hx_args, hj_args):
+        """Update step that writes into preallocated buffers and solves for the gain instead of inverting S"""
+        if np.isscalar(z):
+            self._z.fill(z)
+        else:
+            np.copyto(self._z, handle_vector(z))
+
+        if not isinstance(hx_args, tuple):
+            hx_args = (hx_args,)
+        if not isinstance(hj_args, tuple):
+            hj_args = (hj_args,)
+        if R is None:
+            R = self.R
+
+        np.subtract(self._z, hx(self.x, *hx_args), out=self.y)
+        H = h_jacobian(self.x, *hj_args)
+        np.matmul(self.P, H.T, out=self._PHt)
+        np.matmul(H, self._PHt, out=self._S)
+        self._S += R
+        if self._S.shape[0] == 1:  # scalar innovation variance
+            np.divide(self._PHt, self._S[0, 0], out=self._K)
+        else:  # K = P H^T S^-1 from S^T K^T = H P^T
+            np.copyto(self._lu, self._S)
+            np.copyto(self._Kt, self._PHt.T)
+            factors = lu_factor(self._lu, overwrite_a=True, check_finite=False)
+            np.copyto(self._K, lu_solve(factors, self._Kt, trans=1, overwrite_b=True, check_finite=False).T)
+
+        np.matmul(self._K, self.y, out=self._xn)
+        self.x += self._xn
+        np.matmul(self._K, H, out=self._nn)
+        np.subtract(self.I, self._nn, out=self._nn)
+        np.matmul(self._nn, self.P, out=self._nn2)
+        np.copyto(self.P, self._nn2)
+
     def reset(self):
         """Resets the state estimate and error covariance to their initial values"""
+        if self.inplace:
+            np.copyto(self.x, self.x0)
+            np.copyto(self.P, self.P0)
+            return
+        self.x = self.x0
+        self.P = self.P0
+
+
+class BatchExtendedKalmanFilter:
+    """Batched Extended Kalman Filter (EKF) that tracks N independent systems at once
+
+    Matrices may be shared by all systems, shape (n, n), or given per system, shape (N, n, n).
+    All operations are stacked NumPy operations over the leading batch axis.
+
+    Args:
+        F (array_like): State transition matrix, shape (n, n) or (N, n, n)
+        B (array_like): Control input matrix, shape (n, m) or (N, n, m)
+        Q (array_like): Process noise covariance, shape (n, n) or (N, n, n)
+        R (array_like): Measurement noise covariance, shape (k, k) or (N, k, k)
+        x0 (array_like): Initial state estimates, shape (N, n) or (N, n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n) or (N, n, n)
+
+    Attributes:
+        F (array_like): State transition matrix, shape (n, n) or (N, n, n)
+        B (array_like): Control input matrix, shape (n, m) or (N, n, m)
+        Q (array_like): Process noise covariance, shape (n, n) or (N, n, n)
+        R (array_like): Measurement noise covariance, shape (k, k) or (N, k, k)
+        x (array_like): Current state estimates, shape (N, n, 1)
+        P (array_like): Current error covariances, shape (N, n, n)
+        x0 (array_like): Initial state estimates, shape (N, n, 1)
+        P0 (array_like): Initial error covariances, shape (N, n, n)
+        I (array_like): Identity matrix, shape (n, n)
+        y (array_like): Measurement residuals (innovations) of the last update, shape (N, k, 1)
+        S (array_like): Innovation covariances of the last update, shape (N, k, k)
+        n_batch (int): Number of systems N
+    """
+
+    def __init__(self, F, B, Q, R, x0, P0):
+        x0 = np.asarray(x0, dtype=float)
+        if x0.ndim not in (2, 3):
+            raise ValueError(f"Expected x0.shape = (N, n) or (N, n, 1). Got x0.shape = {x0.shape} instead.")
+        self.n_batch = x0.shape[0]
+
+        self.F = handle_matrix(F)  # State transition matrix
+        self.B = handle_matrix(B)  # Control input matrix
+        self.Q = handle_matrix(Q)  # Process noise covariance
+        self.R = handle_matrix(R)  # Measurement noise covariance
+        self.x0 = handle_batch_vector(x0, self.n_batch)  # Initial state estimates
+        P0 = handle_matrix(P0)
+        self.P0 = np.broadcast_to(P0, (self.n_batch, *P0.shape[-2:])).copy()  # Initial error covariances
+        self.x = self.x0  # Current state estimates
+        self.P = self.P0  # Current error covariances
+
+        self.I = np.eye(self.x0.shape[1])  # Identity matrix
+        self.y = np.zeros((self.n_batch, self.R.shape[-1], 1))  # Measurement residuals
+        self.S = np.zeros((self.n_batch, self.R.shape[-1], self.R.shape[-1]))  # Innovation covariances
+
+    def predict(self, u):
+        """Predicts the next state estimates based on control inputs u
+
+        Args:
+            u (array_like): Control input, scalar, shape (N,), (N, m) or (N, m, 1)
+        """
+        u = handle_batch_vector(u, self.n_batch)
+
+        self.x = self.F @ self.x + self.B @ u
+        self.P = self.F @ self.P @ np.swapaxes(self.F, -1, -2) + self.Q
+
+    def update(self, z, hx, h_jacobian, R=None, hx_args=(), hj_args=()):
+        """Updates the state estimates based on measurements z
+
+        Args:
+            z (array_like): Measurements, scalar, shape (N,), (N, k) or (N, k, 1)
+            hx (callable): Batched measurement function, shape (N, n, 1) -> (N, k, 1)
+            h_jacobian (callable): Batched measurement Jacobian function, shape (N, n, 1) -> (N, k, n)
+            R (array_like, optional): Measurement noise covariance, shape (k, k) or (N, k, k)
+            hx_args (tuple, optional): Additional arguments to pass to hx
+            hj_args (tuple, optional): Additional arguments to pass to h_jacobian
+        """
+        z = handle_batch_vector(z, self.n_batch)
+
+        if not isinstance(hx_args, tuple):
+            hx_args = (hx_args,)
+        if not isinstance(hj_args, tuple):
+            hj_args = (hj_args,)
+        if R is None:
+            R = self.R
+
+        self.y = z - hx(self.x, *hx_args)
+        H = h_jacobian(self.x, *hj_args)
+        PHt = self.P @ np.swapaxes(H, -1, -2)
+        self.S = H @ PHt + R
+        K = np.swapaxes(np.linalg.solve(self.S, np.swapaxes(PHt, -1, -2)), -1, -2)  # K = P H^T S^-1
+        self.x = self.x + K @ self.y
+        self.P = (self.I - K @ H) @ self.P
+
+    def reset(self):
+        """Resets the state estimates and error covariances to their initial values"""
         self.x = self.x0
         self.P = self.P0
@@ -0,0 +1,121 @@
+import numpy as np
+
+from sox.filter.extended_kalman_filter import BatchExtendedKalmanFilter
+from sox.utils import handle_vector
+
+
+class InteractingMultipleModel:
+    """Interacting Multiple Model (IMM) estimator over a bank of EKF hypotheses
+
+    All hypotheses are stacked into one BatchExtendedKalmanFilter, so mixing, prediction, update and the
+    innovation likelihoods are computed in one batched pass. Hypotheses share the state dimension n and may
+    differ in F, B, Q and R (e.g. different measurement noise levels, or a bias state that is frozen in all but
+    one hypothesis). With an identity transition matrix, the hypotheses do not interact and the estimator is a
+    plain filter bank whose model probabilities follow the accumulated likelihoods.
+
+    Args:
+        F (array_like): State transition matrix, shape (n, n) or (H, n, n)
+        B (array_like): Control input matrix, shape (n, m) or (H, n, m)
+        Q (array_like): Process noise covariance, shape (n, n) or (H, n, n)
+        R (array_like): Measurement noise covariance, shape (k, k) or (H, k, k)
+        x0 (array_like): Initial state estimate, shape (n,) or (n, 1), or per hypothesis, shape (H, n) or (H, n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n) or (H, n, n)
+        transition (array_like): Markov transition probabilities between hypotheses, rows sum to one, shape (H, H)
+        mu0 (array_like, optional): Initial model probabilities, shape (H,). Defaults to uniform.
+
+    Attributes:
+        bank (BatchExtendedKalmanFilter): Stacked hypothesis filters.
+        transition (array_like): Markov transition probabilities between hypotheses, shape (H, H)
+        mu (array_like): Current model probabilities, shape (H,)
+        mu0 (array_like): Initial model probabilities, shape (H,)
+        log_likelihood (array_like): Innovation log-likelihoods of the last update, shape (H,)
+        x (array_like): Combined state estimate, shape (n, 1)
+        P (array_like): Combined error covariance, shape (n, n)
+        y (array_like): Combined measurement residual of the last update, shape (k, 1)
+        n_models (int): Number of hypotheses H
+    """
+
+    def __init__(self, F, B, Q, R, x0, P0, transition, mu0=None):
+        self.transition = np.asarray(transition, dtype=float)
+        self.n_models = self.transition.shape[0]
+        if self.transition.shape != (self.n_models, self.n_models):
+            raise ValueError(f"Expected a square transition matrix. Got shape {self.transition.shape} instead.")
+        if not np.allclose(self.transition.sum(axis=1), 1.0):
+            raise ValueError("Rows of the transition matrix must sum to one")
+
+        n = np.shape(F)[-1]
+        x0 = np.asarray(x0, dtype=float)
+        if x0.ndim < 2 or x0.shape in ((n, 1), (1, n)):  # shared initial state
+            x0 = np.broadcast_to(handle_vector(x0), (self.n_models, n, 1))
+        elif x0.shape == (self.n_models, n):  # one row per hypothesis
+            x0 = x0[:, :, np.newaxis]
+        if x0.shape != (self.n_models, n, 1):
+            raise ValueError(
+                f"Expected x0 of shape (n,), (n, 1), (H, n) or (H, n, 1) with n = {n} and H = {self.n_models}. "
+                f"Got shape {np.shape(x0)} instead."
+            )
+        self.bank = BatchExtendedKalmanFilter(F, B, Q, R, x0, P0)
+
+        self.mu0 = np.full(self.n_models, 1.0 / self.n_models) if mu0 is None else np.asarray(mu0, dtype=float)
+        self.reset()
+
+    def _combine(self):
+        """Combines the hypothesis estimates into the overall estimate weighted by the model probabilities"""
+        bank, mu = self.bank, self.mu
+        self.x = np.einsum("h,hnk->nk", mu, bank.x)
+        dx = bank.x - self.x
+        self.P = np.einsum("h,hij->ij", mu, bank.P + dx @ np.swapaxes(dx, -1, -2))
+
+    def predict(self, u):
+        """Mixes the hypothesis estimates and predicts each of them based on control input u
+
+        Args:
+            u (array_like): Control input, scalar, shape (H,), (H, m) or (H, m, 1)
+        """
+        bank = self.bank
+
+        # mixing probabilities omega[i, j] = P(model i at k-1 | model j at k)
+        self._mu_predicted = self.mu @ self.transition
+        omega = self.transition * self.mu[:, np.newaxis] / np.maximum(self._mu_predicted, np.finfo(float).tiny)
+
+        x_mixed = np.einsum("ij,ink->jnk", omega, bank.x)
+        dx = bank.x[:, np.newaxis] - x_mixed[np.newaxis]  # shape (i, j, n, 1)
+        P_mixed = np.einsum("ij,ijnm->jnm", omega, bank.P[:, np.newaxis] + dx @ np.swapaxes(dx, -1, -2))
+
+        bank.x, bank.P = x_mixed, P_mixed
+        bank.predict(u)
+
+    def update(self, z, hx, h_jacobian, R=None, hx_args=(), hj_args=()):
+        """Updates every hypothesis with measurement z and the model probabilities with their likelihoods
+
+        Args:
+            z (array_like): Measurement, scalar, shape (H,), (H, k) or (H, k, 1)
+            hx (callable): Batched measurement function, shape (H, n, 1) -> (H, k, 1)
+            h_jacobian (callable): Batched measurement Jacobian function, shape (H, n, 1) -> (H, k, n)
+            R (array_like, optional): Measurement noise covariance, shape (k, k) or (H, k, k)
+            hx_args (tuple, optional): Additional arguments to pass to hx
+            hj_args (tuple, optional): Additional arguments to pass to h_jacobian
+        """
+        bank = self.bank
+        bank.update(z, hx, h_jacobian, R=R, hx_args=hx_args, hj_args=hj_args)
+
+        # Gaussian innovation log-likelihood of every hypothesis
+        _, log_det = np.linalg.slogdet(2 * np.pi * bank.S)
+        mahalanobis = (np.swapaxes(bank.y, -1, -2) @ np.linalg.solve(bank.S, bank.y))[:, 0, 0]
+        self.log_likelihood = -0.5 * (mahalanobis + log_det)
+
+        with np.errstate(divide="ignore"):  # hypotheses with zero probability stay at zero
+            log_mu = np.log(self._mu_predicted) + self.log_likelihood
+        mu = np.exp(log_mu - log_mu.max())
+        self.mu = mu / mu.sum()
+        self.y = np.einsum("h,hkl->kl", self.mu, bank.y)
+        self._combine()
+
+    def reset(self):
+        """Resets the hypothesis filters and model probabilities to their initial values"""
+        self.bank.reset()
+        self.mu = self.mu0
+        self._mu_predicted = self.mu0
+        self.log_likelihood = np.zeros(self.n_models)
+        self.y = np.zeros((self.bank.y.shape[1], 1))
+        self._combine()
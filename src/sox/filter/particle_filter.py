@@ -0,0 +1,174 @@
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+
+from sox.utils import handle_matrix, handle_vector
+
+
+def systematic_resample(weights):
+    """Systematic resampling with a single random offset, in O(M)
+
+    Args:
+        weights (array_like): Normalized particle weights, shape (M,)
+
+    Returns:
+        indices (array_like): Indices of the resampled particles, shape (M,)
+    """
+    n_particles = weights.size
+    cumulative = np.cumsum(weights) * n_particles
+    # number of positions (u + j) for j = 0..M-1 below each cumulative weight
+    below = np.clip(np.ceil(cumulative - np.random.random()), 0, n_particles).astype(np.int64)
+    below[-1] = n_particles
+    counts = np.diff(below, prepend=0)
+    return np.repeat(np.arange(n_particles), counts)
+
+
+def stratified_resample(weights):
+    """Stratified resampling with one random position per stratum
+
+    Args:
+        weights (array_like): Normalized particle weights, shape (M,)
+
+    Returns:
+        indices (array_like): Indices of the resampled particles, shape (M,)
+    """
+    n_particles = weights.size
+    positions = (np.random.random(n_particles) + np.arange(n_particles)) / n_particles
+    cumulative = np.cumsum(weights)
+    cumulative[-1] = 1.0
+    return np.searchsorted(cumulative, positions, side="right")
+
+
+class ParticleFilter:
+    """Bootstrap Particle Filter (PF) with additive Gaussian process and measurement noise
+
+    Particles are kept as columns of an (n, M) array and propagated and weighted with vectorized
+    model functions, so there are no Python loops over particles. Weights are kept in log space and the
+    particles are resampled when the effective sample size drops below a fraction of M.
+
+    Args:
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (array_like): Measurement noise covariance, shape (k, k)
+        x0 (array_like): Mean of the initial particle distribution, shape (n, 1)
+        P0 (array_like): Covariance of the initial particle distribution, shape (n, n)
+        n_particles (int): Number of particles M.
+        resampling (str, optional): Resampling scheme, 'systematic' or 'stratified'. Defaults to 'systematic'.
+        resample_threshold (float, optional): Resample when the effective sample size drops below this fraction
+            of M. Defaults to 0.5.
+        random_seed (int, optional): Random seed for reproducibility.
+
+    Attributes:
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (array_like): Measurement noise covariance, shape (k, k)
+        x (array_like): Weighted mean of the particles, shape (n, 1)
+        P (array_like): Weighted covariance of the particles, shape (n, n)
+        x0 (array_like): Mean of the initial particle distribution, shape (n, 1)
+        P0 (array_like): Covariance of the initial particle distribution, shape (n, n)
+        particles (array_like): Particles, shape (n, M)
+        weights (array_like): Normalized particle weights, shape (M,)
+        y (array_like): Measurement residual of the weighted predicted measurement, shape (k, 1)
+        n_particles (int): Number of particles M.
+        resample_threshold (float): Fraction of M below which the particles are resampled.
+        resampled (bool): Whether the particles were resampled in the last update.
+    """
+
+    def __init__(
+        self,
+        Q,
+        R,
+        x0,
+        P0,
+        n_particles: int,
+        resampling: str = "systematic",
+        resample_threshold: float = 0.5,
+        random_seed=None,
+    ):
+        if resampling == "systematic":
+            self._resample = systematic_resample
+        elif resampling == "stratified":
+            self._resample = stratified_resample
+        else:
+            raise ValueError("resampling must be 'systematic' or 'stratified'")
+        if not (0 <= resample_threshold <= 1):
+            raise ValueError("resample_threshold must be between 0 and 1")
+
+        if random_seed is not None:
+            np.random.seed(random_seed)
+
+        self.Q = handle_matrix(Q)  # Process noise covariance, shape (n, n)
+        self.R = handle_matrix(R)  # Measurement noise covariance, shape (k, k)
+        self.x0 = handle_vector(x0)
+        self.P0 = handle_matrix(P0)
+        self.n_particles = n_particles
+        self.resample_threshold = resample_threshold
+        self.nx = self.x0.shape[0]
+        self.nz = self.R.shape[0]
+
+        self._sqrt_Q = cholesky(self.Q, lower=True)
+        self._sqrt_R = cholesky(self.R, lower=True)
+        self.reset()
+
+    @property
+    def effective_sample_size(self):
+        """Effective sample size 1 / sum(w^2) of the current weights"""
+        return 1.0 / np.dot(self.weights, self.weights)
+
+    def _estimate(self):
+        """Updates the weighted mean and covariance of the particles"""
+        self.x = (self.particles @ self.weights)[:, np.newaxis]
+        dx = self.particles - self.x
+        self.P = (dx * self.weights) @ dx.T
+
+    def predict(self, fx, fx_args=()):
+        """Propagates the particles through the state transition function and adds process noise
+
+        Args:
+            fx (callable): Vectorized state transition function, shape (n, M) -> (n, M)
+            fx_args (tuple, optional): Additional arguments to pass to fx
+        """
+        if not isinstance(fx_args, tuple):
+            fx_args = (fx_args,)
+
+        noise = self._sqrt_Q @ np.random.standard_normal((self.nx, self.n_particles))
+        self.particles = fx(self.particles, *fx_args) + noise
+        self._estimate()
+
+    def update(self, z, hx, R=None, hx_args=()):
+        """Weights the particles by the measurement likelihood and resamples them if needed
+
+        Args:
+            z (array_like): Measurement vector, shape (k, 1)
+            hx (callable): Vectorized measurement function, shape (n, M) -> (k, M)
+            R (array_like, optional): Measurement noise covariance, shape (k, k)
+            hx_args (tuple, optional): Additional arguments to pass to hx
+        """
+        z = handle_vector(z)
+
+        if not isinstance(hx_args, tuple):
+            hx_args = (hx_args,)
+        sqrt_R = self._sqrt_R if R is None else cholesky(handle_matrix(R), lower=True)
+
+        sigmas_h = hx(self.particles, *hx_args)  # shape (k, M)
+        self.y = z - (sigmas_h @ self.weights)[:, np.newaxis]
+
+        # Gaussian log-likelihood of each particle, normalized in log space
+        e = solve_triangular(sqrt_R, z - sigmas_h, lower=True)
+        with np.errstate(divide="ignore"):  # particles with zero weight stay at zero
+            log_weights = np.log(self.weights) - 0.5 * np.einsum("ij,ij->j", e, e)
+        log_weights -= log_weights.max()
+        self.weights = np.exp(log_weights)
+        self.weights /= self.weights.sum()
+        self._estimate()
+
+        self.resampled = self.effective_sample_size < self.resample_threshold * self.n_particles
+        if self.resampled:
+            self.particles = self.particles[:, self._resample(self.weights)]
+            self.weights = np.full(self.n_particles, 1.0 / self.n_particles)
+
+    def reset(self):
+        """Redraws the particles from the initial distribution"""
+        sqrt_P0 = cholesky(self.P0, lower=True)
+        self.particles = self.x0 + sqrt_P0 @ np.random.standard_normal((self.nx, self.n_particles))
+        self.weights = np.full(self.n_particles, 1.0 / self.n_particles)
+        self.y = np.zeros((self.nz, 1))
+        self.resampled = False
+        self._estimate()
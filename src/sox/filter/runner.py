@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from sox.filter.extended_kalman_filter import ExtendedKalmanFilter
+from sox.filter.particle_filter import ParticleFilter
+from sox.filter.square_root_unscented_kalman_filter import SquareRootUnscentedKalmanFilter
+from sox.filter.thevenin_kalman_filter import TheveninExtendedKalmanFilter, TheveninUnscentedKalmanFilter
+from sox.filter.unscented_kalman_filter import UnscentedKalmanFilter
+from sox.sensor import Sensor
+from sox.system.parameter_varying_thevenin import ParameterVaryingThevenin
+
+
+@dataclass
+class Estimates:
+    """Estimation results of an offline filter run.
+
+    Args:
+        states (array_like): State estimates after each update, shape (T, n).
+        covariance_diagonal (array_like): Diagonal of the error covariance after each update, shape (T, n).
+        innovations (array_like): Measurement residuals (innovations), shape (T, k).
+        predicted_measurements (array_like): Measurements predicted from the prior, shape (T, k).
+    """
+
+    states: np.ndarray
+    covariance_diagonal: np.ndarray
+    innovations: np.ndarray
+    predicted_measurements: np.ndarray
+
+
+def read_signal(signal):
+    """Returns the readings of a Sensor or an array of values as a 1D float array."""
+    if isinstance(signal, Sensor):
+        return signal.read_all()
+    return np.asarray(signal, dtype=float).ravel()
+
+
+def run(estimator, system, current, voltage, dt=None) -> Estimates:
+    """Runs a filter over a whole record of current and voltage samples.
+
+    Each sample is processed as in the tutorials: predict with the current reading, then update with the
+    voltage reading. The filter continues from its present state, so call `reset` beforehand to start over.
+
+    Args:
+        estimator (ExtendedKalmanFilter, UnscentedKalmanFilter, SquareRootUnscentedKalmanFilter,
+            TheveninExtendedKalmanFilter, TheveninUnscentedKalmanFilter or ParticleFilter): Filter to run.
+        system (IsothermalThevenin or ParameterVaryingThevenin): System model providing fx, hx, h_jacobian, F and B.
+        current (array_like or Sensor): Current readings (A), shape (T,).
+        voltage (array_like or Sensor): Voltage readings (V), shape (T,).
+        dt (float or array_like, optional): Sampling time(s) in seconds, scalar or shape (T,). Required for
+            unscented and particle filters. For the EKF, F and B are rebuilt from the system if given, otherwise the
+            filter's own F and B are used. The filter's F and B are restored when the run ends. Required for an EKF
+            on a `ParameterVaryingThevenin`, whose F and B are rebuilt with the parameters at the state of charge and
+            current of each step. Ignored by the Thevenin filters, which are discretized at construction.
+
+    Returns:
+        Estimates: Preallocated arrays of states, covariance diagonals, innovations and predicted measurements.
+
+    Raises:
+        ValueError: If current and voltage differ in length, or dt is missing for an unscented or particle filter or
+            for an EKF on a parameter-varying model.
+        TypeError: If the estimator type is not supported.
+    """
+    current = read_signal(current)
+    voltage = read_signal(voltage)
+    if current.shape != voltage.shape:
+        raise ValueError(f"current and voltage must have the same length. Got {current.size} and {voltage.size}.")
+
+    n_steps = current.size
+    restore = (estimator.F, estimator.B) if isinstance(estimator, ExtendedKalmanFilter) else None
+    if isinstance(estimator, (TheveninExtendedKalmanFilter, TheveninUnscentedKalmanFilter)):
+        step = _thevenin_step(estimator)
+    elif isinstance(estimator, ExtendedKalmanFilter) and isinstance(system, ParameterVaryingThevenin):
+        if dt is None:
+            raise ValueError(f"dt is required to run {type(estimator).__name__} on {type(system).__name__}.")
+        step = _linearized_ekf_step(estimator, system, np.broadcast_to(np.asarray(dt, dtype=float), (n_steps,)))
+    elif isinstance(estimator, ExtendedKalmanFilter):
+        step = _ekf_step(estimator, system, dt, n_steps)
+    elif isinstance(estimator, (UnscentedKalmanFilter, SquareRootUnscentedKalmanFilter, ParticleFilter)):
+        if dt is None:
+            raise ValueError(f"dt is required to run {type(estimator).__name__}.")
+        step = _ukf_step(estimator, system, np.broadcast_to(np.asarray(dt, dtype=float), (n_steps,)))
+    else:
+        raise TypeError(f"Unsupported estimator type: {type(estimator).__name__}.")
+
+    nx = estimator.x.shape[0]
+    nz = estimator.y.shape[0]
+    states = np.empty((n_steps, nx))
+    covariance_diagonal = np.empty((n_steps, nx))
+    innovations = np.empty((n_steps, nz))
+
+    try:
+        for k in range(n_steps):
+            step(k, current[k], voltage[k])
+            states[k] = estimator.x[:, 0]
+            covariance_diagonal[k] = np.diagonal(estimator.P)
+            innovations[k] = estimator.y[:, 0]
+    finally:
+        if restore is not None:  # F and B set from dt belong to this run only
+            estimator.F, estimator.B = restore
+
+    return Estimates(
+        states=states,
+        covariance_diagonal=covariance_diagonal,
+        innovations=innovations,
+        predicted_measurements=voltage[:, np.newaxis] - innovations,
+    )
+
+
+def _ekf_step(ekf, system, dt, n_steps):
+    """Returns a function that runs one predict/update step of an extended Kalman filter.
+
+    With dt, the step sets the filter's F and B, which `run` restores afterwards.
+    """
+    if dt is not None and np.ndim(dt) == 0:  # constant sampling time, discretizes once
+        ekf.F, ekf.B = system.F(dt), system.B(dt)
+        dt = None
+    dts = None if dt is None else np.broadcast_to(np.asarray(dt, dtype=float), (n_steps,))
+
+    def step(k, current, voltage):
+        if dts is not None:
+            ekf.F, ekf.B = system.F(dts[k]), system.B(dts[k])
+        ekf.predict(u=current)
+        ekf.update(z=voltage, hx=system.hx, h_jacobian=system.h_jacobian, hx_args=current)
+
+    return step
+
+
+def _linearized_ekf_step(ekf, system, dts):
+    """Returns a function that runs one predict/update step of an extended Kalman filter on a parameter-varying model.
+
+    F, B and the measurement Jacobian are evaluated at the state of charge of the estimate and the current of the step.
+    F and B freeze the parameters there (see `ParameterVaryingThevenin.discretize`), so the predicted covariance leaves
+    out the coupling of the RC overpotentials to state of charge through the parameters.
+    """
+
+    def step(k, current, voltage):
+        ekf.F, ekf.B = system.discretize(dts[k], ekf.x[0, 0], current)
+        ekf.predict(u=current)
+        ekf.update(z=voltage, hx=system.hx, h_jacobian=system.h_jacobian, hx_args=current, hj_args=(current,))
+
+    return step
+
+
+def _ukf_step(ukf, system, dts):
+    """Returns a function that runs one predict/update step of an unscented Kalman filter or a particle filter."""
+
+    def step(k, current, voltage):
+        ukf.predict(fx=system.fx, fx_args=(current, dts[k]))
+        ukf.update(z=voltage, hx=system.hx, hx_args=current)
+
+    return step
+
+
+def _thevenin_step(thevenin_filter):
+    """Returns a function that runs one predict/update step of a specialized Thevenin filter."""
+
+    def step(k, current, voltage):
+        thevenin_filter.predict(current)
+        thevenin_filter.update(voltage, current)
+
+    return step
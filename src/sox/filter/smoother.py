@@ -0,0 +1,226 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+
+from sox.filter.extended_kalman_filter import ExtendedKalmanFilter
+from sox.filter.runner import Estimates, read_signal
+
+
+@dataclass
+class SmoothedEstimates(Estimates):
+    """Estimation results of a Rauch-Tung-Striebel smoother run.
+
+    Args:
+        states (array_like): Smoothed state estimates, shape (T, n).
+        covariance_diagonal (array_like): Diagonal of the smoothed error covariance, shape (T, n).
+        innovations (array_like): Measurement residuals (innovations) of the forward pass, shape (T, k).
+        predicted_measurements (array_like): Measurements predicted from the forward-pass prior, shape (T, k).
+        filtered_states (array_like): Filtered state estimates of the forward pass, shape (T, n).
+        filtered_covariance_diagonal (array_like): Diagonal of the filtered error covariance, shape (T, n).
+    """
+
+    filtered_states: np.ndarray
+    filtered_covariance_diagonal: np.ndarray
+
+
+class RTSSmoother(ABC):
+    """Base class for Rauch-Tung-Striebel (RTS) smoothers
+
+    The forward pass runs the filter sample by sample and stores the prior, the posterior and the
+    cross covariance between consecutive states in preallocated arrays. The backward pass computes all
+    smoother gains with one batched solve and then runs the recursion.
+
+    Without a lag, the whole record is smoothed at once, which stores T covariances. With a lag, the record is
+    smoothed in chunks of `chunk_size` samples, each using `lag` samples past its end (fixed-lag smoothing),
+    so only `chunk_size + lag` covariances are stored.
+
+    Args:
+        estimator: Filter that runs the forward pass.
+        system (IsothermalThevenin): System model providing fx, hx, h_jacobian, F and B.
+        lag (int, optional): Number of future samples used to smooth each sample. Defaults to the whole record.
+        chunk_size (int, optional): Number of samples emitted per backward pass in fixed-lag mode.
+            Defaults to lag.
+    """
+
+    def __init__(self, estimator, system, lag=None, chunk_size=None):
+        if lag is not None and lag < 1:
+            raise ValueError("lag must be a positive number of samples")
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be a positive number of samples")
+
+        self.estimator = estimator
+        self.system = system
+        self.lag = lag
+        self.chunk_size = lag if chunk_size is None else chunk_size
+
+    @abstractmethod
+    def _predict(self, current, dt):
+        """Runs the predict step of the filter"""
+
+    @abstractmethod
+    def _update(self, current, voltage):
+        """Runs the update step of the filter"""
+
+    @abstractmethod
+    def _cross_covariance(self, P_prev):
+        """Cross covariance between the previous posterior and the current prior, shape (n, n)"""
+
+    def _sampling_times(self, dt, n_steps):
+        """Per-step sampling times, or None if the filter uses its own discretization"""
+        if dt is None:
+            return None
+        return np.broadcast_to(np.asarray(dt, dtype=float), (n_steps,))
+
+    def smooth(self, current, voltage, dt=None) -> SmoothedEstimates:
+        """Runs the filter forward over the record, then smooths it backward
+
+        Args:
+            current (array_like or Sensor): Current readings (A), shape (T,).
+            voltage (array_like or Sensor): Voltage readings (V), shape (T,).
+            dt (float or array_like, optional): Sampling time(s) in seconds, scalar or shape (T,). The F and B that an
+                extended Kalman filter gets from dt are replaced by its own ones when the run ends.
+
+        Returns:
+            SmoothedEstimates: Smoothed and filtered states and covariance diagonals, and innovations. An empty
+                record gives empty arrays.
+        """
+        current = read_signal(current)
+        voltage = read_signal(voltage)
+        if current.shape != voltage.shape:
+            raise ValueError(f"current and voltage must have the same length. Got {current.size} and {voltage.size}.")
+
+        estimator = self.estimator
+        n_steps = current.size
+        dts = self._sampling_times(dt, n_steps)
+        n, nz = estimator.x.shape[0], estimator.y.shape[0]
+        window = n_steps if self.lag is None else min(n_steps, self.chunk_size + self.lag)
+
+        # outputs
+        states = np.empty((n_steps, n))
+        covariance_diagonal = np.empty((n_steps, n))
+        filtered_states = np.empty((n_steps, n))
+        filtered_covariance_diagonal = np.empty((n_steps, n))
+        innovations = np.empty((n_steps, nz))
+
+        # forward-pass storage of one window
+        self._x_prior = np.empty((window, n))
+        self._P_prior = np.empty((window, n, n))
+        self._x_post = np.empty((window, n))
+        self._P_post = np.empty((window, n, n))
+        self._cross = np.empty((window, n, n))
+        self._Ps = np.empty((window, n, n))
+
+        restore = (estimator.F, estimator.B) if isinstance(estimator, ExtendedKalmanFilter) else None
+        try:
+            P_prev = np.array(estimator.P, dtype=float)
+            start, j = 0, 0  # index of the first sample in the window, and position in the window
+            for k in range(n_steps):
+                self._predict(current[k], None if dts is None else dts[k])
+                self._x_prior[j] = estimator.x[:, 0]
+                self._P_prior[j] = estimator.P
+                self._cross[j] = self._cross_covariance(P_prev)
+
+                self._update(current[k], voltage[k])
+                self._x_post[j] = estimator.x[:, 0]
+                self._P_post[j] = estimator.P
+                filtered_states[k] = self._x_post[j]
+                filtered_covariance_diagonal[k] = np.diagonal(self._P_post[j])
+                innovations[k] = estimator.y[:, 0]
+                P_prev = self._P_post[j]
+                j += 1
+
+                if j == window and k < n_steps - 1:  # emits a chunk and keeps the lag samples for the next window
+                    chunk = self.chunk_size
+                    self._backward(j, states[start : start + j], covariance_diagonal[start : start + j])
+                    for buffer in (self._x_prior, self._P_prior, self._x_post, self._P_post, self._cross):
+                        buffer[: j - chunk] = buffer[chunk:j]
+                    start, j = start + chunk, j - chunk
+                    P_prev = self._P_post[j - 1]
+
+            self._backward(j, states[start : start + j], covariance_diagonal[start : start + j])
+        finally:
+            if restore is not None:  # F and B set from dt belong to this run only
+                estimator.F, estimator.B = restore
+        return SmoothedEstimates(
+            states=states,
+            covariance_diagonal=covariance_diagonal,
+            innovations=innovations,
+            predicted_measurements=voltage[:, np.newaxis] - innovations,
+            filtered_states=filtered_states,
+            filtered_covariance_diagonal=filtered_covariance_diagonal,
+        )
+
+    def _backward(self, j, states, covariance_diagonal):
+        """Backward pass over the first j samples of the window, writing into the given output slices"""
+        if j == 0:  # empty record
+            return
+        x_prior, P_prior, x_post, P_post = self._x_prior, self._P_prior, self._x_post, self._P_post
+        Ps = self._Ps
+
+        # smoother gains G_k = C_k+1 P_prior_k+1^-1 for the whole window at once
+        G = np.swapaxes(np.linalg.solve(P_prior[1:j], np.swapaxes(self._cross[1:j], -1, -2)), -1, -2)
+        Gt = np.swapaxes(G, -1, -2)
+
+        states[j - 1] = x_post[j - 1]
+        Ps[j - 1] = P_post[j - 1]
+        for k in range(j - 2, -1, -1):
+            states[k] = x_post[k] + G[k] @ (states[k + 1] - x_prior[k + 1])
+            Ps[k] = P_post[k] + G[k] @ (Ps[k + 1] - P_prior[k + 1]) @ Gt[k]
+        covariance_diagonal[:] = np.diagonal(Ps[:j], axis1=1, axis2=2)
+
+
+class ExtendedRTSSmoother(RTSSmoother):
+    """Rauch-Tung-Striebel smoother with an ExtendedKalmanFilter forward pass
+
+    Args:
+        estimator (ExtendedKalmanFilter): Filter that runs the forward pass.
+        system (IsothermalThevenin): System model providing hx, h_jacobian, F and B.
+        lag (int, optional): Number of future samples used to smooth each sample. Defaults to the whole record.
+        chunk_size (int, optional): Number of samples emitted per backward pass in fixed-lag mode.
+            Defaults to lag.
+    """
+
+    def _predict(self, current, dt):
+        if dt is not None:
+            self.estimator.F, self.estimator.B = self.system.F(dt), self.system.B(dt)
+        self.estimator.predict(u=current)
+
+    def _update(self, current, voltage):
+        system = self.system
+        self.estimator.update(z=voltage, hx=system.hx, h_jacobian=system.h_jacobian, hx_args=current)
+
+    def _cross_covariance(self, P_prev):
+        return P_prev @ self.estimator.F.T
+
+
+class UnscentedRTSSmoother(RTSSmoother):
+    """Rauch-Tung-Striebel smoother with an UnscentedKalmanFilter forward pass
+
+    The cross covariance between consecutive states is computed from the sigma points that the filter
+    passed through fx in its predict step.
+
+    Args:
+        estimator (UnscentedKalmanFilter): Filter that runs the forward pass.
+        system (IsothermalThevenin): System model providing fx and hx.
+        lag (int, optional): Number of future samples used to smooth each sample. Defaults to the whole record.
+        chunk_size (int, optional): Number of samples emitted per backward pass in fixed-lag mode.
+            Defaults to lag.
+    """
+
+    def _sampling_times(self, dt, n_steps):
+        if dt is None:
+            raise ValueError("dt is required to run an unscented Kalman filter.")
+        return super()._sampling_times(dt, n_steps)
+
+    def _predict(self, current, dt):
+        self.estimator.predict(fx=self.system.fx, fx_args=(current, dt))
+
+    def _update(self, current, voltage):
+        self.estimator.update(z=voltage, hx=self.system.hx, hx_args=current)
+
+    def _cross_covariance(self, P_prev):
+        ukf = self.estimator
+        dx = ukf.sigmas_x - ukf.sigmas_x[:, :1]  # the first sigma point is the posterior mean
+        df = ukf.sigmas_fx - (ukf.sigmas_fx @ ukf.wm)[:, np.newaxis]
+        return (dx * ukf.wc) @ df.T
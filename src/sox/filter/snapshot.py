@@ -0,0 +1,207 @@
+import copy
+
+import numpy as np
+from scipy.linalg import cholesky
+
+from sox.filter.coulomb_count import CoulombCount, CoulombCountVariableCapacity
+from sox.filter.extended_kalman_filter import BatchExtendedKalmanFilter, ExtendedKalmanFilter
+from sox.filter.square_root_unscented_kalman_filter import SquareRootUnscentedKalmanFilter
+from sox.filter.thevenin_kalman_filter import TheveninExtendedKalmanFilter, TheveninUnscentedKalmanFilter
+from sox.filter.unscented_kalman_filter import UnscentedKalmanFilter
+
+SIGMA_FIELDS = ("alpha", "beta", "kappa")
+SUPPORTED = (
+    ExtendedKalmanFilter,
+    UnscentedKalmanFilter,
+    SquareRootUnscentedKalmanFilter,
+    TheveninExtendedKalmanFilter,
+    TheveninUnscentedKalmanFilter,
+)
+
+
+def snapshot_dtype(n: int) -> np.dtype:
+    """Structured dtype of one filter snapshot record
+
+    Each record holds the state dimension, the state estimate and error covariance (zero-padded to n) and the
+    sigma point parameters (NaN for filters without sigma points).
+
+    Args:
+        n (int): Largest state dimension in the snapshot.
+
+    Returns:
+        np.dtype: Structured dtype with fields 'n', 'x', 'P' and 'sigma'.
+    """
+    return np.dtype([("n", "u2"), ("x", "f8", (n,)), ("P", "f8", (n, n)), ("sigma", "f8", (len(SIGMA_FIELDS),))])
+
+
+def _as_list(filters):
+    """Wraps a single filter in a list"""
+    return list(filters) if isinstance(filters, (list, tuple)) else [filters]
+
+
+def _count(f):
+    """Number of snapshot records of a filter"""
+    return f.n_batch if isinstance(f, BatchExtendedKalmanFilter) else 1
+
+
+def _state_dimension(f):
+    """State dimension of a filter"""
+    if isinstance(f, (CoulombCount, CoulombCountVariableCapacity)):
+        return 1
+    if isinstance(f, BatchExtendedKalmanFilter):
+        return f.x.shape[1]
+    if isinstance(f, SUPPORTED):
+        return f.x.shape[0]
+    raise TypeError(f"Unsupported filter type: {type(f).__name__}.")
+
+
+def _write(f, records):
+    """Writes the state of a filter into its snapshot records"""
+    records["sigma"] = np.nan
+    if isinstance(f, (CoulombCount, CoulombCountVariableCapacity)):
+        records["n"], records["x"][:, 0], records["P"][:, 0, 0] = 1, f.soc, np.nan
+        return
+    n = _state_dimension(f)
+    records["n"] = n
+    if isinstance(f, BatchExtendedKalmanFilter):
+        records["x"][:, :n] = f.x[:, :, 0]
+        records["P"][:, :n, :n] = f.P
+        return
+    records["x"][:, :n] = f.x[:, 0]
+    records["P"][:, :n, :n] = f.P
+    sigma_gen = getattr(f, "sigma_gen", None)
+    if sigma_gen is not None:
+        records["sigma"] = [getattr(sigma_gen, name) for name in SIGMA_FIELDS]
+
+
+def _read(f, records):
+    """Restores the state of a filter from its snapshot records"""
+    n = int(records["n"][0])
+    if n != _state_dimension(f):
+        raise ValueError(f"Snapshot state dimension {n} does not match {type(f).__name__} with {_state_dimension(f)}.")
+    x, P = records["x"][:, :n], records["P"][:, :n, :n]
+    if isinstance(f, (CoulombCount, CoulombCountVariableCapacity)):
+        f.soc = float(x[0, 0])
+        return
+    if isinstance(f, BatchExtendedKalmanFilter):
+        f.x, f.P = x[:, :, np.newaxis].copy(), P.copy()
+        return
+
+    x, P = x[0][:, np.newaxis].copy(), P[0].copy()
+    sigma = records["sigma"][0]
+    if not np.isnan(sigma).any() and hasattr(f, "sigma_gen"):
+        _restore_sigma_gen(f, sigma)
+
+    if isinstance(f, SquareRootUnscentedKalmanFilter):
+        f.x, f.S = x, cholesky(P, lower=True)
+        f.sigmas_f = f.sigma_gen.points_from_factor(f.x, f.S)
+    elif getattr(f, "inplace", False):  # keeps the preallocated buffers
+        np.copyto(f.x, x)
+        np.copyto(f.P, P)
+    else:
+        f.x, f.P = x, P
+    if isinstance(f, UnscentedKalmanFilter):
+        f.sigmas_f = f.sigma_gen.points(f.x, f.P, out=f.sigmas_f if f.inplace else None)
+
+
+def _restore_sigma_gen(f, sigma):
+    """Gives a filter a copy of its sigma point generator with the snapshot configuration, if it differs
+
+    The generator is copied because it may be shared with other filters.
+    """
+    if all(getattr(f.sigma_gen, name) == value for name, value in zip(SIGMA_FIELDS, sigma)):
+        return
+    sigma_gen = copy.copy(f.sigma_gen)
+    for name, value in zip(SIGMA_FIELDS, sigma):
+        setattr(sigma_gen, name, float(value))
+    sigma_gen.wm, sigma_gen.wc = sigma_gen.weights()
+    f.sigma_gen = sigma_gen  # the Thevenin UKF also refreshes its sigma point scale
+    f.wm, f.wc = sigma_gen.wm, sigma_gen.wc
+
+
+def snapshot(filters, out=None) -> np.ndarray:
+    """Captures the state of one or many filters into a contiguous structured array
+
+    A BatchExtendedKalmanFilter contributes one record per batch element, every other filter one record.
+
+    Args:
+        filters: Filter or list of filters (EKF, UKF, SR-UKF, Thevenin filters, batched EKF or Coulomb counters).
+        out (np.ndarray, optional): Preallocated structured array (e.g. a memory map) to write the records into.
+
+    Returns:
+        np.ndarray: Structured array of snapshot records, see `snapshot_dtype`.
+
+    Raises:
+        TypeError: If a filter is not supported, e.g. a ParticleFilter or an InteractingMultipleModel.
+    """
+    filters = _as_list(filters)
+    n_records = sum(_count(f) for f in filters)
+    n = max(_state_dimension(f) for f in filters)
+    if out is None:
+        out = np.zeros(n_records, dtype=snapshot_dtype(n))
+    elif out.shape != (n_records,) or out.dtype["x"].shape[0] < n:
+        raise ValueError(f"Expected out with {n_records} records of state dimension >= {n}.")
+
+    start = 0
+    for f in filters:
+        _write(f, out[start : start + _count(f)])
+        start += _count(f)
+    return out
+
+
+def restore(filters, snapshots):
+    """Restores the state of one or many filters from snapshot records
+
+    Args:
+        filters: Filter or list of filters, in the same order as when the snapshot was taken.
+        snapshots (np.ndarray): Structured array of snapshot records.
+
+    Raises:
+        ValueError: If the number of records or a state dimension does not match the filters.
+        TypeError: If a filter is not supported, e.g. a ParticleFilter or an InteractingMultipleModel.
+    """
+    filters = _as_list(filters)
+    for f in filters:  # checks every filter type before any filter is changed
+        _state_dimension(f)
+    n_records = sum(_count(f) for f in filters)
+    if snapshots.shape != (n_records,):
+        raise ValueError(f"Expected {n_records} snapshot records. Got {snapshots.shape[0]} instead.")
+
+    start = 0
+    for f in filters:
+        _read(f, snapshots[start : start + _count(f)])
+        start += _count(f)
+
+
+def save_snapshots(path, filters):
+    """Saves the state of one or many filters to a memory-mappable .npy file
+
+    Records are written straight into the memory-mapped file, without pickling the filter objects.
+
+    Args:
+        path (str or Path): Path of the .npy file.
+        filters: Filter or list of filters.
+    """
+    filters = _as_list(filters)
+    n_records = sum(_count(f) for f in filters)
+    n = max(_state_dimension(f) for f in filters)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=snapshot_dtype(n), shape=(n_records,))
+    snapshot(filters, out=out)
+    out.flush()
+
+
+def load_snapshots(path, filters=None, mmap_mode="r"):
+    """Loads snapshot records from a .npy file and optionally restores filters from them
+
+    Args:
+        path (str or Path): Path of the .npy file.
+        filters (optional): Filter or list of filters to restore.
+        mmap_mode (str, optional): Memory-map mode passed to np.load. Defaults to 'r'.
+
+    Returns:
+        np.ndarray: Structured array (memory map) of snapshot records.
+    """
+    snapshots = np.load(path, mmap_mode=mmap_mode)
+    if filters is not None:
+        restore(filters, snapshots)
+    return snapshots
@@ -0,0 +1,204 @@
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+
+from sox.utils import handle_matrix, handle_vector
+
+
+def cholupdate(L, v, sign=1.0):
+    """Rank-1 update (sign > 0) or downdate (sign < 0) of a lower-triangular Cholesky factor
+
+    Computes the factor of L @ L.T + sign * v @ v.T without refactorizing it.
+
+    Args:
+        L (array_like): Lower-triangular Cholesky factor, shape (n, n)
+        v (array_like): Update vector, shape (n,) or (n, 1)
+        sign (float, optional): Positive for an update and negative for a downdate. Defaults to 1.
+
+    Returns:
+        L (array_like): Updated lower-triangular Cholesky factor, shape (n, n)
+
+    Raises:
+        LinAlgError: If a downdate results in a matrix that is not positive definite
+    """
+    L = np.array(L, dtype=float)
+    v = np.array(v, dtype=float).ravel()
+    sign = 1.0 if sign >= 0 else -1.0
+    for k in range(L.shape[0]):
+        r2 = L[k, k] ** 2 + sign * v[k] ** 2
+        if r2 <= 0:
+            raise np.linalg.LinAlgError("Cholesky downdate failed: result is not positive definite.")
+        r = np.sqrt(r2)
+        c = r / L[k, k]
+        s = v[k] / L[k, k]
+        L[k, k] = r
+        L[k + 1 :, k] = (L[k + 1 :, k] + sign * s * v[k + 1 :]) / c
+        v[k + 1 :] = c * v[k + 1 :] - s * L[k + 1 :, k]
+    return L
+
+
+def qr_factor(A):
+    """Lower-triangular factor S of A @ A.T (S @ S.T = A @ A.T) from a QR decomposition of A.T
+
+    Args:
+        A (array_like): Compound matrix, shape (n, m) with m >= n
+
+    Returns:
+        S (array_like): Lower-triangular factor with non-negative diagonal, shape (n, n)
+    """
+    R = np.linalg.qr(A.T, mode="r")
+    signs = np.where(np.diag(R) < 0, -1.0, 1.0)
+    return (R * signs[:, np.newaxis]).T
+
+
+class SquareRootUnscentedKalmanFilter:
+    """Square-root Unscented Kalman Filter (SR-UKF)
+
+    Propagates the lower-triangular Cholesky factor S of the error covariance (P = S @ S.T) through QR
+    decompositions and rank-1 Cholesky updates/downdates, so P is never refactorized and stays positive
+    semi-definite by construction. Sigma points are generated with `MerweSigmaPoints.points_from_factor`,
+    hence the `sqrt_method` of the generator is not used.
+
+    Args:
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (array_like): Measurement noise covariance, shape (k, k)
+        x0 (array_like): Initial state estimate, shape (n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n)
+        sigma_gen (MerweSigmaPoints): Sigma point generator
+        vectorized (bool, optional): If True, fx and hx are called once with all sigma points,
+            shape (n, 2n+1) -> (n, 2n+1) and (n, 2n+1) -> (k, 2n+1). Defaults to False.
+
+    Attributes:
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (array_like): Measurement noise covariance, shape (k, k)
+        x (array_like): Current state estimate, shape (n, 1)
+        S (array_like): Lower-triangular factor of the current error covariance, shape (n, n)
+        P (array_like): Current error covariance, shape (n, n)
+        x0 (array_like): Initial state estimate, shape (n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n)
+        sigma_gen (MerweSigmaPoints): Sigma point generator
+        sigmas_f (array_like): Predicted sigma points, shape (n, 2n+1)
+        sigmas_h (array_like): Measurement sigma points, shape (k, 2n+1)
+        wm (array_like): Weights for means, shape (2n+1,)
+        wc (array_like): Weights for covariance, shape (2n+1,)
+        y (array_like): Measurement residual (innovation) of the last update, shape (k, 1)
+        vectorized (bool): Whether fx and hx are evaluated on all sigma points at once
+    """
+
+    def __init__(self, Q, R, x0, P0, sigma_gen, vectorized=False):
+        self.Q = handle_matrix(Q)  # Process noise covariance, shape (n, n)
+        self.R = handle_matrix(R)  # Measurement noise covariance, shape (k, k)
+        self.x = handle_vector(x0)  # Initial state estimate, shape (n, 1)
+        self.x0 = handle_vector(x0)
+        self.P0 = handle_matrix(P0)
+        self.S = cholesky(self.P0, lower=True)  # factor of the error covariance, shape (n, n)
+
+        self.sigma_gen = sigma_gen  # Sigma point generator
+        self.nx = self.x0.shape[0]
+        self.nz = self.R.shape[0]
+        self.sigmas_f = np.zeros((self.nx, 2 * self.nx + 1))  # predicted sigma points
+        self.sigmas_h = np.zeros((self.nz, 2 * self.nx + 1))  # measurement sigma points
+        self.y = np.zeros((self.nz, 1))  # measurement residual
+        self.wm = sigma_gen.wm  # weights for means, shape (2n+1,)
+        self.wc = sigma_gen.wc  # weights for covariance, shape (2n+1,)
+        self.vectorized = vectorized
+
+        self._sqrt_Q = cholesky(self.Q, lower=True)
+        self._sqrt_R = cholesky(self.R, lower=True)
+
+    @property
+    def P(self):
+        """Current error covariance, shape (n, n)"""
+        return self.S @ self.S.T
+
+    def _transform(self, sigmas, sqrt_noise):
+        """Square-root unscented transform of sigma points with additive noise
+
+        Args:
+            sigmas (array_like): Transformed sigma points, shape (d, 2n+1)
+            sqrt_noise (array_like): Lower-triangular factor of the additive noise covariance, shape (d, d)
+
+        Returns:
+            mean (array_like): Mean of the transformed points, shape (d, 1)
+            S (array_like): Lower-triangular factor of the covariance of the transformed points, shape (d, d)
+        """
+        mean = (sigmas @ self.wm)[:, np.newaxis]
+        dev = sigmas - mean
+        S = qr_factor(np.hstack([np.sqrt(self.wc[1]) * dev[:, 1:], sqrt_noise]))
+        S = cholupdate(S, np.sqrt(abs(self.wc[0])) * dev[:, 0], self.wc[0])
+        return mean, S
+
+    def predict(self, fx, fx_args=()):
+        """Predicts the next state of the filter given the current state and the state transition function
+
+        Args:
+            fx (callable): State transition function, shape (n, 1) -> (n, 1),
+                or (n, 2n+1) -> (n, 2n+1) if the filter is vectorized
+            fx_args (tuple, optional): Additional arguments to pass to fx
+        """
+        if not isinstance(fx_args, tuple):
+            fx_args = (fx_args,)
+
+        # calculate sigma points for given mean and covariance factor
+        sigmas = self.sigma_gen.points_from_factor(self.x, self.S)  # shape (n, 2n+1)
+        if self.vectorized:
+            sigmas_f = fx(sigmas, *fx_args)
+        else:
+            sigmas_f = np.hstack([fx(s[:, np.newaxis], *fx_args) for s in sigmas.T])
+
+        # pass sigmas through the square-root unscented transform to compute prior
+        self.x, self.S = self._transform(sigmas_f, self._sqrt_Q)
+
+        # update sigma points to reflect the new variance of the points
+        self.sigmas_f = self.sigma_gen.points_from_factor(self.x, self.S)
+
+    def update(self, z, hx, R=None, hx_args=()):
+        """Updates the state estimate and covariance factor given a measurement vector and measurement function
+
+        Args:
+            z (array_like): Measurement vector, shape (k, 1)
+            hx (callable): Measurement function, shape (n, 1) -> (k, 1),
+                or (n, 2n+1) -> (k, 2n+1) if the filter is vectorized
+            R (array_like, optional): Measurement noise covariance, shape (k, k)
+            hx_args (tuple, optional): Additional arguments to pass to hx
+
+        Raises:
+            LinAlgError: If the covariance downdate results in a matrix that is not positive definite
+        """
+        z = handle_vector(z)
+
+        if not isinstance(hx_args, tuple):
+            hx_args = (hx_args,)
+        sqrt_R = self._sqrt_R if R is None else cholesky(handle_matrix(R), lower=True)
+
+        if self.vectorized:
+            self.sigmas_h = hx(self.sigmas_f, *hx_args)
+        else:
+            self.sigmas_h = np.hstack([hx(s[:, np.newaxis], *hx_args) for s in self.sigmas_f.T])
+
+        # mean and covariance factor of prediction passed through unscented transform
+        zp, Sz = self._transform(self.sigmas_h, sqrt_R)
+
+        # compute cross variance of the state and the measurements
+        dx = self.sigmas_f - self.x
+        dz = self.sigmas_h - zp
+        Pxz = (dx * self.wc) @ dz.T  # shape (n, k)
+
+        # Kalman gain K = Pxz (Sz Sz^T)^-1 from two triangular solves
+        K = solve_triangular(Sz, solve_triangular(Sz, Pxz.T, lower=True), lower=True, trans="T").T
+        self.y = z - zp  # residual
+
+        # update Gaussian state estimate (x, S)
+        self.x = self.x + K @ self.y
+        U = K @ Sz
+        for i in range(U.shape[1]):
+            self.S = cholupdate(self.S, U[:, i], -1.0)
+
+    def reset(self):
+        """Resets the filter to its initial state"""
+        self.x = self.x0
+        self.S = cholesky(self.P0, lower=True)
+        self.sigmas_f = self.sigma_gen.points_from_factor(self.x, self.S)
+        self.sigmas_h = np.zeros((self.nz, 2 * self.nx + 1))
+        self.y = np.zeros((self.nz, 1))
+        self.wm = self.sigma_gen.wm
+        self.wc = self.sigma_gen.wc
@@ -0,0 +1,293 @@
+import math
+
+import numpy as np
+
+from sox.system.isothermal_thevenin import IsothermalThevenin
+from sox.utils import handle_matrix, handle_vector
+
+
+class TheveninExtendedKalmanFilter:
+    """Extended Kalman Filter (EKF) specialized for an isothermal Thevenin model with a voltage measurement
+
+    Fast path for the 2-state (SOC, V_rc1) and 3-state (SOC, V_rc1, V_rc2) models with a scalar measurement
+    noise. The state and covariance are kept as Python floats, the covariance update is unrolled and the
+    innovation variance is a scalar, so no matrix inversion is performed. A 1-RC model runs through the 2-RC
+    kernel with a zero-padded second RC pair. The results are numerically equivalent to
+    `ExtendedKalmanFilter(F=system.F(dt), B=system.B(dt), ...)` updated with `system.hx` and `system.h_jacobian`.
+
+    Args:
+        system (IsothermalThevenin): Isothermal Thevenin model with one or two RC pairs.
+        dt (float): Sampling time (s).
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (float): Measurement noise variance (V^2)
+        x0 (array_like): Initial state estimate, shape (n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n)
+
+    Attributes:
+        system (IsothermalThevenin): Isothermal Thevenin model.
+        dt (float): Sampling time (s).
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (float): Measurement noise variance (V^2)
+        x (array_like): Current state estimate, shape (n, 1)
+        P (array_like): Current error covariance, shape (n, n)
+        x0 (array_like): Initial state estimate, shape (n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n)
+        y (array_like): Measurement residual (innovation) of the last update, shape (1, 1)
+    """
+
+    def __init__(self, system, dt: float, Q, R: float, x0, P0):
+        if not isinstance(system, IsothermalThevenin):  # e.g. ParameterVaryingThevenin, whose parameters vary per step
+            raise TypeError(f"Expected an IsothermalThevenin model. Got {type(system).__name__} instead.")
+        self.nx = 1 + system.n_rc
+        if self.nx not in (2, 3):
+            raise ValueError(f"Expected a Thevenin model with 1 or 2 RC pairs. Got {self.nx - 1} RC pairs instead.")
+
+        self.system = system
+        self.dt = dt
+        self.Q = handle_matrix(Q)
+        self.R = float(np.squeeze(R))
+        self.x0 = handle_vector(x0)
+        self.P0 = handle_matrix(P0)
+
+        # discrete-time model, padded to two RC pairs
+        decay = [math.exp(-dt / (r * c)) for r, c in zip(system.rc_resistances, system.rc_capacitors)]
+        gain = [r * (1 - f) for r, f in zip(system.rc_resistances, decay)]
+        self._a1, self._a2 = (decay + [1.0])[:2]
+        self._b1, self._b2 = (gain + [0.0])[:2]
+        self._b0 = -dt / (system.capacity * 3600.0)
+        self._q = self._pack_covariance(self.Q)
+        self._y = 0.0
+        self.reset()
+
+    def _pack_covariance(self, P):
+        """Returns the upper triangle (p00, p01, p02, p11, p12, p22) of a zero-padded 3x3 covariance"""
+        padded = np.zeros((3, 3))
+        padded[: self.nx, : self.nx] = P
+        return [float(padded[i, j]) for i, j in ((0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2))]
+
+    @property
+    def x(self):
+        """Current state estimate, shape (n, 1)"""
+        return np.array(self._x[: self.nx])[:, np.newaxis]
+
+    @x.setter
+    def x(self, x):
+        self._x = ([float(v) for v in handle_vector(x)[:, 0]] + [0.0])[:3]
+
+    @property
+    def P(self):
+        """Current error covariance, shape (n, n)"""
+        p00, p01, p02, p11, p12, p22 = self._p
+        P = np.array([[p00, p01, p02], [p01, p11, p12], [p02, p12, p22]])
+        return P[: self.nx, : self.nx]
+
+    @P.setter
+    def P(self, P):
+        self._p = self._pack_covariance(P)
+
+    @property
+    def y(self):
+        """Measurement residual (innovation) of the last update, shape (1, 1)"""
+        return np.array([[self._y]])
+
+    def predict(self, current: float):
+        """Predicts the next state estimate based on the current
+
+        Args:
+            current (float): Current (A).
+        """
+        i = float(current)
+        s, v1, v2 = self._x
+        p00, p01, p02, p11, p12, p22 = self._p
+        q00, q01, q02, q11, q12, q22 = self._q
+        a1, a2 = self._a1, self._a2
+
+        self._x = [s + self._b0 * i, a1 * v1 + self._b1 * i, a2 * v2 + self._b2 * i]
+        self._p = [
+            p00 + q00,
+            a1 * p01 + q01,
+            a2 * p02 + q02,
+            a1 * a1 * p11 + q11,
+            a1 * a2 * p12 + q12,
+            a2 * a2 * p22 + q22,
+        ]
+
+    def update(self, voltage: float, current: float):
+        """Updates the state estimate based on the voltage measurement
+
+        Args:
+            voltage (float): Measured voltage (V).
+            current (float): Current (A).
+        """
+        s, v1, v2 = self._x
+        p00, p01, p02, p11, p12, p22 = self._p
+        system = self.system
+
+        h0 = float(system.docv(s))
+        self._y = y = float(voltage) - (float(system.ocv(s)) - v1 - v2 - system.series_resistance * float(current))
+
+        # P H^T with H = [dOCV/dSOC, -1, -1], and scalar innovation variance
+        c0 = p00 * h0 - p01 - p02
+        c1 = p01 * h0 - p11 - p12
+        c2 = p02 * h0 - p12 - p22
+        S = h0 * c0 - c1 - c2 + self.R
+        k0, k1, k2 = c0 / S, c1 / S, c2 / S
+
+        self._x = [s + k0 * y, v1 + k1 * y, v2 + k2 * y]
+        self._p = [p00 - k0 * c0, p01 - k0 * c1, p02 - k0 * c2, p11 - k1 * c1, p12 - k1 * c2, p22 - k2 * c2]
+
+    def reset(self):
+        """Resets the state estimate and error covariance to their initial values"""
+        self.x = self.x0
+        self.P = self.P0
+        self._y = 0.0
+
+
+class TheveninUnscentedKalmanFilter:
+    """Unscented Kalman Filter (UKF) specialized for an isothermal Thevenin model with a voltage measurement
+
+    Fast path for the 2-state (SOC, V_rc1) and 3-state (SOC, V_rc1, V_rc2) models with a scalar measurement
+    noise. The model is evaluated inline on all sigma points at once, the Cholesky factorization is unrolled
+    and the innovation variance is a scalar, so no matrix inversion is performed. The results are numerically
+    equivalent to `UnscentedKalmanFilter` with `system.fx` and `system.hx` and the same sigma point generator.
+
+    Args:
+        system (IsothermalThevenin): Isothermal Thevenin model with one or two RC pairs.
+        dt (float): Sampling time (s).
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (float): Measurement noise variance (V^2)
+        x0 (array_like): Initial state estimate, shape (n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n)
+        sigma_gen (MerweSigmaPoints): Sigma point generator, only its scaling parameters and weights are used.
+
+    Attributes:
+        system (IsothermalThevenin): Isothermal Thevenin model.
+        dt (float): Sampling time (s).
+        Q (array_like): Process noise covariance, shape (n, n)
+        R (float): Measurement noise variance (V^2)
+        x (array_like): Current state estimate, shape (n, 1)
+        P (array_like): Current error covariance, shape (n, n)
+        x0 (array_like): Initial state estimate, shape (n, 1)
+        P0 (array_like): Initial error covariance, shape (n, n)
+        sigma_gen (MerweSigmaPoints): Sigma point generator
+        sigmas_f (array_like): Predicted sigma points, shape (n, 2n+1)
+        wm (array_like): Weights for means, shape (2n+1,)
+        wc (array_like): Weights for covariance, shape (2n+1,)
+        y (array_like): Measurement residual (innovation) of the last update, shape (1, 1)
+    """
+
+    def __init__(self, system, dt: float, Q, R: float, x0, P0, sigma_gen):
+        if not isinstance(system, IsothermalThevenin):  # e.g. ParameterVaryingThevenin, whose parameters vary per step
+            raise TypeError(f"Expected an IsothermalThevenin model. Got {type(system).__name__} instead.")
+        self.nx = n = 1 + system.n_rc
+        if n not in (2, 3):
+            raise ValueError(f"Expected a Thevenin model with 1 or 2 RC pairs. Got {n - 1} RC pairs instead.")
+
+        self.system = system
+        self.dt = dt
+        self.Q = handle_matrix(Q)
+        self.R = float(np.squeeze(R))
+        self.x0 = handle_vector(x0)
+        self.P0 = handle_matrix(P0)
+        self.sigma_gen = sigma_gen  # also sets wm, wc and the sigma point scale
+
+        r = np.asarray(system.rc_resistances, dtype=float)[:, np.newaxis]
+        c = np.asarray(system.rc_capacitors, dtype=float)[:, np.newaxis]
+        self._decay = np.exp(-dt / (r * c))
+        self._gain = r * (1 - self._decay)
+        self._b0 = -dt / (system.capacity * 3600.0)
+        self.reset()
+
+    @property
+    def x(self):
+        """Current state estimate, shape (n, 1)"""
+        return self._x[:, np.newaxis]
+
+    @x.setter
+    def x(self, x):
+        self._x = handle_vector(x)[:, 0].astype(float)
+
+    @property
+    def P(self):
+        """Current error covariance, shape (n, n)"""
+        return self._P
+
+    @P.setter
+    def P(self, P):
+        self._P = np.array(P, dtype=float)
+        self.sigmas_f = self._sigma_points(self._x, self._P)
+
+    @property
+    def y(self):
+        """Measurement residual (innovation) of the last update, shape (1, 1)"""
+        return np.array([[self._y]])
+
+    @property
+    def sigma_gen(self):
+        """Sigma point generator, only its scaling parameters and weights are used"""
+        return self._sigma_gen
+
+    @sigma_gen.setter
+    def sigma_gen(self, sigma_gen):
+        self._sigma_gen = sigma_gen
+        self.wm, self.wc = sigma_gen.wm, sigma_gen.wc
+        self._scale = math.sqrt(sigma_gen.alpha**2 * (self.nx + sigma_gen.kappa))  # sqrt(n + lambda)
+
+    def _sigma_points(self, x, P):
+        """Sigma points from an unrolled lower Cholesky factor of P, shape (n, 2n+1)"""
+        l00 = math.sqrt(P[0, 0])
+        l10 = P[1, 0] / l00
+        l11 = math.sqrt(P[1, 1] - l10 * l10)
+        if self.nx == 2:
+            L = np.array([[l00, 0.0], [l10, l11]])
+        else:
+            l20 = P[2, 0] / l00
+            l21 = (P[2, 1] - l20 * l10) / l11
+            l22 = math.sqrt(P[2, 2] - l20 * l20 - l21 * l21)
+            L = np.array([[l00, 0.0, 0.0], [l10, l11, 0.0], [l20, l21, l22]])
+        L *= self._scale
+        xc = x[:, np.newaxis]
+        return np.hstack([xc, xc + L, xc - L])
+
+    def predict(self, current: float):
+        """Predicts the next state estimate based on the current
+
+        Args:
+            current (float): Current (A).
+        """
+        i = float(current)
+        sigmas = self._sigma_points(self._x, self._P)
+        sigmas[0] += self._b0 * i
+        sigmas[1:] = sigmas[1:] * self._decay + i * self._gain
+
+        self._x = sigmas @ self.wm
+        dx = sigmas - self._x[:, np.newaxis]
+        self._P = (dx * self.wc) @ dx.T + self.Q
+        self.sigmas_f = self._sigma_points(self._x, self._P)
+
+    def update(self, voltage: float, current: float):
+        """Updates the state estimate based on the voltage measurement
+
+        Args:
+            voltage (float): Measured voltage (V).
+            current (float): Current (A).
+        """
+        sigmas = self.sigmas_f
+        system = self.system
+        sigmas_h = system.ocv(sigmas[0]) - sigmas[1:].sum(axis=0) - system.series_resistance * float(current)
+
+        zp = float(sigmas_h @ self.wm)
+        dz = sigmas_h - zp
+        wdz = dz * self.wc
+        S = float(wdz @ dz) + self.R  # scalar innovation variance
+        Pxz = (sigmas - self._x[:, np.newaxis]) @ wdz  # shape (n,)
+
+        self._y = float(voltage) - zp
+        self._x = self._x + Pxz * (self._y / S)
+        self._P = self._P - np.outer(Pxz, Pxz / S)
+
+    def reset(self):
+        """Resets the filter to its initial state"""
+        self.x = self.x0
+        self.P = self.P0  # also redraws the sigma points
+        self._y = 0.0
@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.linalg import cholesky
+from scipy.linalg import cholesky, lu_factor, lu_solve
 
 from sox.utils import handle_matrix, handle_vector
 
@@ -37,12 +37,13 @@ class MerweSigmaPoints:
             self.sqrt = sqrt_method
         self.wm, self.wc = self.weights()
 
-    def points(self, x, P):
+    def points(self, x, P, out=None):
         """Computes sigma points for given mean and covariance
 
         Args:
             x (array_like): Mean vector, shape (n, 1)
             P (array_like): Covariance matrix, shape (n, n)
+            out (array_like, optional): Preallocated array to write the sigma points into, shape (n, 2n+1)
 
         Returns:
             sigmas (array_like): Sigma points, shape (n, 2n+1)
@@ -56,14 +57,35 @@ class MerweSigmaPoints:
 
         lambda_ = self.alpha**2 * (n + self.kappa) - n
         delta = self.sqrt((lambda_ + n) * P)
-        sigma_points = np.zeros((n, 2 * n + 1))
-        xt = x.transpose()
-        sigma_points[:, 0] = xt
-        for k in range(n):
-            sigma_points[:, k + 1] = xt + delta[k]
-            sigma_points[:, n + k + 1] = xt - delta[k]
+        sigma_points = np.zeros((n, 2 * n + 1)) if out is None else out
+        sigma_points[:, :1] = x
+        np.add(x, delta.T, out=sigma_points[:, 1 : n + 1])  # rows of delta become columns
+        np.subtract(x, delta.T, out=sigma_points[:, n + 1 :])
         return sigma_points
 
+    def points_from_factor(self, x, S):
+        """Computes sigma points for given mean and lower-triangular square root of the covariance
+
+        Unlike `points`, no factorization of the covariance is performed.
+
+        Args:
+            x (array_like): Mean vector, shape (n, 1)
+            S (array_like): Lower-triangular factor of the covariance (P = S @ S.T), shape (n, n)
+
+        Returns:
+            sigmas (array_like): Sigma points, shape (n, 2n+1)
+        """
+        n = self.n
+        if n != x.shape[0] or (n, n) != S.shape:
+            raise ValueError(
+                f"Expected x.shape = ({n}, 1) and S.shape = ({n}, {n}). "
+                f"Got x.shape = {x.shape} and S.shape = {S.shape} instead."
+            )
+
+        lambda_ = self.alpha**2 * (n + self.kappa) - n
+        delta = np.sqrt(lambda_ + n) * S
+        return np.hstack([x, x + delta, x - delta])
+
     def weights(self):
         """Computes weights for mean and covariance
 
@@ -102,7 +124,7 @@ def unscented_transform(sigma_points, wm, wc, noise_cov=None):
     """
     mean = (sigma_points @ wm)[:, np.newaxis]  # shape (n, 1)
     y = sigma_points - mean  # shape (n, 2n+1)
-    cov = y @ np.diag(wc) @ y.T  # shape (n, n)
+    cov = (y * wc) @ y.T  # shape (n, n)
     if noise_cov is not None:
         cov += noise_cov
     return mean, cov
@@ -117,6 +139,13 @@ class UnscentedKalmanFilter:
         x0 (array_like): Initial state estimate, shape (n, 1)
         P0 (array_like): Initial error covariance, shape (n, n)
         sigma_gen (callable): Sigma point generator function
+        vectorized (bool, optional): If True, fx and hx are called once with all sigma points,
+            shape (n, 2n+1) -> (n, 2n+1) and (n, 2n+1) -> (k, 2n+1). Defaults to False.
+        redraw_sigmas (bool, optional): If True, sigma points are redrawn from the prior (x, P) at the end of
+            predict. If False, update reuses the propagated sigma points and skips one factorization of P.
+            Defaults to True.
+        inplace (bool, optional): If True, work buffers are preallocated and predict/update overwrite x, P and
+            the sigma points in place without explicit matrix inversion. Defaults to False.
 
     Attributes:
         Q (array_like): Process noise covariance, shape (n, n)
@@ -128,11 +157,17 @@ class UnscentedKalmanFilter:
         sigma_gen (callable): Sigma point generator function
         sigmas_f (array_like): Predicted sigma points, shape (n, 2n+1)
         sigmas_h (array_like): Measurement sigma points, shape (k, 2n+1)
+        sigmas_x (array_like): Sigma points of the posterior passed to fx by the last predict, shape (n, 2n+1)
+        sigmas_fx (array_like): Sigma points returned by fx in the last predict, shape (n, 2n+1)
         wm (array_like): Weights for means, shape (2n+1,)
         wc (array_like): Weights for covariance, shape (2n+1,)
+        y (array_like): Measurement residual (innovation) of the last update, shape (k, 1)
+        vectorized (bool): Whether fx and hx are evaluated on all sigma points at once
+        redraw_sigmas (bool): Whether sigma points are redrawn from the prior at the end of predict
+        inplace (bool): Whether predict/update run on preallocated buffers
     """
 
-    def __init__(self, Q, R, x0, P0, sigma_gen):
+    def __init__(self, Q, R, x0, P0, sigma_gen, vectorized=False, redraw_sigmas=True, inplace=False):
         self.Q = handle_matrix(Q)  # Process noise covariance, shape (n, n)
         self.R = handle_matrix(R)  # Measurement noise covariance, shape (k, k)
         self.x = handle_vector(x0)  # Initial state estimate, shape (n, 1)
@@ -145,69 +180,177 @@ class UnscentedKalmanFilter:
         self.nz = self.R.shape[0]
         self.sigmas_f = np.zeros((self.nx, 2 * self.nx + 1))  # predicted sigma points
         self.sigmas_h = np.zeros((self.nz, 2 * self.nx + 1))  # measurement sigma points
+        self.sigmas_x = np.zeros((self.nx, 2 * self.nx + 1))  # posterior sigma points passed to fx
+        self.sigmas_fx = np.zeros((self.nx, 2 * self.nx + 1))  # sigma points returned by fx
+        self.y = np.zeros((self.nz, 1))  # measurement residual
         self.wm = sigma_gen.wm  # weights for means, shape (2n+1,)
         self.wc = sigma_gen.wc  # weights for covariance, shape (2n+1,)
+        self.vectorized = vectorized
+        self.redraw_sigmas = redraw_sigmas
+
+        self.inplace = inplace
+        if inplace:
+            self.x = self.x.astype(float)  # owns its buffer, so x0 is never overwritten
+            self.P = self.P.astype(float)
+            self._allocate_buffers()
+
+    def _allocate_buffers(self):
+        """Preallocates work buffers for in-place predict/update"""
+        n, k, m = self.nx, self.nz, 2 * self.nx + 1
+        self._sigmas = np.zeros((n, m))  # sigma points of the posterior
+        self._dx = np.zeros((n, m))  # state deviations from the mean
+        self._wdx = np.zeros((n, m))  # weighted state deviations
+        self._dz = np.zeros((k, m))  # measurement deviations from the mean
+        self._wdz = np.zeros((k, m))  # weighted measurement deviations
+        self._z = np.zeros((k, 1))  # measurement
+        self._zp = np.zeros((k, 1))  # predicted measurement
+        self._S = np.zeros((k, k))  # innovation covariance
+        self._Pxz = np.zeros((n, k))  # state-measurement cross covariance
+        self._K = np.zeros((n, k))  # Kalman gain
+        self._KS = np.zeros((n, k))  # K @ S
+        self._lu = np.zeros((k, k), order="F")  # LU factors of S, Fortran order so LAPACK works in place
+        self._Kt = np.zeros((k, n), order="F")  # K^T, solved in place
+        self._xn = np.zeros((n, 1))  # state work vector
+        self._nn = np.zeros((n, n))  # covariance work matrix
+
+    def _unscented_transform_inplace(self, sigmas, noise_cov, mean, cov, dev, wdev):
+        """Unscented transform that writes mean, covariance and deviations into preallocated buffers"""
+        np.matmul(sigmas, self.wm, out=mean[:, 0])
+        np.subtract(sigmas, mean, out=dev)
+        np.multiply(dev, self.wc, out=wdev)
+        np.matmul(wdev, dev.T, out=cov)
+        cov += noise_cov
 
     def predict(self, fx, fx_args=()):
         """Predicts the next state of the filter given the current state and the state transition function
 
         Args:
-            fx (callable): State transition function, shape (n, 1) -> (n, 1)
+            fx (callable): State transition function, shape (n, 1) -> (n, 1),
+                or (n, 2n+1) -> (n, 2n+1) if the filter is vectorized
             fx_args (tuple, optional): Additional arguments to pass to fx
         """
         if not isinstance(fx_args, tuple):
             fx_args = (fx_args,)
+        if self.inplace:
+            return self._predict_inplace(fx, fx_args)
 
         # calculate sigma points for given mean and covariance
         sigmas = self.sigma_gen.points(self.x, self.P)  # shape (n, 2n+1)
-        self.sigmas_f = np.hstack([fx(s[:, np.newaxis], *fx_args) for s in sigmas.T])
+        if self.vectorized:
+            self.sigmas_f = fx(sigmas, *fx_args)
+        else:
+            self.sigmas_f = np.hstack([fx(s[:, np.newaxis], *fx_args) for s in sigmas.T])
+        self.sigmas_x, self.sigmas_fx = sigmas, self.sigmas_f
 
         # pass sigmas through the unscented transform to compute prior
         self.x, self.P = unscented_transform(self.sigmas_f, self.wm, self.wc, self.Q)
 
         # update sigma points to reflect the new variance of the points
-        self.sigmas_f = self.sigma_gen.points(self.x, self.P)
+        if self.redraw_sigmas:
+            self.sigmas_f = self.sigma_gen.points(self.x, self.P)
 
     def update(self, z, hx, R=None, hx_args=()):
         """Updates the state estimate and covariance given a measurement vector and measurement function
 
         Args:
             z (array_like): Measurement vector, shape (k, 1)
-            hx (callable): Measurement function, shape (n, 1) -> (k, 1)
+            hx (callable): Measurement function, shape (n, 1) -> (k, 1),
+                or (n, 2n+1) -> (k, 2n+1) if the filter is vectorized
             R (array_like, optional): Measurement noise covariance, shape (k, k)
             hx_args (tuple, optional): Additional arguments to pass to hx
         """
-        z = handle_vector(z)
-
         if not isinstance(hx_args, tuple):
             hx_args = (hx_args,)
         if R is None:
             R = self.R
+        if self.inplace:
+            return self._update_inplace(z, hx, R, hx_args)
+
+        z = handle_vector(z)
 
-        self.sigmas_h = np.hstack([hx(s[:, np.newaxis], *hx_args) for s in self.sigmas_f.T])
+        if self.vectorized:
+            self.sigmas_h = hx(self.sigmas_f, *hx_args)
+        else:
+            self.sigmas_h = np.hstack([hx(s[:, np.newaxis], *hx_args) for s in self.sigmas_f.T])
 
         # mean and covariance of prediction passed through unscented transform
         zp, S = unscented_transform(self.sigmas_h, self.wm, self.wc, R)
 
         # compute cross variance of the state and the measurements
-        Pxz = np.zeros((self.nx, self.nz))
         dx = self.sigmas_f - self.x
         dz = self.sigmas_h - zp
-        for i in range(self.sigmas_f.shape[1]):
-            Pxz += self.wc[i] * dx[:, i][:, np.newaxis] @ dz[:, i][np.newaxis, :]
+        Pxz = (dx * self.wc) @ dz.T  # shape (n, k)
 
         K = Pxz @ np.linalg.inv(S)  # Kalman gain
-        y = z - zp  # residual
+        self.y = z - zp  # residual
 
         # update Gaussian state estimate (x, P)
-        self.x = self.x + K @ y
+        self.x = self.x + K @ self.y
         self.P = self.P - K @ S @ K.T
 
+    def _predict_inplace(self, fx, fx_args):
+        """Predict step that writes into preallocated buffers"""
+        sigmas = self.sigma_gen.points(self.x, self.P, out=self._sigmas)
+        if self.vectorized:
+            sigmas_f = fx(sigmas, *fx_args)
+        else:
+            sigmas_f = np.hstack([fx(s[:, np.newaxis], *fx_args) for s in sigmas.T])
+        self.sigmas_x, self.sigmas_fx = sigmas, sigmas_f
+
+        self._unscented_transform_inplace(sigmas_f, self.Q, self.x, self.P, self._dx, self._wdx)
+
+        if self.redraw_sigmas:
+            self.sigma_gen.points(self.x, self.P, out=self.sigmas_f)
+        else:
+            np.copyto(self.sigmas_f, sigmas_f)
+
+    def _update_inplace(self, z, hx, R, hx_args):
+        """Update step that writes into preallocated buffers and solves for the gain instead of inverting S"""
+        if np.isscalar(z):
+            self._z.fill(z)
+        else:
+            np.copyto(self._z, handle_vector(z))
+
+        if self.vectorized:
+            self.sigmas_h = hx(self.sigmas_f, *hx_args)
+        else:
+            self.sigmas_h = np.hstack([hx(s[:, np.newaxis], *hx_args) for s in self.sigmas_f.T])
+
+        self._unscented_transform_inplace(self.sigmas_h, R, self._zp, self._S, self._dz, self._wdz)
+
+        # cross covariance from the prior sigma points, reusing the weighted state deviation buffer
+        np.subtract(self.sigmas_f, self.x, out=self._dx)
+        np.multiply(self._dx, self.wc, out=self._wdx)
+        np.matmul(self._wdx, self._dz.T, out=self._Pxz)
+
+        if self.nz == 1:  # scalar innovation variance
+            np.divide(self._Pxz, self._S[0, 0], out=self._K)
+        else:  # K = Pxz S^-1 from S^T K^T = Pxz^T
+            np.copyto(self._lu, self._S)
+            np.copyto(self._Kt, self._Pxz.T)
+            factors = lu_factor(self._lu, overwrite_a=True, check_finite=False)
+            np.copyto(self._K, lu_solve(factors, self._Kt, trans=1, overwrite_b=True, check_finite=False).T)
+        np.subtract(self._z, self._zp, out=self.y)
+
+        np.matmul(self._K, self.y, out=self._xn)
+        self.x += self._xn
+        np.matmul(self._K, self._S, out=self._KS)
+        np.matmul(self._KS, self._K.T, out=self._nn)
+        self.P -= self._nn
+
     def reset(self):
         """Resets the filter to its initial state"""
+        if self.inplace:
+            np.copyto(self.x, self.x0)
+            np.copyto(self.P, self.P0)
+            self.sigma_gen.points(self.x, self.P, out=self.sigmas_f)
+            self.sigmas_h = np.zeros((self.nz, 2 * self.nx + 1))
+            self.y.fill(0.0)
+            return
         self.x = self.x0
         self.P = self.P0
         self.sigmas_f = self.sigma_gen.points(self.x, self.P)
         self.sigmas_h = np.zeros((self.nz, 2 * self.nx + 1))
+        self.y = np.zeros((self.nz, 1))
         self.wm = self.sigma_gen.wm
         self.wc = self.sigma_gen.wc
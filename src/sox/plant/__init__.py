@@ -1,3 +1,33 @@
-from .protocol import *
-from .thevenin.default.inputs import default_inputs as default_thevenin_inputs
-from .thevenin.model import Thevenin
+from sox._lazy import lazy_attributes
+
+# the protocols and the model need pybamm, and the default inputs read the parameter tables, so all are loaded lazily
+_attributes = {
+    "NumpyThevenin": (".thevenin.numpy_model", "NumpyThevenin"),
+    "ParameterTable": (".thevenin.parameters", "ParameterTable"),
+    "SweepResults": (".sweep", "SweepResults"),
+    "sweep": (".sweep", "sweep"),
+    "Thevenin": (".thevenin.model", "Thevenin"),
+    "default_thevenin_inputs": (".thevenin.default.inputs", "default_inputs"),
+}
+_attributes.update(
+    {
+        name: (".protocol", name)
+        for name in [
+            "append_experiments",
+            "append_steps",
+            "cc_charge_cv_rest",
+            "cc_discharge_rest",
+            "charge_discharge_cycling",
+            "compile_experiment",
+            "drive_profile",
+            "dst_schedule",
+            "multi_pulse_train",
+            "single_pulse",
+            "single_pulse_train",
+            "split_experiment",
+        ]
+    }
+)
+
+__all__ = list(_attributes)
+__getattr__, __dir__ = lazy_attributes(__name__, _attributes)
@@ -1,5 +1,6 @@
-from typing import Literal
+from typing import List, Literal, Optional, Union
 
+import numpy as np
 import pybamm
 
 
@@ -20,6 +21,132 @@ def append_experiments(*experiments: Experiment) -> Experiment:
     return Experiment(append_steps(*experiments), *experiments[0].args)
 
 
+def split_experiment(experiment: pybamm.Experiment, cycles_per_chunk: int = 1) -> list:
+    """Splits an experiment into experiments of consecutive cycles
+
+    Cycles are the entries of the experiment's operating conditions, e.g. the charge or discharge phase of
+    `charge_discharge_cycling` or one step of `dst_schedule`. Equal chunks give equal experiments, so a simulation
+    built for one chunk is reused for the others.
+
+    Args:
+        experiment (pybamm.Experiment): Experiment to split.
+        cycles_per_chunk (int): Number of cycles per chunk. Defaults to 1.
+
+    Returns:
+        list: Experiments with the period and temperature of experiment.
+
+    Raises:
+        ValueError: If the experiment has a termination, which applies to the whole experiment.
+    """
+    if experiment.termination:
+        raise ValueError("Experiments with a termination cannot be split into chunks.")
+    if cycles_per_chunk < 1:
+        raise ValueError("cycles_per_chunk must be at least 1")
+    return [
+        Experiment(
+            experiment.cycles[start : start + cycles_per_chunk],
+            period=experiment.period,
+            temperature=experiment.temperature,
+        )
+        for start in range(0, len(experiment.cycles), cycles_per_chunk)
+    ]
+
+
+def _drive_cycle_kind(step):
+    """Returns the step class a fixed-duration, unterminated step can be merged into a drive cycle of, else None.
+
+    Rest steps return `pybamm.step.Rest`, which merges into a drive cycle of any kind.
+    """
+    if type(step) not in (pybamm.step.Current, pybamm.step.CRate, pybamm.step.Power, pybamm.step.Rest):
+        return None
+    if step.is_drive_cycle or step.is_python_function or step.uses_default_duration or step.termination:
+        return None
+    if step.temperature is not None or step.tags or step.start_time is not None:
+        return None
+    return type(step)
+
+
+def _drive_cycle_step(steps: list, kind, ramp_time_s: float):
+    """Returns one drive-cycle step of kind with the piecewise constant values of steps.
+
+    Each change of value is a linear ramp of ramp_time_s centred on the step boundary, so the charge (or energy) of
+    the profile equals the one of the steps.
+    """
+    durations = np.array([step.duration for step in steps], dtype=float)
+    values = np.array([float(step.value) for step in steps])
+    if ramp_time_s >= durations.min():
+        raise ValueError("ramp_time_s must be shorter than the shortest merged step")
+    boundaries = np.cumsum(durations)[:-1]
+    change = values[1:] != values[:-1]
+    times = np.concatenate(
+        [[0.0], np.column_stack([boundaries - ramp_time_s / 2, boundaries + ramp_time_s / 2])[change].ravel(), [0.0]]
+    )
+    times[-1] = durations.sum()
+    levels = np.concatenate([[values[0]], np.column_stack([values[:-1], values[1:]])[change].ravel(), [values[-1]]])
+    if kind is pybamm.step.Rest:
+        kind = pybamm.step.Current
+    return kind(np.column_stack([times, levels]), duration=times[-1], period=steps[0].period)
+
+
+def compile_experiment(experiment: pybamm.Experiment, ramp_time_s: float = 1e-3) -> Experiment:
+    """Compiles runs of fixed-duration steps of an experiment into drive-cycle steps
+
+    Consecutive current, C-rate or power steps with a duration and no termination, together with the rest steps
+    between them, become one drive-cycle step with a piecewise constant profile, e.g. all cycles of `dst_schedule`
+    or `single_pulse_train` become a single step. Steps with a termination (CC-CV, voltage cut-offs), an ambient
+    temperature, tags or a period of their own are kept.
+
+    The model is then built and stepped once per drive cycle instead of once per step. Solvers that stop at the
+    knots of drive cycles, e.g. `pybamm.IDAKLUSolver`, restart at each change of value and gain the most; with
+    `pybamm.CasadiSolver` the integrator has to resolve the changes inside its steps, which costs about as much as
+    the per-step overhead it saves.
+
+    The compiled experiment has the period, temperature and termination of experiment, but one cycle per step. With
+    `pybamm.CasadiSolver` its outputs have one sample per period: the duplicated samples at the boundaries of the
+    merged steps are gone, and the sample at a change of value lies in the middle of the ramp. Solvers that stop at
+    the knots also return a sample at each end of a ramp, ramp_time_s / 2 off the period grid (pybamm keeps these
+    stops whatever the `t_interp` of the solve), so e.g. the 5 cycles of `dst_schedule` give 1991 samples instead
+    of 1801. Pass the sampling times of such outputs to `sox.filter.run` and the smoothers as an array, e.g.
+    `np.diff(outputs.time, prepend=0.0)`, or interpolate the outputs onto the period grid first.
+
+    Args:
+        experiment (pybamm.Experiment): Experiment to compile.
+        ramp_time_s (float): Duration of the ramp at a change of value (s). Defaults to 1 ms.
+
+    Returns:
+        Experiment: Experiment with drive-cycle steps.
+
+    Raises:
+        ValueError: If ramp_time_s is not shorter than a merged step.
+    """
+    steps: List[pybamm.step.BaseStep] = []
+    run: List[pybamm.step.BaseStep] = []
+    run_kind = None
+
+    def flush():
+        if len(run) > 1:
+            steps.append(_drive_cycle_step(run, run_kind or pybamm.step.Rest, ramp_time_s))
+        else:
+            steps.extend(run)
+        run.clear()
+
+    for step in experiment.steps:
+        kind = _drive_cycle_kind(step) if step.period == experiment.period else None
+        if kind is None:
+            flush()
+            run_kind = None
+            steps.append(step)
+            continue
+        if kind is not pybamm.step.Rest and run_kind not in (None, kind):
+            flush()
+            run_kind = None
+        if kind is not pybamm.step.Rest:
+            run_kind = kind
+        run.append(step)
+    flush()
+    return Experiment(steps, *experiment.args[1:])
+
+
 def cc_charge_cv_rest(
     c_rate: float = 1,
     max_voltage: float = 4.1,
@@ -149,6 +276,8 @@ def single_pulse_train(
 ) -> Experiment:
     """Single pulse train protocol
 
+    `compile_experiment` merges the train into one drive-cycle step, see `dst_schedule` for when that pays off.
+
     Args:
         direction (str): Direction of pulse, either 'charge' or 'discharge'. Defaults to 'discharge'.
         c_rate (float): C-rate of pulse (C).
@@ -201,6 +330,11 @@ def dst_schedule(
 ):
     """Dynamically stress test schedule from USABC manual
 
+    `compile_experiment` merges the schedule into one drive-cycle step. Compile it only for a solver that stops at
+    the knots of drive cycles, e.g. with `Thevenin.solver` set to `pybamm.IDAKLUSolver()`: the default
+    `pybamm.CasadiSolver` runs the compiled schedule about as fast as the steps, or slower. The outputs of such a
+    solver then also have samples at the knots, see `compile_experiment`.
+
     Args:
         peak_power (float): Peak power (W).
         number_of_cycles (int): Number of cycles.
@@ -245,3 +379,59 @@ def dst_schedule(
         steps * number_of_cycles,
         period=f"{sampling_time_s} seconds",
     )
+
+
+def drive_profile(
+    time: Union[np.ndarray, str],
+    values: Optional[np.ndarray] = None,
+    kind: Literal["current", "c_rate", "power"] = "current",
+    number_of_repetitions: int = 1,
+    sampling_time_s: float = 1,
+) -> Experiment:
+    """Measured drive profile protocol
+
+    The profile is resampled to the sampling time by linear interpolation, starting at its first timestamp, and
+    applied as a drive-cycle step. Each repetition is one cycle of that same step, starting where the previous one
+    ends, so the outputs repeat the sample at each boundary. The cycles share the resampled profile and one built
+    simulation, unlike a single step lasting all repetitions, for which pybamm would tile the profile into an
+    interpolant of number_of_repetitions copies. Values follow the pybamm sign convention: positive is discharge.
+
+    Args:
+        time (array_like or str): Timestamps (s), increasing but not necessarily evenly spaced, or the path of a .npy
+            file with one (time, value) row per sample, which is memory-mapped.
+        values (array_like): Current (A), C-rate (C) or power (W) at the timestamps. Required unless time is a path.
+        kind (str): Quantity of values, either 'current', 'c_rate' or 'power'. Defaults to 'current'.
+        number_of_repetitions (int): Number of repetitions of the profile.
+        sampling_time_s (float): Sampling time (s).
+
+    Returns:
+        Experiment: PyBaMM experiment object.
+
+    Raises:
+        ValueError: If the profile has fewer than two samples or is shorter than the sampling time, its timestamps are
+            not increasing, or kind is not supported.
+    """
+    step_types = {"current": pybamm.step.Current, "c_rate": pybamm.step.CRate, "power": pybamm.step.Power}
+    if kind not in step_types:
+        raise ValueError(f"kind must be one of {list(step_types)}")
+    if isinstance(time, str):
+        profile = np.load(time, mmap_mode="r")
+        time, values = profile[:, 0], profile[:, 1]
+    time, values = np.asarray(time), np.asarray(values)
+    if time.ndim != 1 or time.shape != values.shape or time.size < 2:
+        raise ValueError("time and values must be 1D arrays of the same length, with at least two samples")
+    if np.any(np.diff(time) <= 0):
+        raise ValueError("time must be increasing")
+    if number_of_repetitions < 1:
+        raise ValueError("number_of_repetitions must be at least 1")
+
+    resampled_time = np.arange(0.0, time[-1] - time[0] + sampling_time_s / 2, sampling_time_s)
+    resampled_time = resampled_time[resampled_time <= time[-1] - time[0]]
+    if resampled_time.size < 2:
+        raise ValueError("the profile must be longer than the sampling time")
+    resampled = np.column_stack([resampled_time, np.interp(resampled_time + time[0], time, values)])
+    step = step_types[kind](resampled, duration=resampled_time[-1])
+    return Experiment(
+        [step] * number_of_repetitions,
+        period=f"{sampling_time_s} seconds",
+    )
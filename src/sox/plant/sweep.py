@@ -0,0 +1,226 @@
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from sox.plant.thevenin.cache import is_cut_off, save_outputs
+from sox.plant.thevenin.parameters import LIST_VARIABLES, OUTPUT_VARIABLES, Inputs, Outputs, check_variables
+
+
+@dataclass
+class SweepResults:
+    """Results of a plant simulation sweep, stored on disk as ragged arrays.
+
+    Each output variable is one .npy file in directory holding the samples of all cases back to back, shape (T,) or
+    (n_rc, T) for per-RC-pair variables, where T is the total number of samples. Case (i, j), the i-th inputs with the
+    j-th experiment, occupies samples offsets[k]:offsets[k + 1] with k = i * n_experiments + j.
+
+    Args:
+        directory (str): Directory of the variable files.
+        shape (tuple): Number of inputs and number of experiments.
+        offsets (array_like): Sample offsets of the cases, shape (n_cases + 1,). Failed cases have no samples.
+        errors (dict): Error message of each failed case by (i, j).
+        variables (tuple, optional): Stored output variables. Defaults to all variables.
+        terminations (dict, optional): Why the solve of each stored case ended by (i, j), e.g. "final time" or
+            "event: Minimum SoC", see `Thevenin.termination`. Defaults to an empty dict.
+    """
+
+    directory: str
+    shape: Tuple[int, int]
+    offsets: np.ndarray
+    errors: Dict[Tuple[int, int], str]
+    variables: Tuple[str, ...] = OUTPUT_VARIABLES
+    terminations: Dict[Tuple[int, int], str] = field(default_factory=dict)
+
+    @property
+    def cut_off(self) -> List[Tuple[int, int]]:
+        """Stored cases that a voltage or SoC cut-off ended before the end of their experiment"""
+        return [case for case, termination in sorted(self.terminations.items()) if is_cut_off(termination)]
+
+    def variable(self, name: str) -> np.ndarray:
+        """Returns the samples of all cases of an output variable as a read-only memory map."""
+        return np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+    def case(self, i: int, j: int) -> Optional[Outputs]:
+        """Returns the outputs of case (i, j) as views into the memory-mapped variables, or None if it failed.
+
+        Variables that were not stored are None.
+        """
+        if (i, j) in self.errors:
+            return None
+        k = i * self.shape[1] + j
+        start, stop = self.offsets[k], self.offsets[k + 1]
+        values = dict.fromkeys(OUTPUT_VARIABLES)
+        for name in self.variables:
+            data = self.variable(name)[..., start:stop]
+            values[name] = list(data) if name in LIST_VARIABLES else data
+        return Outputs(**values)
+
+
+def _solve_chunk(
+    inputs: Inputs, experiments: list, cases: List[int], directory: str, cache, plant, variables, dtype
+) -> list:
+    """Solves one inputs variant against several experiments and stores each case in its own directory.
+
+    Returns:
+        list: (case, error message or None, termination or None) tuples.
+    """
+    if plant is None:
+        from sox.plant.thevenin.model import Thevenin as plant
+
+    battery = plant(inputs)  # shared by the chunk, so equal protocols reuse the built simulation
+    results: List[Tuple[int, Optional[str], Optional[str]]] = []
+    for case, experiment in zip(cases, experiments):
+        try:
+            outputs = battery.solve(experiment, cache=cache, variables=variables, dtype=dtype)
+            termination = getattr(battery, "termination", None)
+            save_outputs(os.path.join(directory, f"case_{case}"), outputs, termination)
+            results.append((case, None, termination))
+        except Exception as e:  # a failed case is reported, the sweep goes on
+            results.append((case, f"{type(e).__name__}: {e}", None))
+    return results
+
+
+def sweep(
+    inputs: List[Inputs],
+    experiments: list,
+    directory: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    cache: Union[bool, str] = False,
+    plant: Optional[type] = None,
+    variables: Optional[Sequence[str]] = None,
+    dtype=None,
+) -> SweepResults:
+    """Simulates every inputs variant against every experiment across a process pool.
+
+    Work is split into chunks of experiments for one inputs variant, so each worker builds the Thevenin model once
+    per chunk. Workers write their outputs to disk, and the cases are then joined into ragged arrays, so no
+    `Outputs` objects are sent back between processes.
+
+    A case that fails is reported in `SweepResults.errors`. A case that a voltage or SoC cut-off ends before the end
+    of its experiment is stored with its truncated trajectory and listed in `SweepResults.cut_off`.
+
+    Args:
+        inputs (list): Thevenin model inputs variants, must share the number of RC pairs.
+        experiments (list): Experiments, e.g. from `sox.plant.protocol`.
+        directory (str, optional): Directory of the results. Defaults to None (a new temporary directory).
+        max_workers (int, optional): Number of processes. 1 solves in the calling process. Defaults to None
+            (number of CPUs).
+        chunk_size (int, optional): Number of experiments per task. Defaults to None (about four tasks per process).
+        cache (bool or str, optional): Solve cache passed to `Thevenin.solve`. Defaults to False.
+        plant (type, optional): Plant model class, `Thevenin` or `NumpyThevenin`. Defaults to None (`Thevenin`).
+        variables (sequence of str, optional): Output variables to store. Time is always stored. Defaults to None
+            (all variables).
+        dtype (numpy dtype, optional): Dtype of the stored variables, e.g. numpy.float32 to halve the size on disk.
+            Time is always stored as float64. Defaults to None (float64).
+
+    Returns:
+        SweepResults: Results with shape (len(inputs), len(experiments)).
+
+    Raises:
+        ValueError: If the inputs differ in the number of RC pairs, or a variable is not a field of `Outputs`.
+    """
+    if len({variant.rc_pairs for variant in inputs}) > 1:
+        raise ValueError("All inputs must have the same number of RC pairs.")
+    if variables is None:
+        variables = OUTPUT_VARIABLES
+    else:
+        check_variables(variables)
+        variables = tuple(name for name in OUTPUT_VARIABLES if name == "time" or name in variables)
+    directory = directory or tempfile.mkdtemp(prefix="sox-sweep-")
+    os.makedirs(directory, exist_ok=True)
+    n_inputs, n_experiments = len(inputs), len(experiments)
+    workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(n_inputs * n_experiments / (4 * workers)))
+
+    tasks = []
+    for i, variant in enumerate(inputs):
+        for start in range(0, n_experiments, chunk_size):
+            stop = min(start + chunk_size, n_experiments)
+            cases = [i * n_experiments + j for j in range(start, stop)]
+            tasks.append((variant, experiments[start:stop], cases, directory, cache, plant, variables, dtype))
+
+    if workers == 1:
+        results = [_solve_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_solve_chunk, *task) for task in tasks]
+            results = []
+            for task, future in zip(tasks, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:  # e.g. a worker died or the task could not be pickled
+                    results.append([(case, f"{type(e).__name__}: {e}", None) for case in task[2]])
+
+    errors = {case: error for chunk in results for case, error, _ in chunk if error is not None}
+    terminations = {case: termination for chunk in results for case, _, termination in chunk if termination}
+    n_rc = inputs[0].rc_pairs if inputs else 0
+    offsets = _join_cases(directory, n_inputs * n_experiments, n_rc, errors, variables, dtype or float)
+    errors = {divmod(case, n_experiments): error for case, error in sorted(errors.items())}
+    terminations = {
+        divmod(case, n_experiments): termination
+        for case, termination in sorted(terminations.items())
+        if divmod(case, n_experiments) not in errors
+    }
+    return SweepResults(directory, (n_inputs, n_experiments), offsets, errors, variables, terminations)
+
+
+def _stored_size(filename: str) -> int:
+    """Returns the number of samples of a stored 1D .npy array, read from its header without mapping the data."""
+    with open(filename, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape[-1]
+
+
+def _join_cases(directory: str, n_cases: int, n_rc: int, errors: dict, variables: tuple, dtype) -> np.ndarray:
+    """Concatenates the per-case outputs into one memory-mappable file per variable and removes the case files.
+
+    The case lengths are read from the headers of the time files first, then the cases are copied one variable file
+    at a time, so the number of open files does not grow with the number of cases. Cases whose outputs are missing
+    are added to errors.
+
+    Returns:
+        array_like: Sample offsets of the cases, shape (n_cases + 1,).
+    """
+    lengths = np.zeros(n_cases, dtype=np.int64)
+    for case in range(n_cases):
+        filename = os.path.join(directory, f"case_{case}", "time.npy")
+        if case in errors:
+            continue
+        if os.path.exists(filename):
+            lengths[case] = _stored_size(filename)
+        else:
+            errors[case] = "OSError: outputs could not be stored"
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    for name in variables:
+        total = int(offsets[-1])
+        shape = (n_rc, total) if name in LIST_VARIABLES else (total,)
+        name_dtype = np.float64 if name == "time" else dtype
+        if total == 0:  # nothing to map
+            np.save(os.path.join(directory, f"{name}.npy"), np.zeros(shape, name_dtype))
+            continue
+        joined = np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), "w+", name_dtype, shape)
+        for case in range(n_cases):
+            if case in errors:
+                continue
+            data = np.load(os.path.join(directory, f"case_{case}", f"{name}.npy"), mmap_mode="r")
+            joined[..., offsets[case] : offsets[case + 1]] = data
+            del data  # closes the case file before the next one is opened
+        joined.flush()
+        del joined
+
+    for case in range(n_cases):
+        shutil.rmtree(os.path.join(directory, f"case_{case}"), ignore_errors=True)
+    return offsets
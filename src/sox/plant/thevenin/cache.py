@@ -0,0 +1,167 @@
+import dataclasses
+import hashlib
+import inspect
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pybamm as pb
+
+from sox.plant.thevenin.parameters import LIST_VARIABLES, OUTPUT_VARIABLES, Inputs, Outputs
+
+CACHE_VERSION = 2  # bump when the stored layout or the hashed content changes
+
+
+def _update_symbol(h, symbol: pb.Symbol):
+    """Hashes a pybamm expression tree, including the data of interpolants and arrays."""
+    h.update(f"{type(symbol).__name__}:{symbol.name}".encode())
+    if isinstance(symbol, pb.Interpolant):
+        for x in symbol.x:
+            h.update(np.ascontiguousarray(x, dtype=float).tobytes())
+        h.update(np.ascontiguousarray(symbol.y, dtype=float).tobytes())
+        h.update(f"{symbol.interpolator}:{symbol.extrapolate}".encode())
+    elif isinstance(symbol, pb.Array):  # includes Scalar and Vector
+        h.update(np.ascontiguousarray(symbol.entries, dtype=float).tobytes())
+    for child in symbol.children:
+        _update_symbol(h, child)
+
+
+def _update_value(h, value):
+    """Hashes an input value: numbers and strings by repr, arrays by content, functions through their expression."""
+    if isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_value(h, item)
+    elif isinstance(value, np.ndarray):
+        h.update(f"{value.dtype}{value.shape}".encode() + np.ascontiguousarray(value).tobytes())
+    elif callable(value):
+        n_args = len(inspect.signature(value).parameters)
+        expression = value(*[pb.Variable(f"x{i}") for i in range(n_args)])
+        if isinstance(expression, pb.Symbol):
+            _update_symbol(h, expression)
+        else:  # plain Python function, falls back to its code
+            h.update(f"{value.__module__}.{value.__qualname__}".encode() + value.__code__.co_code)
+            h.update(repr(value.__code__.co_consts).encode())
+    else:
+        h.update(repr(value).encode())
+
+
+def value_key(value) -> str:
+    """Returns a content hash of an input value, e.g. a parameter function through its expression and its data."""
+    h = hashlib.sha1()
+    _update_value(h, value)
+    return h.hexdigest()
+
+
+def _update_experiment(h, experiment: pb.Experiment):
+    """Hashes the steps and settings of an experiment."""
+    for step in experiment.steps:
+        h.update(type(step).__name__.encode())
+        if isinstance(step.value, pb.Symbol):  # drive cycles, by the content of their interpolant
+            _update_symbol(h, step.value)
+        else:
+            _update_value(h, step.value if isinstance(step.value, np.ndarray) else repr(step.value))
+        _update_value(h, [step.duration, step.period, step.temperature, repr(step.termination)])
+    _update_value(h, [experiment.period, experiment.temperature, repr(experiment.termination)])
+
+
+def _update_inputs(h, inputs: Inputs, skip: Sequence[str] = ()):
+    """Hashes the input fields not in skip by name and value."""
+    for field in dataclasses.fields(inputs):
+        if field.name not in skip:
+            h.update(field.name.encode())
+            _update_value(h, getattr(inputs, field.name))
+
+
+def inputs_key(inputs: Inputs, skip: Sequence[str] = ()) -> str:
+    """Returns a content hash of the input fields not in skip, e.g. to detect inputs mutated after a model was built."""
+    h = hashlib.sha1()
+    _update_inputs(h, inputs, skip)
+    return h.hexdigest()
+
+
+def experiment_key(experiment: pb.Experiment) -> str:
+    """Returns a content hash of the experiment steps and settings, equal for equal protocols built separately."""
+    h = hashlib.sha1()
+    _update_experiment(h, experiment)
+    return h.hexdigest()
+
+
+def solve_key(inputs: Inputs, experiment: pb.Experiment, solver) -> str:
+    """Returns the content hash that identifies a Thevenin solution.
+
+    The hash covers every input field, including the tabulated data behind the parameter functions, each experiment
+    step (type, value, duration, period, temperature and termination), the experiment period and termination, the
+    solver type and tolerances, and the pybamm version.
+
+    Args:
+        inputs (Inputs): Thevenin model inputs.
+        experiment (pybamm.Experiment): Experiment to solve.
+        solver (pybamm.BaseSolver): Solver used for the experiment.
+
+    Returns:
+        str: Hexadecimal SHA-1 digest.
+    """
+    h = hashlib.sha1(f"sox-thevenin-v{CACHE_VERSION}:pybamm-{pb.__version__}".encode())
+    _update_inputs(h, inputs)
+    _update_experiment(h, experiment)
+    h.update(type(solver).__name__.encode())
+    _update_value(h, [getattr(solver, name, None) for name in ("rtol", "atol", "mode", "dt_max")])
+    return h.hexdigest()
+
+
+def is_cut_off(termination: Optional[str]) -> bool:
+    """Returns whether a solve ended at a voltage or SoC cut-off of the model, before the end of its experiment.
+
+    termination is the reason the solve ended as given by pybamm, e.g. "final time", "event: Minimum SoC" for a
+    cut-off or "event: Voltage > 4.1 [V] [experiment]" for a step termination.
+    """
+    return termination is not None and termination.startswith("event:") and not termination.endswith("[experiment]")
+
+
+def save_outputs(path: str, outputs: Outputs, termination: Optional[str] = None):
+    """Stores outputs as one .npy file per variable in the directory path, written atomically.
+
+    List variables (one array per RC pair) are stored as one 2D array, and variables that are None are not stored.
+    The termination of the solve, see `is_cut_off`, is stored as text if given.
+    """
+    parent = os.path.dirname(path)
+    tmp_path = None
+    try:
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        for name in OUTPUT_VARIABLES:
+            value = getattr(outputs, name)
+            if value is not None:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(value))
+        if termination is not None:
+            with open(os.path.join(tmp_path, "termination.txt"), "w") as f:
+                f.write(termination)
+        os.replace(tmp_path, path)
+    except OSError:  # another process stored the same solution first, or the cache is not writable
+        if tmp_path is not None:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_outputs(path: str) -> Outputs:
+    """Loads outputs stored by `save_outputs` as read-only memory maps. Variables that were not stored are None."""
+    values: Dict[str, Any] = {}
+    for name in OUTPUT_VARIABLES:
+        filename = os.path.join(path, f"{name}.npy")
+        if not os.path.exists(filename):
+            values[name] = None
+            continue
+        array = np.load(filename, mmap_mode="r")
+        values[name] = list(array) if name in LIST_VARIABLES else array
+    return Outputs(**values)
+
+
+def load_termination(path: str) -> Optional[str]:
+    """Loads the termination stored by `save_outputs`, or None if it was not stored."""
+    filename = os.path.join(path, "termination.txt")
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return f.read()
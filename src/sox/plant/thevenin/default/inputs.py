@@ -1,54 +1,55 @@
 import os
 
-import pybamm as pb
-from scipy.interpolate import interp1d
-
-from sox.plant.thevenin.parameters import Inputs
+from sox.plant.thevenin.parameters import Inputs, ParameterTable
 
 path = os.path.dirname(__file__)
+# parsed tables are cached on disk only if $SOX_CACHE_DIR is set, so importing the defaults writes nothing by default
+cache_dir = os.environ.get("SOX_CACHE_DIR") or None
 
-ocv_data = pb.parameters.process_1D_data("thevenin_ocv.csv", path=path)
-r0_data = pb.parameters.process_3D_data_csv("thevenin_r0.csv", path=path)
-r1_data = pb.parameters.process_3D_data_csv("thevenin_r1.csv", path=path)
-c1_data = pb.parameters.process_3D_data_csv("thevenin_c1.csv", path=path)
-dOCVdT_data = pb.parameters.process_2D_data_csv("thevenin_docvdt.csv", path=path)
+ocv_table = ParameterTable.from_csv("thevenin_ocv.csv", path=path, cache_dir=cache_dir)
+r0_table = ParameterTable.from_csv("thevenin_r0.csv", path=path, cache_dir=cache_dir)
+r1_table = ParameterTable.from_csv("thevenin_r1.csv", path=path, cache_dir=cache_dir)
+c1_table = ParameterTable.from_csv("thevenin_c1.csv", path=path, cache_dir=cache_dir)
+dOCVdT_table = ParameterTable.from_csv("thevenin_docvdt.csv", path=path, cache_dir=cache_dir)
 
 # scales resistance and capacitance data
 scale_factor = 10.0
-r0_data = r0_data[0], (r0_data[1][0], r0_data[1][1] * scale_factor)
-r1_data = r1_data[0], (r1_data[1][0], r1_data[1][1] * scale_factor)
-c1_data = c1_data[0], (c1_data[1][0], c1_data[1][1] / scale_factor * 2)
+r0_table = r0_table.scaled(scale_factor)
+r1_table = r1_table.scaled(scale_factor)
+c1_table = c1_table.scaled(1 / scale_factor * 2)
+
+# (name, (axes, values)) tuples, as returned by pybamm.parameters.process_*_data_csv
+ocv_data = ocv_table.as_data()
+r0_data = r0_table.as_data()
+r1_data = r1_table.as_data()
+c1_data = c1_table.as_data()
+dOCVdT_data = dOCVdT_table.as_data()
 
 
 def open_circuit_voltage(soc):
     """Open circuit voltage as a function of state of charge."""
-    name, (x, y) = ocv_data
-    return pb.Interpolant(x, y, soc, name, extrapolate=True)
+    return ocv_table.interpolant(soc)
 
 
 def r0(temperature, current, soc):
     """Series resistance as a function of temperature, current and state of charge."""
-    name, (x, y) = r0_data
-    return pb.Interpolant(x, y, [temperature, current, soc], name, extrapolate=True)
+    return r0_table.interpolant([temperature, current, soc])
 
 
 def r1(temperature, current, soc):
     """Resistance of the first RC pair as a function of temperature, current and state of charge."""
-    name, (x, y) = r1_data
-    return pb.Interpolant(x, y, [temperature, current, soc], name, extrapolate=True)
+    return r1_table.interpolant([temperature, current, soc])
 
 
 def c1(temperature, current, soc):
     """Capacitance of the first RC pair as a function of temperature, current and state of charge."""
-    name, (x, y) = c1_data
-    return pb.Interpolant(x, y, [temperature, current, soc], name, extrapolate=True)
+    return c1_table.interpolant([temperature, current, soc])
 
 
 def entropic_change(ocv, temperature):
     """Entropic change in open circuit voltage as a function of open circuit voltage and
     temperature."""
-    name, (x, y) = dOCVdT_data
-    return pb.Interpolant(x, y, [ocv, temperature], name, extrapolate=True)
+    return dOCVdT_table.interpolant([ocv, temperature])
 
 
 default_inputs = Inputs(
@@ -1,26 +1,89 @@
+import os
+from collections import OrderedDict
+from typing import Iterator, Optional, Sequence, Union
+
 import pybamm as pb
 
-from sox.plant.thevenin.parameters import Inputs, Outputs
+from sox.plant.protocol import split_experiment
+from sox.plant.thevenin.cache import (
+    experiment_key,
+    inputs_key,
+    is_cut_off,
+    load_outputs,
+    load_termination,
+    save_outputs,
+    solve_key,
+)
+from sox.plant.thevenin.parameters import (
+    LIST_VARIABLES,
+    OUTPUT_VARIABLES,
+    Inputs,
+    LazyOutputs,
+    Outputs,
+    check_variables,
+    finish_outputs,
+)
+from sox.utils import default_cache_dir
+
+# input fields passed to pybamm at solve time, see `Thevenin.input_parameters`
+INITIAL_STATE_FIELDS = ("initial_soc", "initial_rc_voltage")
+
+# pybamm variable of each output, with {i} the RC pair for list variables
+SOLUTION_VARIABLES = {
+    "voltage": "Voltage [V]",
+    "rc_voltage": "Element-{i} overpotential [V]",
+    "ocv": "Open-circuit voltage [V]",
+    "current": "Current [A]",
+    "power": "Power [W]",
+    "resistance": "Resistance [Ohm]",
+    "series_resistance": "R0 [Ohm]",
+    "rc_resistance": "R{i} [Ohm]",
+    "rc_capacitance": "C{i} [F]",
+    "soc": "SoC",
+    "ambient_temperature": "Ambient temperature [degC]",
+    "cell_temperature": "Cell temperature [degC]",
+    "jig_temperature": "Jig temperature [degC]",
+}
 
 
 class Thevenin:
     """Thevenin equivalent circuit model.
 
+    The model is parameterized once, and the simulation built for an experiment (processed and discretized step
+    models and their compiled solvers) is kept and reused when the same protocol is solved again. The initial
+    state (initial SoC and RC overpotentials) is passed as pybamm input parameters at solve time, so changing
+    `inputs.initial_soc` or `inputs.initial_rc_voltage` between solves does not rebuild anything. Changing any other
+    input, or the solver, rebuilds the model and drops the built simulations on the next solve.
+
     Args:
         inputs (Inputs): Thevenin model inputs.
+        max_simulations (int, optional): Number of built simulations kept, least recently used are dropped.
+            Defaults to 32.
 
     Attributes:
         inputs (Inputs): Thevenin model inputs.
         model (pybamm.equivalent_circuit.Thevenin): Thevenin model.
         variable_names (list): List of variable names.
+        solver (pybamm.CasadiSolver): Solver shared by all simulations.
+        max_simulations (int): Number of built simulations kept.
+        termination (str): Why the last solve ended as given by pybamm, e.g. "final time" or "event: Minimum SoC" for
+            a cut-off, see `is_cut_off`. None before the first solve or for cache entries without it.
         _inputs (dict): Dictionary of model parameters.
+        _simulations (OrderedDict): Built simulations by experiment content hash.
+        _built_with (tuple): Hash of the inputs other than the initial state, and the solver, that the model and
+            the simulations were built with.
     """
 
-    def __init__(self, inputs: Inputs):
+    def __init__(self, inputs: Inputs, max_simulations: int = 32):
         self.inputs = inputs
         self.model = self.build_default_model()
         self.variable_names = self.model.variable_names()
         self._inputs = self.process_inputs()
+        self.solver = pb.CasadiSolver()
+        self.max_simulations = max_simulations
+        self._simulations: "OrderedDict[str, pb.Simulation]" = OrderedDict()
+        self._built_with = (inputs_key(inputs, skip=INITIAL_STATE_FIELDS), self.solver)
+        self.termination: Optional[str] = None
 
     def build_default_model(self):
         """Builds the default Thevenin model with the given inputs.
@@ -65,35 +128,158 @@ class Thevenin:
                     f"C{i} [F]": self.inputs.rc_capacitance[i - 1],
                 }
             )
+        params.update({name: "[input]" for name in self.input_parameters()})  # set per solve
         return params
 
-    def solve(self, experiment: pb.Experiment):
-        """Solves the model for the given experiment.
+    def input_parameters(self):
+        """Returns the numeric inputs that are passed to pybamm at solve time instead of being built into the model."""
+        parameters = {"Initial SoC": self.inputs.initial_soc}
+        for i in range(1, self.inputs.rc_pairs + 1):
+            parameters[f"Element-{i} initial overpotential [V]"] = self.inputs.initial_rc_voltage[i - 1]
+        return parameters
+
+    def check_inputs(self):
+        """Rebuilds the model and drops the built simulations if the inputs other than the initial state or the
+        solver changed since they were built."""
+        key = inputs_key(self.inputs, skip=INITIAL_STATE_FIELDS)
+        if key != self._built_with[0]:
+            self.model = self.build_default_model()
+            self.variable_names = self.model.variable_names()
+            self._inputs = self.process_inputs()
+        if key != self._built_with[0] or self.solver is not self._built_with[1]:
+            self._simulations.clear()
+            self._built_with = (key, self.solver)
+
+    def build_simulation(self, experiment: pb.Experiment):
+        """Returns the simulation for the experiment, reusing a built one for an equal protocol.
 
         Args:
             experiment (pybamm.Experiment): Experiment to solve.
 
         Returns:
-            Outputs: Thevenin model outputs.
+            pybamm.Simulation: Simulation whose step models are built on the first solve and kept afterwards.
         """
+        key = experiment_key(experiment)
+        if key in self._simulations:
+            self._simulations.move_to_end(key)
+            return self._simulations[key]
+
         simulation = pb.Simulation(
-            model=self.model, experiment=experiment, parameter_values=self._inputs, solver=pb.CasadiSolver()
-        )
-        simulation.solve()
-        solution = simulation.solution
-        return Outputs(
-            time=solution.t,
-            voltage=solution["Voltage [V]"].data,
-            rc_voltage=[solution[f"Element-{i} overpotential [V]"].data for i in range(1, self.inputs.rc_pairs + 1)],
-            ocv=solution["Open-circuit voltage [V]"].data,
-            current=solution["Current [A]"].data,
-            power=solution["Power [W]"].data,
-            resistance=solution["Resistance [Ohm]"].data,
-            series_resistance=solution["R0 [Ohm]"].data,
-            rc_resistance=[solution[f"R{i} [Ohm]"].data for i in range(1, self.inputs.rc_pairs + 1)],
-            rc_capacitance=[solution[f"C{i} [F]"].data for i in range(1, self.inputs.rc_pairs + 1)],
-            soc=solution["SoC"].data,
-            ambient_temperature=solution["Ambient temperature [degC]"].data,
-            cell_temperature=solution["Cell temperature [degC]"].data,
-            jig_temperature=solution["Jig temperature [degC]"].data,
+            model=self.model, experiment=experiment, parameter_values=self._inputs, solver=self.solver
         )
+        self._simulations[key] = simulation
+        if len(self._simulations) > self.max_simulations:
+            self._simulations.popitem(last=False)
+        return simulation
+
+    def solve(
+        self,
+        experiment: pb.Experiment,
+        cache: Union[bool, str] = False,
+        variables: Optional[Sequence[str]] = None,
+        lazy: bool = False,
+        dtype=None,
+    ) -> Outputs:
+        """Solves the model for the given experiment.
+
+        Args:
+            experiment (pybamm.Experiment): Experiment to solve.
+            cache (bool or str, optional): If True or a directory, solutions are stored on disk under a hash of the
+                inputs, the experiment and the solver settings, and a repeated solve returns the stored arrays as
+                read-only memory maps. True uses `default_cache_dir()`. Defaults to False.
+            variables (sequence of str, optional): Names of the `Outputs` fields to extract from the solution; the
+                others are None. Defaults to None, which extracts all variables.
+            lazy (bool, optional): If True, variables are extracted from the solution on first access, see
+                `LazyOutputs`. Ignored when the solution comes from the cache. Defaults to False.
+            dtype (numpy dtype, optional): If given, the outputs are stored in one contiguous buffer of dtype, see
+                `Outputs.compact`. Defaults to None, which keeps the float64 arrays of the solution.
+
+        Returns:
+            Outputs: Thevenin model outputs.
+
+        Raises:
+            ValueError: If lazy is combined with dtype, or a variable is not a field of `Outputs`.
+        """
+        if lazy and dtype is not None:
+            raise ValueError("lazy outputs cannot be compacted")
+        if variables is not None:
+            check_variables(variables)
+
+        path = None
+        if cache:
+            cache_dir = default_cache_dir() if cache is True else cache
+            path = os.path.join(cache_dir, "thevenin", solve_key(self.inputs, experiment, self.solver))
+            if os.path.isdir(path):
+                self.termination = load_termination(path)
+                return finish_outputs(load_outputs(path), variables, dtype)
+
+        self.check_inputs()
+        solution = self.build_simulation(experiment).solve(inputs=self.input_parameters())
+        self.termination = solution.termination
+        if path is not None:  # the cache always stores all variables
+            outputs = self.build_outputs(solution)
+            save_outputs(path, outputs, self.termination)
+            return finish_outputs(outputs, variables, dtype)
+        return finish_outputs(self.build_outputs(solution, variables=variables, lazy=lazy), None, dtype)
+
+    def solve_chunks(
+        self,
+        experiment: pb.Experiment,
+        cycles_per_chunk: int = 1,
+        variables: Optional[Sequence[str]] = None,
+        dtype=None,
+    ) -> Iterator[Outputs]:
+        """Solves the model for the given experiment chunk by chunk and yields the outputs of each chunk.
+
+        The experiment is split with `split_experiment`, and each chunk starts from the last state of the previous
+        one, so the chunks together equal the outputs of `solve` while only one chunk is held in memory. Time
+        continues across chunks. A cut-off that ends the experiment ends the iteration.
+
+        Args:
+            experiment (pybamm.Experiment): Experiment to solve.
+            cycles_per_chunk (int, optional): Number of experiment cycles per chunk. Defaults to 1.
+            variables (sequence of str, optional): Variables to extract, see `solve`. Defaults to None (all).
+            dtype (numpy dtype, optional): Storage dtype, see `solve`. Defaults to None.
+
+        Yields:
+            Outputs: Thevenin model outputs of one chunk.
+        """
+        self.check_inputs()
+        last_state = None
+        for chunk in split_experiment(experiment, cycles_per_chunk):
+            solution = self.build_simulation(chunk).solve(inputs=self.input_parameters(), starting_solution=last_state)
+            # a continued solution starts with the last state of the previous chunk, which was already yielded
+            outputs = self.build_outputs(solution, start=0 if last_state is None else 1, variables=variables)
+            self.termination = solution.termination
+            yield finish_outputs(outputs, None, dtype)
+            if is_cut_off(self.termination):
+                return  # the model hit a voltage or SoC cut-off
+            last_state = solution.last_state
+
+    def build_outputs(
+        self,
+        solution: pb.Solution,
+        start: int = 0,
+        variables: Optional[Sequence[str]] = None,
+        lazy: bool = False,
+    ) -> Outputs:
+        """Returns the outputs of a solution from the sample index start on.
+
+        Only the given variables are extracted (all by default), and with lazy=True each of them is extracted on
+        first access.
+        """
+        n_rc = self.inputs.rc_pairs
+
+        def loader(name):
+            if name == "time":
+                return lambda: solution.t[start:]
+            if name in LIST_VARIABLES:
+                pattern = SOLUTION_VARIABLES[name]
+                return lambda: [solution[pattern.format(i=i)].data[start:] for i in range(1, n_rc + 1)]
+            return lambda: solution[SOLUTION_VARIABLES[name]].data[start:]
+
+        names = OUTPUT_VARIABLES if variables is None else variables
+        loaders = {name: loader(name) for name in names}
+        if lazy:
+            return LazyOutputs(loaders)
+        return Outputs(**{name: loaders[name]() if name in loaders else None for name in OUTPUT_VARIABLES})
@@ -0,0 +1,434 @@
+import math
+import os
+from functools import lru_cache
+from typing import Callable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pybamm as pb
+
+from sox.plant.thevenin.cache import load_outputs, load_termination, save_outputs, solve_key
+from sox.plant.thevenin.parameters import Inputs, Outputs, check_variables, finish_outputs
+from sox.utils import RegularGridLookupTable, default_cache_dir
+
+KELVIN = 273.15
+MAX_CURRENT_ITERATIONS = 4  # fixed-point iterations for the current dependence of R0 in power and voltage steps
+CUT_OFF_EVENTS = ("Minimum voltage [V]", "Maximum voltage [V]", "Minimum SoC", "Maximum SoC")  # names in pybamm
+
+
+def scalar_function(func: Callable, n_args: int) -> Callable:
+    """Returns a function of n_args floats that evaluates a parameter function of `Inputs` to a float.
+
+    Functions that return a linear, extrapolating `pybamm.Interpolant` of their arguments on evenly spaced axes, such
+    as the default inputs, become the scalar function of a `RegularGridLookupTable`. Other pybamm expressions are
+    evaluated through pybamm, which is much slower, and functions that return numbers are called as they are.
+
+    Args:
+        func (Callable): Parameter function, e.g. `Inputs.series_resistance`.
+        n_args (int): Number of arguments of func.
+
+    Returns:
+        Callable: Function of n_args floats.
+    """
+    names = [f"x{i}" for i in range(n_args)]
+    expression = func(*[pb.InputParameter(name) for name in names])
+    if not isinstance(expression, pb.Symbol):
+        return lambda *x: float(func(*x))
+
+    if (
+        isinstance(expression, pb.Interpolant)
+        and expression.interpolator == "linear"
+        and expression.extrapolate
+        and [child.name if isinstance(child, pb.InputParameter) else None for child in expression.children] == names
+    ):
+        axes = [np.asarray(x, dtype=float).ravel() for x in expression.x]
+        try:
+            return RegularGridLookupTable(
+                axes, np.reshape(expression.y, [axis.size for axis in axes])
+            ).scalar_function()
+        except ValueError:  # axes not evenly spaced
+            pass
+
+    return lambda *x: np.asarray(expression.evaluate(inputs=dict(zip(names, x)))).item()
+
+
+@lru_cache(maxsize=256)
+def _thermal_discretization(dt: float, cth_cell: float, cth_jig: float, k_cell_jig: float, k_jig_air: float):
+    """Exact zero-order-hold discretization of the lumped cell and jig temperatures.
+
+    The inputs are the heat generation in the cell and the ambient temperature, so the cell and jig temperatures
+    after dt are `row @ (T_cell, T_jig, heat, T_ambient)` for the two returned rows.
+    """
+    from scipy.linalg import expm
+
+    augmented = np.zeros((4, 4))
+    augmented[0, :3] = [-k_cell_jig / cth_cell, k_cell_jig / cth_cell, 1.0 / cth_cell]
+    augmented[1, :2] = [k_cell_jig / cth_jig, -(k_cell_jig + k_jig_air) / cth_jig]
+    augmented[1, 3] = k_jig_air / cth_jig
+    phi = expm(augmented * dt)
+    return tuple(phi[0].tolist()), tuple(phi[1].tolist())
+
+
+class NumpyThevenin:
+    """Thevenin equivalent circuit model integrated sample by sample in NumPy, without a DAE solver.
+
+    A drop-in alternative to `Thevenin` (same inputs, experiments and outputs) for generating many trajectories.
+    Within each sample, the current and the parameters (OCV, resistances, capacitances and entropic change) are held at
+    their values at the start of the sample. The state of charge, the RC overpotentials and the cell and jig
+    temperatures are then advanced with the exact solution of the linear dynamics. Power and voltage-hold steps solve
+    for the current at every sample, so the held power or voltage is met at the sample times.
+
+    Step terminations and the voltage and SoC cut-offs are checked at every sample. A crossing is located by linear
+    interpolation and ends the step with a shortened last sample, and a cut-off ends the experiment. A step whose
+    termination holds at its start is skipped. The time grid of each step matches the one of `Thevenin`.
+
+    Supported steps are current, C-rate, power, voltage-hold and rest steps, also as drive cycles, with voltage,
+    current and C-rate terminations. A drive-cycle value is held at its value in the middle of each sample.
+
+    Args:
+        inputs (Inputs): Thevenin model inputs.
+
+    Attributes:
+        inputs (Inputs): Thevenin model inputs.
+        ocv (Callable): Open-circuit voltage [V] of SoC.
+        entropic_change (Callable): Entropic change [V/K] of open-circuit voltage and temperature [degC].
+        series_resistance (Callable): R0 [Ohm] of temperature [degC], current [A] and SoC.
+        rc_resistance (list): RC resistances [Ohm] of temperature [degC], current [A] and SoC.
+        rc_capacitance (list): RC capacitances [F] of temperature [degC], current [A] and SoC.
+        termination (str): Why the last solve ended, "final time" or the cut-off as in `Thevenin.termination`.
+        _sources (list): Input functions the parameter functions were built from.
+    """
+
+    def __init__(self, inputs: Inputs):
+        self.inputs = inputs
+        self.build_functions()
+        self.termination: Optional[str] = None
+
+    def build_functions(self):
+        """Builds the scalar parameter functions from the inputs."""
+        inputs = self.inputs
+        self.ocv = scalar_function(inputs.open_circuit_voltage, 1)
+        self.entropic_change = scalar_function(inputs.entropic_change, 2)
+        self.series_resistance = scalar_function(inputs.series_resistance, 3)
+        self.rc_resistance = [scalar_function(func, 3) for func in inputs.rc_resistance]
+        self.rc_capacitance = [scalar_function(func, 3) for func in inputs.rc_capacitance]
+        self._sources = self.function_sources()
+
+    def function_sources(self) -> list:
+        """Returns the input functions of the parameter functions; the numeric inputs are read at every solve."""
+        inputs = self.inputs
+        return [
+            inputs.open_circuit_voltage,
+            inputs.entropic_change,
+            inputs.series_resistance,
+            *inputs.rc_resistance,
+            *inputs.rc_capacitance,
+        ]
+
+    @staticmethod
+    def check_step(step):
+        """Raises ValueError if the step cannot be simulated by this backend."""
+        if not isinstance(step, (pb.step.Current, pb.step.CRate, pb.step.Power, pb.step.Voltage)):
+            raise ValueError(f"{type(step).__name__} steps are not supported: {step}")
+        if getattr(step, "is_python_function", False):
+            raise ValueError(f"Steps with function values are not supported: {step}")
+        if step.temperature is not None:
+            raise ValueError(f"Steps with an ambient temperature are not supported: {step}")
+        for termination in step.termination:
+            if not isinstance(
+                termination, (pb.step.VoltageTermination, pb.step.CurrentTermination, pb.step.CRateTermination)
+            ):
+                raise ValueError(f"{type(termination).__name__} is not supported: {step}")
+            if (
+                isinstance(termination, pb.step.VoltageTermination)
+                and termination.operator is None
+                and getattr(step, "direction", None) not in ("charge", "discharge")
+            ):  # e.g. "Rest until 4 V", whose crossing direction is unknown
+                raise ValueError(f"Voltage terminations of {step} need an operator, e.g. termination='> 4 V'")
+
+    def step_current(
+        self, step, soc: float, rc_voltage: list, temperature: float, current: float, value: Optional[float] = None
+    ) -> float:
+        """Returns the current [A] applied by a step at the given state.
+
+        Args:
+            step (pybamm.step.BaseStep): Experiment step.
+            soc (float): State of charge.
+            rc_voltage (list): RC overpotentials [V].
+            temperature (float): Cell temperature [degC].
+            current (float): Initial guess for power and voltage-hold steps, e.g. the current of the last sample [A].
+            value (float, optional): Value of the step, required for drive cycles. Defaults to None (step.value).
+        """
+        value = float(step.value) if value is None else value
+        if isinstance(step, pb.step.Current):  # includes Rest
+            return value
+        if isinstance(step, pb.step.CRate):
+            return value * self.inputs.capacity
+
+        emf = self.ocv(soc) + sum(rc_voltage)
+        for _ in range(MAX_CURRENT_ITERATIONS):
+            r0 = self.series_resistance(temperature, current, soc)
+            if isinstance(step, pb.step.Power):  # power = current * (emf - current * r0)
+                discriminant = emf * emf - 4.0 * r0 * value
+                new = (emf - math.sqrt(max(discriminant, 0.0))) / (2.0 * r0)
+            else:  # voltage = emf - current * r0
+                new = (emf - value) / r0
+            converged = abs(new - current) <= 1e-9 * max(1.0, abs(new))
+            current = new
+            if converged:
+                break
+        return current
+
+    def solve(
+        self,
+        experiment: pb.Experiment,
+        cache: Union[bool, str] = False,
+        variables: Optional[Sequence[str]] = None,
+        dtype=None,
+    ) -> Outputs:
+        """Solves the model for the given experiment.
+
+        Args:
+            experiment (pybamm.Experiment): Experiment to solve.
+            cache (bool or str, optional): On-disk solve cache, see `Thevenin.solve`. Entries are keyed separately
+                from the ones of `Thevenin`. Defaults to False.
+            variables (sequence of str, optional): Variables to return, see `Thevenin.solve`. Defaults to None (all).
+            dtype (numpy dtype, optional): Storage dtype, see `Thevenin.solve`. Defaults to None.
+
+        Returns:
+            Outputs: Thevenin model outputs.
+
+        Raises:
+            ValueError: If the experiment has steps that are not supported, or a variable is not a field of `Outputs`.
+        """
+        for step in experiment.steps:
+            self.check_step(step)
+        if variables is not None:
+            check_variables(variables)
+
+        path = None
+        if cache:
+            cache_dir = default_cache_dir() if cache is True else cache
+            path = os.path.join(cache_dir, "thevenin", solve_key(self.inputs, experiment, self))
+            if os.path.isdir(path):
+                self.termination = load_termination(path)
+                return finish_outputs(load_outputs(path), variables, dtype)
+
+        rows, _, cut_off = self.simulate(experiment.steps, self.initial_state())
+        self.termination = f"event: {cut_off}" if cut_off else "final time"
+        outputs = self.build_outputs(rows)
+        if path is not None:
+            save_outputs(path, outputs, self.termination)
+        return finish_outputs(outputs, variables, dtype)
+
+    def solve_chunks(
+        self,
+        experiment: pb.Experiment,
+        cycles_per_chunk: int = 1,
+        variables: Optional[Sequence[str]] = None,
+        dtype=None,
+    ) -> Iterator[Outputs]:
+        """Solves the model for the given experiment chunk by chunk and yields the outputs of each chunk.
+
+        Chunks are consecutive experiment cycles, as in `Thevenin.solve_chunks`, and each chunk starts from the last
+        state of the previous one. The chunks together equal the outputs of `solve`. A cut-off that ends the
+        experiment ends the iteration.
+
+        Args:
+            experiment (pybamm.Experiment): Experiment to solve.
+            cycles_per_chunk (int, optional): Number of experiment cycles per chunk. Defaults to 1.
+            variables (sequence of str, optional): Variables to return, see `Thevenin.solve`. Defaults to None (all).
+            dtype (numpy dtype, optional): Storage dtype, see `Thevenin.solve`. Defaults to None.
+
+        Yields:
+            Outputs: Thevenin model outputs of one chunk.
+
+        Raises:
+            ValueError: If the experiment has steps that are not supported, or a variable is not a field of `Outputs`.
+        """
+        for step in experiment.steps:
+            self.check_step(step)
+        if variables is not None:
+            check_variables(variables)
+        if cycles_per_chunk < 1:
+            raise ValueError("cycles_per_chunk must be at least 1")
+
+        state = self.initial_state()
+        bounds = np.cumsum([0, *experiment.cycle_lengths])[:-1][::cycles_per_chunk].tolist() + [len(experiment.steps)]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows, state, cut_off = self.simulate(experiment.steps[start:stop], state)
+            self.termination = f"event: {cut_off}" if cut_off else "final time"
+            yield finish_outputs(self.build_outputs(rows), variables, dtype)
+            if cut_off:
+                return
+
+    def initial_state(self) -> tuple:
+        """Returns the initial (time, current, SoC, RC overpotentials, cell temperature, jig temperature) state."""
+        inputs = self.inputs
+        rc_voltage = [float(v) for v in inputs.initial_rc_voltage[: inputs.rc_pairs]]
+        return (
+            0.0,
+            0.0,
+            float(inputs.initial_soc),
+            rc_voltage,
+            float(inputs.initial_temperature),
+            float(inputs.initial_temperature),
+        )
+
+    def simulate(self, steps: list, state: tuple) -> tuple:
+        """Simulates experiment steps from a state, see `initial_state`.
+
+        Returns:
+            tuple: One (time, current, SoC, T_cell, T_jig, ocv, R0, *v_rc, *R, *C) tuple per sample, the state after
+                the last step, and the pybamm name of the cut-off that ended the simulation, or None.
+        """
+        inputs = self.inputs
+        sources = self.function_sources()
+        if len(sources) != len(self._sources) or any(a is not b for a, b in zip(sources, self._sources)):
+            self.build_functions()  # an input function was replaced since construction
+        time, current, soc, rc_voltage, t_cell, t_jig = state
+        t_ambient = float(inputs.ambient_temperature)
+        charge_scale = 1.0 / (3600.0 * inputs.capacity)  # SoC per A.s
+        rows = []
+
+        def evaluate_state(soc, rc_voltage, t_cell, current):
+            """Parameters at a state and the event values of the voltage and SoC cut-offs"""
+            ocv = self.ocv(soc)
+            r0 = self.series_resistance(t_cell, current, soc)
+            r = [f(t_cell, current, soc) for f in self.rc_resistance]
+            c = [f(t_cell, current, soc) for f in self.rc_capacitance]
+            voltage = ocv - current * r0 + sum(rc_voltage)
+            cutoffs = (voltage - inputs.voltage_low_cut, inputs.voltage_high_cut - voltage, soc, 1.0 - soc)
+            return ocv, r0, r, c, voltage, cutoffs
+
+        def advance(soc, rc_voltage, t_cell, t_jig, current, parameters, dt, thermal):
+            """State after dt with the current and the parameters held"""
+            ocv, r0, r, c = parameters[:4]
+            decay = [math.exp(-dt / (ri * ci)) for ri, ci in zip(r, c)]
+            heat = (
+                current * current * r0
+                - current * sum(rc_voltage)
+                - current * (t_cell + KELVIN) * self.entropic_change(ocv, t_cell)
+            )
+            cell, jig = thermal
+            return (
+                soc - current * dt * charge_scale,
+                [v * d - current * ri * (1.0 - d) for v, d, ri in zip(rc_voltage, decay, r)],
+                cell[0] * t_cell + cell[1] * t_jig + cell[2] * heat + cell[3] * t_ambient,
+                jig[0] * t_cell + jig[1] * t_jig + jig[2] * heat + jig[3] * t_ambient,
+            )
+
+        stop = None
+        for step in steps:
+            terminations = self._terminations(step)
+            period = step.period if step.period is not None else step.default_period()
+            n_samples = max(round(step.duration / period) + 1, 2)
+            dt = step.duration / (n_samples - 1)
+            thermal = _thermal_discretization(dt, inputs.cth_cell, inputs.cth_jig, inputs.k_cell_jig, inputs.k_jig_air)
+            if step.is_drive_cycle:  # value in the middle of each sample, the last one held
+                values = np.interp((np.arange(n_samples) + 0.5) * dt, step.value.x[0], step.value.y).tolist()
+            else:
+                values = [None] * n_samples
+
+            current = self.step_current(step, soc, rc_voltage, t_cell, current, values[0])
+            parameters = evaluate_state(soc, rc_voltage, t_cell, current)
+            events = [f(parameters[4], current) for f in terminations]
+            if min(events, default=1.0) <= 0:  # infeasible at the start, skipped like pybamm does
+                continue
+
+            start = time
+            rows.append(
+                (time, current, soc, t_cell, t_jig, *parameters[:2], *rc_voltage, *parameters[2], *parameters[3])
+            )
+            for k in range(1, n_samples):
+                sample = advance(soc, rc_voltage, t_cell, t_jig, current, parameters, dt, thermal)
+                new_current = self.step_current(step, sample[0], sample[1], sample[2], current, values[k])
+                new_parameters = evaluate_state(sample[0], sample[1], sample[2], new_current)
+                new_events = [f(new_parameters[4], new_current) for f in terminations]
+                time = start + k * dt
+
+                crossed = None
+                if min(new_parameters[5]) <= 0 or min(new_events, default=1.0) <= 0:
+                    crossed = [
+                        (old / (old - new), i)
+                        for i, (old, new) in enumerate(
+                            zip([*events, *parameters[5]], [*new_events, *new_parameters[5]])
+                        )
+                        if new <= 0 < old
+                    ]
+                if crossed:  # ends the sample at the interpolated crossing of the first event
+                    fraction, index = min(crossed)  # step terminations first at equal fractions
+                    if index >= len(terminations):
+                        stop = CUT_OFF_EVENTS[index - len(terminations)]
+                    partial = dt * fraction
+                    partial_thermal = _thermal_discretization(
+                        partial, inputs.cth_cell, inputs.cth_jig, inputs.k_cell_jig, inputs.k_jig_air
+                    )
+                    sample = advance(soc, rc_voltage, t_cell, t_jig, current, parameters, partial, partial_thermal)
+                    new_current = self.step_current(step, sample[0], sample[1], sample[2], current, values[k - 1])
+                    new_parameters = evaluate_state(sample[0], sample[1], sample[2], new_current)
+                    time = start + (k - 1) * dt + partial
+
+                soc, rc_voltage, t_cell, t_jig = sample
+                current, parameters, events = new_current, new_parameters, new_events
+                rows.append(
+                    (time, current, soc, t_cell, t_jig, *parameters[:2], *rc_voltage, *parameters[2], *parameters[3])
+                )
+                if crossed:
+                    break
+            if stop:
+                break
+
+        return rows, (time, current, soc, rc_voltage, t_cell, t_jig), stop
+
+    def build_outputs(self, rows: list) -> Outputs:
+        """Returns the outputs of the samples returned by `simulate`."""
+        n_rc = self.inputs.rc_pairs
+        data = np.array(rows, dtype=float).reshape(-1, 7 + 3 * n_rc).T
+        time_, current_, soc_, t_cell_, t_jig_, ocv, r0 = data[:7]
+        rc_voltage_, rc_resistance, rc_capacitance = (
+            data[7 : 7 + n_rc],
+            data[7 + n_rc : 7 + 2 * n_rc],
+            data[7 + 2 * n_rc :],
+        )
+        voltage = ocv - current_ * r0 + rc_voltage_.sum(axis=0)
+        outputs = Outputs(
+            time=time_,
+            voltage=voltage,
+            rc_voltage=list(rc_voltage_),
+            ocv=ocv,
+            current=current_,
+            power=voltage * current_,
+            resistance=np.sign(current_) * voltage / np.where(current_ == 0, 1.0, current_),
+            series_resistance=r0,
+            rc_resistance=list(rc_resistance),
+            rc_capacitance=list(rc_capacitance),
+            soc=soc_,
+            ambient_temperature=np.full_like(time_, float(self.inputs.ambient_temperature)),
+            cell_temperature=t_cell_,
+            jig_temperature=t_jig_,
+        )
+        return outputs
+
+    def _terminations(self, step) -> list:
+        """Event functions of voltage and current of the step terminations, positive until the step ends"""
+        capacity = self.inputs.capacity
+        operators = {"charge": ">", "discharge": "<"}  # rising voltage on charge, see `check_step`
+        events = []
+        for termination in step.termination:
+            value, operator = termination.value, termination.operator
+            if isinstance(termination, pb.step.VoltageTermination):
+                if operator is None:
+                    operator = operators[step.direction]
+                if operator == ">":
+                    events.append(lambda voltage, current, value=value: value - voltage)
+                elif operator == "<":
+                    events.append(lambda voltage, current, value=value: voltage - value)
+            elif isinstance(termination, pb.step.CRateTermination):
+                events.append(lambda voltage, current, value=value: abs(current) / capacity - value)
+            elif operator == ">":
+                events.append(lambda voltage, current, value=value: value - current)
+            elif operator == "<":
+                events.append(lambda voltage, current, value=value: current - value)
+            else:
+                events.append(lambda voltage, current, value=value: abs(current) - value)
+        return events
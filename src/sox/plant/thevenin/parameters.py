@@ -1,7 +1,10 @@
-from dataclasses import dataclass
-from typing import Any, Callable, List
+import hashlib
+import os
+from dataclasses import dataclass, fields, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
+import pybamm as pb
 
 Temp = Any  # degC
 Current = Any
@@ -77,22 +80,186 @@ class Outputs:
         ambient_temperature (array_like): Ambient temperature [degC].
         cell_temperature (array_like): Cell temperature [degC].
         jig_temperature (array_like): Jig temperature [degC].
+
+    Variables that were not requested from the model are None.
     """
 
     # electrical properties
-    time: np.ndarray  # 'Time [s]'
-    voltage: np.ndarray  # 'Voltage [V]'
-    rc_voltage: List[np.ndarray]  # ['Element-1 overpotential [V]', ..., 'Element-n overpotential [V]']
-    ocv: np.ndarray  # 'Open-circuit voltage [V]'
-    current: np.ndarray  # 'Current [A]'
-    power: np.ndarray  # 'Power [W]'
-    resistance: np.ndarray  # 'Resistance [Ohm]'
-    series_resistance: np.ndarray  # 'R0 [Ohm]'
-    rc_resistance: List[np.ndarray]  # ['R1 [Ohm]', ..., 'Rn [Ohm]']
-    rc_capacitance: List[np.ndarray]  # ['C1 [F]', ..., 'Cn [F]']
-    soc: np.ndarray  # 'SoC'
+    time: Optional[np.ndarray]  # 'Time [s]'
+    voltage: Optional[np.ndarray]  # 'Voltage [V]'
+    rc_voltage: Optional[List[np.ndarray]]  # ['Element-1 overpotential [V]', ..., 'Element-n overpotential [V]']
+    ocv: Optional[np.ndarray]  # 'Open-circuit voltage [V]'
+    current: Optional[np.ndarray]  # 'Current [A]'
+    power: Optional[np.ndarray]  # 'Power [W]'
+    resistance: Optional[np.ndarray]  # 'Resistance [Ohm]'
+    series_resistance: Optional[np.ndarray]  # 'R0 [Ohm]'
+    rc_resistance: Optional[List[np.ndarray]]  # ['R1 [Ohm]', ..., 'Rn [Ohm]']
+    rc_capacitance: Optional[List[np.ndarray]]  # ['C1 [F]', ..., 'Cn [F]']
+    soc: Optional[np.ndarray]  # 'SoC'
 
     # thermal properties
-    ambient_temperature: np.ndarray  # 'Ambient temperature [degC]'
-    cell_temperature: np.ndarray  # 'Cell temperature [degC]'
-    jig_temperature: np.ndarray  # 'Jig temperature [degC]'
+    ambient_temperature: Optional[np.ndarray]  # 'Ambient temperature [degC]'
+    cell_temperature: Optional[np.ndarray]  # 'Cell temperature [degC]'
+    jig_temperature: Optional[np.ndarray]  # 'Jig temperature [degC]'
+
+    def select(self, variables: Sequence[str]) -> "Outputs":
+        """Returns outputs with only the given variables, the others set to None.
+
+        Raises:
+            ValueError: If a variable is not a field of `Outputs`.
+        """
+        check_variables(variables)
+        return Outputs(**{name: getattr(self, name) if name in variables else None for name in OUTPUT_VARIABLES})
+
+    def compact(self, dtype=np.float32) -> "Outputs":
+        """Returns the outputs stored in one contiguous buffer of dtype.
+
+        The buffer has one row per variable and RC pair, shape (n_rows, n_samples), in field order, and the returned
+        variables are views of its rows. Time stays a float64 array of its own, since float32 would round long
+        trajectories to tens of milliseconds. Variables that are None stay None.
+        """
+        rows: List[np.ndarray] = []
+        for name in OUTPUT_VARIABLES:
+            value = getattr(self, name)
+            if value is not None and name != "time":
+                rows.extend(value if name in LIST_VARIABLES else [value])
+        buffer = np.empty((len(rows), np.size(rows[0]) if rows else 0), dtype=dtype)
+        for i, row in enumerate(rows):
+            buffer[i] = row
+
+        values: Dict[str, Any] = {}
+        i = 0
+        for name in OUTPUT_VARIABLES:
+            value = getattr(self, name)
+            if value is None:
+                values[name] = None
+            elif name == "time":
+                values[name] = np.array(value, dtype=np.float64)
+            elif name in LIST_VARIABLES:
+                values[name] = list(buffer[i : i + len(value)])
+                i += len(value)
+            else:
+                values[name] = buffer[i]
+                i += 1
+        return Outputs(**values)
+
+
+OUTPUT_VARIABLES = tuple(field.name for field in fields(Outputs))
+LIST_VARIABLES = ("rc_voltage", "rc_resistance", "rc_capacitance")  # one array per RC pair
+
+
+def check_variables(variables: Sequence[str]):
+    """Raises a ValueError if a variable is not a field of `Outputs`."""
+    unknown = set(variables).difference(OUTPUT_VARIABLES)
+    if unknown:
+        raise ValueError(f"Unknown output variables: {sorted(unknown)}")
+
+
+def finish_outputs(outputs: Outputs, variables: Optional[Sequence[str]] = None, dtype=None) -> Outputs:
+    """Returns outputs restricted to variables with `Outputs.select` and compacted to dtype with `Outputs.compact`,
+    where given."""
+    if variables is not None:
+        outputs = outputs.select(variables)
+    if dtype is not None:
+        outputs = outputs.compact(dtype)
+    return outputs
+
+
+class LazyOutputs(Outputs):
+    """Outputs whose variables are computed on first access.
+
+    Args:
+        loaders (dict): Function without arguments that returns the variable, by variable name. Variables without
+            a loader are None.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable]):
+        self._loaders = dict(loaders)
+
+    def __getattr__(self, name):  # only called for variables that are not loaded yet
+        if name not in OUTPUT_VARIABLES:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        loader = self.__dict__.get("_loaders", {}).pop(name, None)
+        value = loader() if loader is not None else None
+        setattr(self, name, value)
+        return value
+
+    def load(self) -> Outputs:
+        """Returns plain outputs with all variables loaded, which unlike lazy outputs can be pickled."""
+        return Outputs(**{name: getattr(self, name) for name in OUTPUT_VARIABLES})
+
+
+@dataclass
+class ParameterTable:
+    """Parameter data on a dense regular grid.
+
+    Args:
+        name (str): Table name, e.g. the CSV file stem.
+        axes (tuple): Grid points of each input dimension, shape (n_1,), ..., (n_d,).
+        values (array_like): Parameter values at the grid points, shape (n_1, ..., n_d).
+    """
+
+    name: str
+    axes: Tuple[np.ndarray, ...]
+    values: np.ndarray
+
+    @classmethod
+    def from_csv(cls, filename: str, path: str = "", cache_dir: Optional[str] = None) -> "ParameterTable":
+        """Reads a table from a CSV file with one column per input followed by the values, one row per grid point.
+
+        With cache_dir, the parsed table is stored there as .npz under the SHA-1 of the CSV content, so later loads skip
+        the text parsing and an edited CSV is parsed afresh. Without it, nothing is written.
+
+        Args:
+            filename (str): CSV file name.
+            path (str, optional): Directory of the CSV file. Defaults to "".
+            cache_dir (str, optional): Directory of the .npz cache, e.g. `default_cache_dir()`. Defaults to None.
+
+        Returns:
+            ParameterTable: Dense table named after the file stem.
+        """
+        filepath = os.path.join(path, filename)
+        with open(filepath, "rb") as f:
+            content = f.read()
+        name = os.path.splitext(os.path.basename(filename))[0]
+        digest = hashlib.sha1(content).hexdigest()[:16]
+        cache_path = None if cache_dir is None else os.path.join(cache_dir, f"{name}-{digest}.npz")
+
+        if cache_path is not None and os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                n_axes = len(data.files) - 1
+                return cls(name, tuple(data[f"axis_{i}"] for i in range(n_axes)), data["values"])
+
+        rows = np.loadtxt(filepath, delimiter=",", skiprows=1, ndmin=2)
+        axes = tuple(np.unique(rows[:, i]) for i in range(rows.shape[1] - 1))
+        values = np.full(tuple(axis.size for axis in axes), np.nan)
+        values[tuple(np.searchsorted(axis, rows[:, i]) for i, axis in enumerate(axes))] = rows[:, -1]
+        if np.isnan(values).any():
+            raise ValueError(f"{filepath} does not cover a full regular grid.")
+        table = cls(name, axes, values)
+        if cache_path is None:
+            return table
+
+        arrays: Dict[str, Any] = {f"axis_{i}": axis for i, axis in enumerate(axes)}
+        arrays["values"] = values
+        try:  # a read-only cache location only costs the parsing time
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        return table
+
+    def scaled(self, factor: float) -> "ParameterTable":
+        """Returns a copy of the table with values multiplied by factor."""
+        return replace(self, values=self.values * factor)
+
+    def as_data(self):
+        """Returns the table as a `(name, (axes, values))` tuple, the format of `pybamm.parameters` data."""
+        return self.name, (self.axes, self.values)
+
+    def interpolant(self, children) -> pb.Interpolant:
+        """Returns a `pybamm.Interpolant` of the table with linear extrapolation, evaluated at children (one child per
+        axis)."""
+        return pb.Interpolant(self.axes, self.values, children, self.name, extrapolate=True)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Sensor:
     """Sensor class that reads data from a file and applies noise and faults.
 
@@ -53,6 +56,18 @@ class Sensor:
         except StopIteration:
             raise IndexError(f"Sensor '{self.name}' finished reading.")
 
+    def read_all(self):
+        """Reads all remaining sensor values and applies noise and faults to them
+
+        Returns:
+            np.ndarray: Sensor readings with noise and faults applied, shape (T,).
+        """
+        readings = []
+        for time, sensor_value in zip(self.time_iterator, self.data_iterator):
+            sensor_value = self.apply_faults(time, sensor_value)
+            readings.append(self.apply_noise(sensor_value))
+        return np.array(readings, dtype=float)
+
     def reset(self):
         """Resets sensor to beginning of data set"""
         self.time_iterator = iter(self.time)
@@ -1 +1,10 @@
-from .isothermal_thevenin import *
+from sox._lazy import lazy_attributes
+
+_attributes = {
+    "IsothermalThevenin": (".isothermal_thevenin", "IsothermalThevenin"),
+    "ocv_table": (".isothermal_thevenin", "ocv_table"),
+    "ParameterVaryingThevenin": (".parameter_varying_thevenin", "ParameterVaryingThevenin"),
+}
+
+__all__ = list(_attributes)
+__getattr__, __dir__ = lazy_attributes(__name__, _attributes)
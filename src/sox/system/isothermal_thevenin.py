@@ -1,97 +1,263 @@
-from typing import Callable, List
+import hashlib
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple, Union
 
 import numpy as np
-from scipy.interpolate import interp1d
 
-from sox.utils import derivative_interp1d
+from sox.utils import UniformLookupTable, savgol_derivative
+
+MAX_OCV_TABLES = 32
+# (ocv_func, delta_soc) -> (soc, ocv), shared by every system built from the same OCV source, least recently used first
+_ocv_tables: "OrderedDict[Tuple[Callable, float], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+
+def _evaluate_ocv(ocv_func: Callable, soc):
+    """Evaluates ocv_func on an array of SOC values, in one call when the OCV expression allows it."""
+    import pybamm as pb
+
+    try:
+        ocv = np.asarray(ocv_func(pb.Vector(soc)).evaluate(), dtype=float).ravel()
+        if ocv.shape == soc.shape:
+            return ocv
+    except TypeError:  # expression cannot take a vector, e.g. it indexes its argument, one SOC at a time then
+        pass
+    return np.array([ocv_func([s]).evaluate()[0, 0] for s in soc])
+
+
+def ocv_table(ocv_func: Callable, delta_soc: float = 0.001, cache_dir: Optional[str] = None):
+    """Evaluates ocv_func on a uniform SOC grid over [0, 1].
+
+    The last `MAX_OCV_TABLES` tables are memoized per OCV source and grid spacing. With cache_dir, they are also
+    stored on disk under a hash of the OCV expression, including the data of its interpolants, so that new processes
+    skip the evaluation.
+
+    Args:
+        ocv_func (Callable): Function that returns the open-circuit voltage (pybamm expression) of state of charge.
+        delta_soc (float, optional): Grid spacing. Defaults to 0.001.
+        cache_dir (str, optional): Directory of the on-disk cache. Defaults to None (memory only).
+
+    Returns:
+        tuple: Read-only SOC grid and open-circuit voltage arrays, shape (n,)
+    """
+    key = (ocv_func, delta_soc)
+    if key in _ocv_tables:
+        _ocv_tables.move_to_end(key)
+        return _ocv_tables[key]
+
+    soc = np.arange(0, 1 + delta_soc, delta_soc)
+    path = None
+    if cache_dir is not None:
+        from sox.plant.thevenin.cache import value_key
+
+        digest = hashlib.sha1(f"{value_key(ocv_func)}:{delta_soc!r}".encode()).hexdigest()[:16]
+        path = os.path.join(cache_dir, f"ocv_{digest}.npy")
+
+    if path is not None and os.path.exists(path):
+        ocv = np.load(path)
+    else:
+        ocv = _evaluate_ocv(ocv_func, soc)
+        if path is not None:
+            try:  # a read-only cache location only costs the evaluation time
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, ocv)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+
+    soc.flags.writeable = ocv.flags.writeable = False
+    _ocv_tables[key] = soc, ocv
+    if len(_ocv_tables) > MAX_OCV_TABLES:
+        _ocv_tables.popitem(last=False)
+    return soc, ocv
+
+
+@lru_cache(maxsize=1024)
+def _discretize(dt: float, rc_resistances: Tuple[float], rc_capacitors: Tuple[float], capacity: float):
+    """Exact zero-order-hold discretization, cached per time step and parameter set.
+
+    The augmented matrix exponential expm([[A, Bc], [0, 0]] * dt) = [[F, B], [0, 1]] yields F and B in one call.
+    """
+    from scipy.linalg import expm
+
+    n = 1 + len(rc_resistances)
+    r = np.asarray(rc_resistances, dtype=float)
+    c = np.asarray(rc_capacitors, dtype=float)
+    augmented = np.zeros((n + 1, n + 1))
+    augmented[np.arange(1, n), np.arange(1, n)] = -1.0 / (r * c)  # A
+    augmented[0, n] = -1.0 / (capacity * 3600.0)  # Bc
+    augmented[1:n, n] = 1.0 / c
+    phi = expm(augmented * dt)
+    F, B = phi[:n, :n], phi[:n, n:]
+    F.flags.writeable = B.flags.writeable = False  # shared by every caller with the same dt
+    return F, B
+
+
+@lru_cache(maxsize=MAX_OCV_TABLES)
+def _ocv_lookup_tables(ocv_func: Callable, cache_dir: Optional[str]):
+    """OCV and derivative lookup tables in one buffer, shared by every system built from the same OCV source"""
+    delta_soc = 0.001
+    soc, ocv = ocv_table(ocv_func, delta_soc, cache_dir=cache_dir)
+    return UniformLookupTable.from_grid(soc, ocv, savgol_derivative(ocv, delta_soc))
 
 
 class IsothermalThevenin:
     """Isothermal Thevenin battery dynamics model that is used for state estimation.
 
+    Parameters may be given per cell to describe a fleet of N cells with one object: series resistance and
+    capacity of shape (N,), RC resistors and capacitors of shape (N, n_rc). The model functions then take stacked
+    states of shape (N, n, M) and per-cell current and time step of shape (N,).
+
     Args:
         ocv_func (Callable): Function that returns the open-circuit voltage as a function of state of charge.
-        series_resistance (float): Series resistance (Ohm).
-        rc_resistors (list): List of RC resistor values (Ohm).
-        rc_capacitors (list): List of RC capacitor values (F).
-        capacity (float): Cell capacity (Ah).
+        series_resistance (float or array_like): Series resistance (Ohm).
+        rc_resistors (list or array_like): List of RC resistor values (Ohm).
+        rc_capacitors (list or array_like): List of RC capacitor values (F).
+        capacity (float or array_like): Cell capacity (Ah).
+        cache_dir (str, optional): Directory of the on-disk OCV table cache, see `ocv_table`. Defaults to None.
 
     Attributes:
-        ocv (Callable): Function returning the open-circuit voltage as a function of state of charge.
-        docv (Callable): Function returning the derivative of the open-circuit voltage with respect to state of charge.
-        series_resistance (float): Series resistance (Ohm).
-        rc_resistors (list): List of RC resistor values (Ohm).
-        rc_capacitors (list): List of RC capacitor values (F).
-        capacity (float): Cell capacity (Ah).
+        ocv (UniformLookupTable): Open-circuit voltage as a function of state of charge.
+        docv (UniformLookupTable): Derivative of the open-circuit voltage with respect to state of charge.
+        series_resistance (float or array_like): Series resistance (Ohm).
+        rc_resistors (list or array_like): List of RC resistor values (Ohm).
+        rc_capacitors (list or array_like): List of RC capacitor values (F).
+        capacity (float or array_like): Cell capacity (Ah).
     """
 
     def __init__(
         self,
         ocv_func: Callable,
-        series_resistance: float,
-        rc_resistors: List[float],
-        rc_capacitors: List[float],
-        capacity: float,
+        series_resistance: Union[float, np.ndarray],
+        rc_resistors: Union[List[float], np.ndarray],
+        rc_capacitors: Union[List[float], np.ndarray],
+        capacity: Union[float, np.ndarray],
+        cache_dir: Optional[str] = None,
     ):
-        self.ocv = self.build_ocv_func(ocv_func)
-        self.docv = self.build_docv_func(ocv_func)
+        self.ocv, self.docv = self.build_ocv_tables(ocv_func, cache_dir)
         self.series_resistance = series_resistance
         self.rc_resistances = rc_resistors
         self.rc_capacitors = rc_capacitors
         self.capacity = capacity
-        assert len(rc_resistors) == len(rc_capacitors)
+        assert np.shape(rc_resistors) == np.shape(rc_capacitors)
+
+    @property
+    def n_rc(self) -> int:
+        """Number of RC pairs"""
+        return np.shape(self.rc_resistances)[-1]
+
+    @property
+    def is_batched(self) -> bool:
+        """Whether any parameter is given per cell"""
+        return (
+            np.ndim(self.series_resistance) > 0
+            or np.ndim(self.capacity) > 0
+            or np.ndim(self.rc_resistances) > 1
+            or np.ndim(self.rc_capacitors) > 1
+        )
 
     @staticmethod
-    def build_ocv_func(ocv_func):
+    def build_ocv_tables(ocv_func, cache_dir=None):
+        """Returns lookup tables of the open-circuit voltage and its derivative with respect to state of charge.
+
+        Both tables share one buffer built from the same OCV grid. They are built once per OCV source and cache
+        directory and then shared, so `build_ocv_func` and `build_docv_func` reuse the same build.
+        """
+        return _ocv_lookup_tables(ocv_func, cache_dir)
+
+    @staticmethod
+    def build_ocv_func(ocv_func, cache_dir=None):
         """Returns the open-circuit voltage as a function of state of charge."""
-        delta_soc = 0.001
-        soc = np.arange(0, 1 + delta_soc, delta_soc)
-        ocv = [ocv_func([s]).evaluate()[0, 0] for s in soc]  # evaluates pb.Interpolant
-        return interp1d(soc, ocv, kind="linear", fill_value="extrapolate")
+        return IsothermalThevenin.build_ocv_tables(ocv_func, cache_dir)[0]
 
     @staticmethod
-    def build_docv_func(ocv_func):
+    def build_docv_func(ocv_func, cache_dir=None):
         """Returns the derivative of the open-circuit voltage with respect to state of charge."""
-        delta_soc = 0.001
-        soc = np.arange(0, 1 + delta_soc, delta_soc)
-        ocv = [ocv_func([s]).evaluate()[0, 0] for s in soc]  # evaluates pb.Interpolant
-        return derivative_interp1d(soc, ocv, delta_x=delta_soc)
-
-    def F(self, dt: float):
-        """State transition matrix (discrete-time)"""
-        f = [np.exp(-dt / (r * c)) for r, c in zip(self.rc_resistances, self.rc_capacitors)]
-        f = [1, *f]
-        return np.diag(f)
-
-    def B(self, dt: float):
-        """Input matrix (discrete-time)"""
-        b1 = -dt / (self.capacity * 3600.0)
-        b2 = [r * (1 - np.exp(-dt / (r * c))) for r, c in zip(self.rc_resistances, self.rc_capacitors)]
-        b = [b1, *b2]
-        return np.array(b)[:, np.newaxis]
-
-    def fx(self, x, current: float, dt: float):
-        """State transition function (discrete-time)"""
-        soc = x[0, 0]
-        v_rc = x[1:, 0]
-        soc_new = soc - current / (self.capacity * 3600.0) * dt
-        v_rc_new = [
-            v * np.exp(-dt / (r * c)) + current * r * (1 - np.exp(-dt / (r * c)))
-            for v, r, c in zip(v_rc, self.rc_resistances, self.rc_capacitors)
-        ]
-        return np.array([soc_new, *v_rc_new])[:, np.newaxis]
+        return IsothermalThevenin.build_ocv_tables(ocv_func, cache_dir)[1]
+
+    def _rc_parameters(self, dt):
+        """RC resistors and capacitors, shape (n_rc, 1) or (N, n_rc, 1), capacity and dt, shape (1, 1) or (N, 1, 1)"""
+        r = np.asarray(self.rc_resistances, dtype=float)[..., np.newaxis]
+        c = np.asarray(self.rc_capacitors, dtype=float)[..., np.newaxis]
+        capacity = np.asarray(self.capacity, dtype=float)[..., np.newaxis, np.newaxis]
+        dt = np.asarray(dt, dtype=float)[..., np.newaxis, np.newaxis]
+        return r, c, capacity, dt
+
+    def discretize(self, dt):
+        """Discrete-time state transition and input matrices for time step dt
+
+        With scalar parameters and time step, the matrices are computed once per time step and parameter set and then
+        served from an LRU cache, so repeated or recurring time steps cost a lookup. The returned arrays are then
+        read-only. With per-cell parameters or time steps, shape (N,), stacked matrices are returned.
+
+        Returns:
+            tuple: State transition matrix, shape (n, n) or (N, n, n), and input matrix, shape (n, 1) or (N, n, 1)
+        """
+        if not self.is_batched and np.ndim(dt) == 0:
+            return _discretize(float(dt), tuple(self.rc_resistances), tuple(self.rc_capacitors), float(self.capacity))
+
+        r, c, capacity, dt = self._rc_parameters(dt)
+        decay = np.exp(-dt / (r * c))
+        lead = np.broadcast_shapes(decay.shape[:-2], capacity.shape[:-2])  # (N,)
+        n = 1 + self.n_rc
+        diagonal = np.concatenate([np.ones((*lead, 1)), np.broadcast_to(decay[..., 0], (*lead, n - 1))], axis=-1)
+        F = np.zeros((*lead, n, n))
+        F[..., np.arange(n), np.arange(n)] = diagonal
+        B = np.concatenate(
+            [
+                np.broadcast_to(-dt / (capacity * 3600.0), (*lead, 1, 1)),
+                np.broadcast_to(r * (1 - decay), (*lead, n - 1, 1)),
+            ],
+            axis=-2,
+        )
+        return F, B
+
+    def F(self, dt):
+        """State transition matrix (discrete-time), a writable copy of the one from `discretize`"""
+        return self.discretize(dt)[0].copy()
+
+    def B(self, dt):
+        """Input matrix (discrete-time), a writable copy of the one from `discretize`"""
+        return self.discretize(dt)[1].copy()
+
+    def fx(self, x, current, dt):
+        """State transition function (discrete-time)
+
+        Accepts a single state, shape (n, 1), a matrix of state columns such as sigma points, shape (n, M),
+        or stacked states of N cells, shape (N, n, M), with per-cell current and time step, shape (N,).
+        """
+        current = np.asarray(current)[..., np.newaxis, np.newaxis]
+        if not self.is_batched and np.ndim(dt) == 0:
+            F, B = self.discretize(dt)
+            return F @ x + B * current
+
+        r, c, capacity, dt = self._rc_parameters(dt)
+        decay = np.exp(-dt / (r * c))
+        soc_new = x[..., :1, :] - current * dt / (capacity * 3600.0)
+        v_rc_new = x[..., 1:, :] * decay + current * r * (1 - decay)
+        return np.concatenate([soc_new, v_rc_new], axis=-2)
 
     def hx(self, x, current):
-        """Measurement function (voltage)"""
-        soc = x[0, 0]
-        v_rc = x[1:, 0]
-        voltage = self.ocv(soc) - np.sum(v_rc) - self.series_resistance * current
-        return np.array([[voltage]])
+        """Measurement function (voltage)
+
+        Accepts a single state, shape (n, 1), a matrix of state columns, shape (n, M), or stacked states of N cells,
+        shape (N, n, M), with per-cell current, shape (N,).
+        """
+        soc = x[..., 0, :]
+        v_rc = x[..., 1:, :]
+        current = np.asarray(current)[..., np.newaxis]
+        series_resistance = np.asarray(self.series_resistance)[..., np.newaxis]
+        voltage = self.ocv(soc) - np.sum(v_rc, axis=-2) - series_resistance * current
+        return voltage[..., np.newaxis, :]
 
     def h_jacobian(self, x):
-        """Jacobian of the measurement function (voltage)"""
-        soc = x[0, 0]
-        jac1 = self.docv(soc)
-        jac2 = [-1] * len(self.rc_resistances)
-        jac = [jac1, *jac2]
-        return np.array([jac])
+        """Jacobian of the measurement function (voltage)
+
+        Accepts a single state, shape (n, 1), or stacked states of N cells, shape (N, n, 1).
+        """
+        soc = x[..., 0, 0]
+        jac = np.full((*soc.shape, 1, 1 + self.n_rc), -1.0)
+        jac[..., 0, 0] = self.docv(soc)
+        return jac
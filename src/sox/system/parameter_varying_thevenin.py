@@ -0,0 +1,206 @@
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+
+from sox.system.isothermal_thevenin import IsothermalThevenin
+from sox.utils import RegularGridLookupTable
+
+
+class ParameterVaryingThevenin:
+    """Isothermal Thevenin battery dynamics model whose resistances and capacitances depend on temperature, current
+    and state of charge, as in the plant.
+
+    The parameters are evaluated per step from 3D lookup tables, at the state of charge of every state column and the
+    applied current, so sigma point and particle filters see the same parameter dependence as the plant. Tables are
+    given as `ParameterTable` objects, `(name, (axes, values))` tuples as returned by
+    `pybamm.parameters.process_3D_data_csv` or `RegularGridLookupTable` objects, with axes temperature (degC),
+    current (A) and state of charge.
+
+    Unlike `IsothermalThevenin`, the discrete-time matrices depend on the operating point, so `discretize`, `F`, `B`
+    and `h_jacobian` take the state of charge and current to evaluate the parameters at. Capacity and temperature may be given per
+    cell, shape (N,), to describe a fleet of N cells with one object.
+
+    Args:
+        ocv_func (Callable): Function that returns the open-circuit voltage as a function of state of charge.
+        series_resistance (ParameterTable, tuple or RegularGridLookupTable): Series resistance table (Ohm).
+        rc_resistors (list): List of RC resistor tables (Ohm).
+        rc_capacitors (list): List of RC capacitor tables (F).
+        capacity (float or array_like): Cell capacity (Ah).
+        temperature (float or array_like, optional): Cell temperature (degC). Defaults to 25.
+        cache_dir (str, optional): Directory of the on-disk OCV table cache, see `ocv_table`. Defaults to None.
+
+    Attributes:
+        ocv (UniformLookupTable): Open-circuit voltage as a function of state of charge.
+        docv (UniformLookupTable): Derivative of the open-circuit voltage with respect to state of charge.
+        series_resistance_table (RegularGridLookupTable): Series resistance table (Ohm).
+        rc_resistor_tables (list): List of RC resistor tables (Ohm).
+        rc_capacitor_tables (list): List of RC capacitor tables (F).
+        capacity (float or array_like): Cell capacity (Ah).
+        temperature (float or array_like): Cell temperature (degC).
+    """
+
+    soc_step = 1e-6  # half-width of the central difference of the series resistance over state of charge
+
+    def __init__(
+        self,
+        ocv_func: Callable,
+        series_resistance,
+        rc_resistors: List,
+        rc_capacitors: List,
+        capacity: Union[float, np.ndarray],
+        temperature: Union[float, np.ndarray] = 25.0,
+        cache_dir: Optional[str] = None,
+    ):
+        self.ocv, self.docv = IsothermalThevenin.build_ocv_tables(ocv_func, cache_dir)
+        self.series_resistance_table = self.build_lookup_table(series_resistance)
+        self.rc_resistor_tables = [self.build_lookup_table(table) for table in rc_resistors]
+        self.rc_capacitor_tables = [self.build_lookup_table(table) for table in rc_capacitors]
+        self.capacity = capacity
+        self.temperature = temperature
+        assert len(rc_resistors) == len(rc_capacitors)
+
+    @classmethod
+    def from_default_inputs(cls, temperature: float = 25.0, cache_dir: Optional[str] = None):
+        """Returns the estimator model of the default Thevenin plant, with the plant's parameter tables."""
+        from sox.plant.thevenin.default import inputs
+
+        return cls(
+            inputs.open_circuit_voltage,
+            inputs.r0_table,
+            [inputs.r1_table],
+            [inputs.c1_table],
+            inputs.default_inputs.capacity,
+            temperature=temperature,
+            cache_dir=cache_dir,
+        )
+
+    @staticmethod
+    def build_lookup_table(table):
+        """Returns a lookup table from a `(name, (axes, values))` tuple or a `ParameterTable`, or the table itself."""
+        if isinstance(table, RegularGridLookupTable):
+            return table
+        if isinstance(table, tuple):
+            _, (axes, values) = table
+        else:
+            axes, values = table.axes, table.values
+        return RegularGridLookupTable(axes, values)
+
+    @property
+    def n_rc(self) -> int:
+        """Number of RC pairs"""
+        return len(self.rc_resistor_tables)
+
+    @property
+    def is_batched(self) -> bool:
+        """Whether any parameter is given per cell"""
+        return np.ndim(self.capacity) > 0 or np.ndim(self.temperature) > 0
+
+    def parameters(self, soc, current, temperature=None):
+        """Series resistance, RC resistors and RC capacitors at the given state of charge and current
+
+        Args:
+            soc (array_like): State of charge, any shape S
+            current (array_like): Current (A), broadcastable to S
+            temperature (array_like, optional): Temperature (degC), broadcastable to S. Defaults to `temperature`.
+
+        Returns:
+            tuple: Series resistance, shape S, RC resistors and RC capacitors, shape (n_rc, *S)
+        """
+        if temperature is None:
+            temperature = self.temperature
+        r0 = self.series_resistance_table(temperature, current, soc)
+        shape = (self.n_rc, *np.shape(r0))
+        r = np.array([table(temperature, current, soc) for table in self.rc_resistor_tables]).reshape(shape)
+        c = np.array([table(temperature, current, soc) for table in self.rc_capacitor_tables]).reshape(shape)
+        return r0, r, c
+
+    def discretize(self, dt, soc, current):
+        """Discrete-time state transition and input matrices for time step dt, with the parameters frozen at an
+        operating point
+
+        The matrices are those of `IsothermalThevenin` with the RC resistors and capacitors at the operating point,
+        so `F @ x + B * current` equals `fx` there. F is not the Jacobian of `fx`: it has no column for the dependence
+        of the RC overpotentials on state of charge through the parameters, unlike `h_jacobian`, which includes the
+        slope of the series resistance.
+
+        Args:
+            dt (float or array_like): Time step (s), scalar or per cell, shape (N,)
+            soc (float or array_like): State of charge of the operating point, scalar or per cell, shape (N,)
+            current (float or array_like): Current of the operating point (A), scalar or per cell, shape (N,)
+
+        Returns:
+            tuple: State transition matrix, shape (n, n) or (N, n, n), and input matrix, shape (n, 1) or (N, n, 1)
+        """
+        dt = np.asarray(dt, dtype=float)
+        capacity = np.asarray(self.capacity, dtype=float)
+        _, r, c = self.parameters(np.asarray(soc, dtype=float), np.asarray(current, dtype=float))
+        r, c = np.moveaxis(r, 0, -1), np.moveaxis(c, 0, -1)  # (..., n_rc)
+        decay = np.exp(-dt[..., np.newaxis] / (r * c))
+        lead = np.broadcast_shapes(decay.shape[:-1], dt.shape, capacity.shape)
+        n = 1 + self.n_rc
+        F = np.zeros((*lead, n, n))
+        F[..., 0, 0] = 1.0
+        F[..., np.arange(1, n), np.arange(1, n)] = decay
+        B = np.empty((*lead, n, 1))
+        B[..., 0, 0] = -dt / (capacity * 3600.0)
+        B[..., 1:, 0] = r * (1 - decay)
+        return F, B
+
+    def F(self, dt, soc, current):
+        """State transition matrix (discrete-time) with the parameters frozen at an operating point, see `discretize`"""
+        return self.discretize(dt, soc, current)[0]
+
+    def B(self, dt, soc, current):
+        """Input matrix (discrete-time) with the parameters frozen at an operating point, see `discretize`"""
+        return self.discretize(dt, soc, current)[1]
+
+    def fx(self, x, current, dt):
+        """State transition function (discrete-time), with parameters at the state of charge of each state column
+
+        Accepts a single state, shape (n, 1), a matrix of state columns such as sigma points, shape (n, M),
+        or stacked states of N cells, shape (N, n, M), with per-cell current, time step, capacity and temperature,
+        shape (N,).
+        """
+        current = np.asarray(current, dtype=float)[..., np.newaxis]
+        dt = np.asarray(dt, dtype=float)[..., np.newaxis]
+        capacity = np.asarray(self.capacity, dtype=float)[..., np.newaxis]
+        temperature = np.asarray(self.temperature, dtype=float)[..., np.newaxis]
+        soc = x[..., 0, :]
+        _, r, c = self.parameters(soc, current, temperature)  # (n_rc, ..., M)
+        r, c = np.moveaxis(r, 0, -2), np.moveaxis(c, 0, -2)  # (..., n_rc, M)
+        decay = np.exp(-dt[..., np.newaxis] / (r * c))
+        soc_new = soc - current * dt / (capacity * 3600.0)
+        v_rc_new = x[..., 1:, :] * decay + current[..., np.newaxis] * r * (1 - decay)
+        return np.concatenate([soc_new[..., np.newaxis, :], v_rc_new], axis=-2)
+
+    def hx(self, x, current):
+        """Measurement function (voltage), with the series resistance at the state of charge of each state column
+
+        Accepts a single state, shape (n, 1), a matrix of state columns, shape (n, M), or stacked states of N cells,
+        shape (N, n, M), with per-cell current, shape (N,).
+        """
+        soc = x[..., 0, :]
+        v_rc = x[..., 1:, :]
+        current = np.asarray(current, dtype=float)[..., np.newaxis]
+        temperature = np.asarray(self.temperature, dtype=float)[..., np.newaxis]
+        series_resistance = self.series_resistance_table(temperature, current, soc)
+        voltage = self.ocv(soc) - np.sum(v_rc, axis=-2) - series_resistance * current
+        return voltage[..., np.newaxis, :]
+
+    def h_jacobian(self, x, current):
+        """Jacobian of the measurement function (voltage), including the slope of the series resistance over state of
+        charge, which is taken by a central difference of the table
+
+        Accepts a single state, shape (n, 1), or stacked states of N cells, shape (N, n, 1), with per-cell current,
+        shape (N,).
+        """
+        soc = x[..., 0, 0]
+        current = np.asarray(current, dtype=float)
+        temperature = np.asarray(self.temperature, dtype=float)
+        r0_up = self.series_resistance_table(temperature, current, soc + self.soc_step)
+        r0_down = self.series_resistance_table(temperature, current, soc - self.soc_step)
+        dr0 = (r0_up - r0_down) / (2 * self.soc_step)
+        docv = self.docv(soc) - dr0 * current
+        jac = np.full((*np.shape(docv), 1, 1 + self.n_rc), -1.0)
+        jac[..., 0, 0] = docv
+        return jac
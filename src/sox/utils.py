@@ -1,7 +1,7 @@
-import matplotlib.pyplot as plt
+import os
+from itertools import product
+
 import numpy as np
-from scipy.interpolate import interp1d
-from scipy.signal import savgol_filter
 
 colors = [
     "#1f77b4",
@@ -17,17 +17,240 @@ colors = [
 ]
 
 
+def default_cache_dir():
+    """Returns the directory of sox's on-disk caches: $SOX_CACHE_DIR if set, otherwise sox under the user cache."""
+    if os.environ.get("SOX_CACHE_DIR"):
+        return os.environ["SOX_CACHE_DIR"]
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "sox")
+
+
+def savgol_derivative(y, delta_x, deriv=1, window_length=5, polyorder=2):
+    """Calculates the derivative of evenly spaced samples using Savitzky-Golay filter."""
+    from scipy.signal import savgol_filter
+
+    smoothed_y = savgol_filter(y, window_length, polyorder, deriv=0)
+    return savgol_filter(smoothed_y, window_length, polyorder, deriv=deriv, delta=delta_x)
+
+
 def derivative_interp1d(x, y, deriv=1, window_length=5, polyorder=2, delta_x=None):
     """Calculates the derivative of a function using Savitzky-Golay filter and interpolation."""
+    from scipy.interpolate import interp1d
+
     if delta_x is None:
         assert np.unique(np.gradient(x)).size == 1, "x must be evenly spaced"
         delta_x = x[1] - x[0]
 
-    smoothed_y = savgol_filter(y, window_length, polyorder, deriv=0)
-    dy = savgol_filter(smoothed_y, window_length, polyorder, deriv=deriv, delta=delta_x)
+    dy = savgol_derivative(y, delta_x, deriv, window_length, polyorder)
     return interp1d(x, dy, kind="linear", fill_value="extrapolate")
 
 
+class UniformLookupTable:
+    """Piecewise linear lookup table on a uniform grid with linear extrapolation
+
+    Equivalent to `interp1d(x, y, kind="linear", fill_value="extrapolate")` for evenly spaced x, but the segment
+    is found arithmetically, so a lookup costs a few array operations for arrays and a few float operations for
+    scalars.
+
+    Args:
+        x0 (float): First grid point
+        dx (float): Grid spacing
+        y (array_like): Values at the grid points, shape (n,), n >= 2
+        data (array_like, optional): Storage of shape (2, n) to build the table in, e.g. a slice of a buffer
+            shared with other tables. Defaults to None (new storage).
+
+    Attributes:
+        x0 (float): First grid point
+        dx (float): Grid spacing
+        y (array_like): Values at the grid points, shape (n,)
+        slopes (array_like): Value increments to the next grid point, shape (n,), last entry is unused
+    """
+
+    def __init__(self, x0, dx, y, data=None):
+        y = np.asarray(y, dtype=float)
+        if y.ndim != 1 or y.size < 2:
+            raise ValueError(f"Expected y.shape = (n,) with n >= 2. Got y.shape = {y.shape} instead.")
+        if data is None:
+            data = np.empty((2, y.size))
+        data[0] = y
+        data[1, :-1] = np.diff(y)
+        data[1, -1] = 0.0
+
+        self.x0 = float(x0)
+        self.dx = float(dx)
+        self.y = data[0]
+        self.slopes = data[1]
+        self._inv_dx = 1.0 / self.dx
+        self._last = y.size - 2  # index of the last segment
+        self._y_list = self.y.tolist()  # scalar path avoids array indexing
+        self._slopes_list = self.slopes.tolist()
+
+    @classmethod
+    def from_grid(cls, x, *ys):
+        """Builds tables for several value arrays on the same evenly spaced grid x in one shared buffer
+
+        Args:
+            x (array_like): Evenly spaced grid, shape (n,)
+            *ys (array_like): Values at the grid points, shape (n,) each
+
+        Returns:
+            tuple: One `UniformLookupTable` per value array
+        """
+        x = np.asarray(x, dtype=float)
+        data = np.empty((len(ys), 2, x.size))
+        return tuple(cls(x[0], x[1] - x[0], y, data=data[i]) for i, y in enumerate(ys))
+
+    def __call__(self, x):
+        """Evaluates the table at x (scalar or array_like)"""
+        if isinstance(x, float):
+            u = (x - self.x0) * self._inv_dx
+            last = self._last
+            i = int(u) if 0.0 < u < last else (last if u >= last else 0)  # 0 for NaN, no int() of inf
+            return self._y_list[i] + (u - i) * self._slopes_list[i]
+
+        u = (np.asarray(x, dtype=float) - self.x0) * self._inv_dx
+        # fmax maps NaN to segment 0 as in the scalar path, truncation equals floor once u >= 0
+        i = np.minimum(np.fmax(u, 0), self._last).astype(np.intp)
+        return self.y.take(i) + (u - i) * self.slopes.take(i)
+
+
+class RegularGridLookupTable:
+    """Multilinear lookup table on a regular grid of evenly spaced axes with linear extrapolation
+
+    Equivalent to `scipy.interpolate.RegularGridInterpolator(axes, values, fill_value=None)` (and hence to a
+    `pybamm.Interpolant` with `extrapolate=True`) for evenly spaced axes, but cells are found arithmetically and the
+    corners are gathered from a flat array, so arrays of query points are evaluated with a few array operations and
+    scalar query points with a few float operations.
+
+    Args:
+        axes (list): Evenly spaced grid points of each dimension, shape (n_1,), ..., (n_d,), n_i >= 2
+        values (array_like): Values at the grid points, shape (n_1, ..., n_d)
+
+    Attributes:
+        axes (list): Grid points of each dimension
+        values (array_like): Values at the grid points, shape (n_1, ..., n_d)
+    """
+
+    def __init__(self, axes, values):
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.values = np.asarray(values, dtype=float)
+        if self.values.shape != tuple(axis.size for axis in self.axes) or min(self.values.shape) < 2:
+            raise ValueError(
+                f"Expected values.shape = {tuple(axis.size for axis in self.axes)} with at least 2 points per axis. "
+                f"Got values.shape = {self.values.shape} instead."
+            )
+        for axis in self.axes:
+            if not np.allclose(np.diff(axis), axis[1] - axis[0]):
+                raise ValueError("Grid axes must be evenly spaced.")
+
+        self._x0 = [float(axis[0]) for axis in self.axes]
+        self._inv_dx = [1.0 / float(axis[1] - axis[0]) for axis in self.axes]
+        self._last = [axis.size - 2 for axis in self.axes]  # index of the last cell along each axis
+        strides = np.cumprod((1, *self.values.shape[:0:-1]))[::-1]  # element strides of the C-ordered values
+        self._strides = strides.tolist()
+        corners = np.array(list(product((0, 1), repeat=self.values.ndim)))
+        self._offsets = corners @ strides  # flat offsets of the 2^d cell corners, C-ordered like the corners
+        self._flat = self.values.ravel()
+        self._offsets_list = self._offsets.tolist()  # scalar path avoids array indexing
+        self._flat_list = self._flat.tolist()
+        self._scalar_axes = list(zip(self._x0, self._inv_dx, self._last, self._strides))
+        self._lookup = self.scalar_function()
+
+    def __call__(self, *x):
+        """Evaluates the table at the query points x_1, ..., x_d (scalars or broadcastable arrays)"""
+        if all(type(xi) is float for xi in x):
+            return self._lookup(*x)
+
+        index = 0
+        fractions = []
+        for xi, x0, inv_dx, last, stride in zip(x, self._x0, self._inv_dx, self._last, self._strides):
+            u = (np.asarray(xi, dtype=float) - x0) * inv_dx
+            i = np.minimum(np.fmax(u, 0), last).astype(np.intp)  # NaN to cell 0 as in the scalar path
+            fractions.append(u - i)
+            index = index + i * stride
+
+        # gathers the cell corners at once, shape (..., 2, ..., 2), then interpolates along one axis at a time
+        v = self._flat.take(np.asarray(index)[..., np.newaxis] + self._offsets)
+        v = v.reshape(*v.shape[:-1], *(2,) * len(fractions))
+        for d in reversed(range(len(fractions))):
+            t = fractions[d][(...,) + (np.newaxis,) * d]  # aligns with the d corner axes still left
+            v = v[..., 0] + t * (v[..., 1] - v[..., 0])
+        return v
+
+    def scalar_function(self):
+        """Returns a function that evaluates the table at one query point given as d floats
+
+        The returned function skips the type checks of `__call__`, and it is unrolled for tables of up to three
+        dimensions, which makes a lookup cost about a microsecond.
+        """
+        flat = self._flat_list
+        (x0, inv0, last0, stride0), *rest = self._scalar_axes
+
+        if not rest:
+
+            def lookup1(x):
+                u = (x - x0) * inv0
+                i = int(u) if 0.0 < u < last0 else (last0 if u >= last0 else 0)  # 0 for NaN
+                a = flat[i]
+                return a + (u - i) * (flat[i + 1] - a)
+
+            return lookup1
+
+        if len(rest) == 1:
+            ((x1, inv1, last1, _),) = rest
+
+            def lookup2(x, y):
+                u, v = (x - x0) * inv0, (y - x1) * inv1
+                i = int(u) if 0.0 < u < last0 else (last0 if u >= last0 else 0)
+                j = int(v) if 0.0 < v < last1 else (last1 if v >= last1 else 0)
+                k = i * stride0 + j
+                t = v - j
+                a, b = flat[k], flat[k + stride0]
+                a += t * (flat[k + 1] - a)
+                b += t * (flat[k + stride0 + 1] - b)
+                return a + (u - i) * (b - a)
+
+            return lookup2
+
+        if len(rest) == 2:
+            (x1, inv1, last1, stride1), (x2, inv2, last2, _) = rest
+
+            def lookup3(x, y, z):
+                u, v, w = (x - x0) * inv0, (y - x1) * inv1, (z - x2) * inv2
+                i = int(u) if 0.0 < u < last0 else (last0 if u >= last0 else 0)
+                j = int(v) if 0.0 < v < last1 else (last1 if v >= last1 else 0)
+                k = int(w) if 0.0 < w < last2 else (last2 if w >= last2 else 0)
+                t = w - k
+                k += i * stride0 + j * stride1
+                a, b = flat[k], flat[k + stride1]
+                c, d = flat[k + stride0], flat[k + stride0 + stride1]
+                a += t * (flat[k + 1] - a)
+                b += t * (flat[k + stride1 + 1] - b)
+                c += t * (flat[k + stride0 + 1] - c)
+                d += t * (flat[k + stride0 + stride1 + 1] - d)
+                t = v - j
+                a += t * (b - a)
+                c += t * (d - c)
+                return a + (u - i) * (c - a)
+
+            return lookup3
+
+        def lookup_n(*x):
+            index = 0
+            fractions = []
+            for xi, (x0, inv_dx, last, stride) in zip(x, self._scalar_axes):
+                u = (xi - x0) * inv_dx
+                i = int(u) if 0.0 < u < last else (last if u >= last else 0)
+                fractions.append(u - i)
+                index += i * stride
+
+            v = [flat[index + offset] for offset in self._offsets_list]
+            for t in reversed(fractions):  # the last axis varies fastest among the C-ordered corners
+                v = [a + t * (b - a) for a, b in zip(v[::2], v[1::2])]
+            return v[0]
+
+        return lookup_n
+
+
 def quick_plot(time: list, data: list, legends=None, x_labels=None, y_labels=None, titles=None, n_cols=2):
     """Plots a list of data series
 
@@ -40,6 +263,7 @@ def quick_plot(time: list, data: list, legends=None, x_labels=None, y_labels=Non
         titles (list): List of subplot titles.
         n_cols (int): Number of columns in the figure.
     """
+    import matplotlib.pyplot as plt
 
     # validate input parameters
     if len(time) != 1 and len(time) != len(data):
@@ -131,3 +355,16 @@ def handle_matrix(x):
         return np.diag(x)
     else:
         return x
+
+
+def handle_batch_vector(x, n_batch):
+    """Converts a scalar, per-batch scalars or stacked vectors to stacked column vectors of shape (N, k, 1)."""
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 0:  # e.g. x = 1
+        return np.full((n_batch, 1, 1), x)
+    elif x.ndim == 1:  # e.g. x = np.array([1, 2, 3]), one scalar per batch element
+        return x[:, np.newaxis, np.newaxis]
+    elif x.ndim == 2:  # e.g. x = np.array([[1, 2], [3, 4]]), one row vector per batch element
+        return x[:, :, np.newaxis]
+    else:
+        return x
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def sox_cache_dir(tmp_path_factory):
+    """Points sox's on-disk caches at a temporary directory, so the test suite writes nothing under $HOME."""
+    monkeypatch = pytest.MonkeyPatch()
+    cache_dir = tmp_path_factory.mktemp("sox_cache")
+    monkeypatch.setenv("SOX_CACHE_DIR", str(cache_dir))
+    yield cache_dir
+    monkeypatch.undo()
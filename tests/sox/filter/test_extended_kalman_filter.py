@@ -1,6 +1,6 @@
 import numpy as np
 import pytest
-from sox.filter import ExtendedKalmanFilter
+from sox.filter import BatchExtendedKalmanFilter, ExtendedKalmanFilter
 
 
 @pytest.fixture
@@ -57,3 +57,58 @@ def test_ekf_update(ekf, ekf_parameters):
 
     assert np.allclose(ekf.x, x)
     assert np.allclose(ekf.P, P)
+
+
+def test_batch_ekf_matches_single_ekfs(ekf_parameters):
+    F, B, Q, R, x0, P0 = ekf_parameters
+    n_batch = 4
+    scales = np.arange(1, n_batch + 1)
+    x0s = np.stack([x0 * s for s in scales])  # shape (N, n, 1)
+    Rs = np.stack([np.diag(R[:, 0]) * s for s in scales])  # per-system R, shape (N, k, k)
+    batch = BatchExtendedKalmanFilter(F, B, Q, Rs, x0s, P0)
+    singles = [ExtendedKalmanFilter(F, B, Q, Rs[i], x0s[i], P0) for i in range(n_batch)]
+
+    def batch_hx(state, arg):
+        return np.stack([hx(s, a) for s, a in zip(state, arg)])
+
+    def batch_h_jacobian(state, arg):
+        return np.stack([h_jacobian(s, a) for s, a in zip(state, arg)])
+
+    u = np.array([1.0, -1.0, 0.5, 2.0])
+    z = np.array([[1.0, 0.0], [0.5, 0.2], [0.1, 0.3], [2.0, 1.0]])
+    args = 0.1 * scales
+    for _ in range(3):
+        batch.predict(u)
+        batch.update(z, batch_hx, batch_h_jacobian, hx_args=(args,), hj_args=(args,))
+        for i, single in enumerate(singles):
+            single.predict(np.array([u[i]]))
+            single.update(z[i], hx, h_jacobian, hx_args=args[i], hj_args=args[i])
+
+    assert np.allclose(batch.x, np.stack([single.x for single in singles]))
+    assert np.allclose(batch.P, np.stack([single.P for single in singles]))
+
+
+def test_inplace_ekf_matches_default(ekf_parameters):
+    ekf = ExtendedKalmanFilter(*ekf_parameters)
+    inplace_ekf = ExtendedKalmanFilter(*ekf_parameters, inplace=True)
+    x, P = inplace_ekf.x, inplace_ekf.P
+    for u, z in [(1.0, np.array([[1], [0]])), (-0.5, np.array([[0.5], [0.2]])), (2.0, np.array([[2], [1]]))]:
+        for f in (ekf, inplace_ekf):
+            f.predict(u)
+            f.update(z, hx, h_jacobian, hx_args=0.1, hj_args=0.2)
+
+    assert np.allclose(ekf.x, inplace_ekf.x)
+    assert np.allclose(ekf.P, inplace_ekf.P)
+    assert inplace_ekf.x is x and inplace_ekf.P is P  # buffers are reused
+
+    inplace_ekf.reset()
+    assert np.allclose(inplace_ekf.x, ekf_parameters[4])
+    assert np.allclose(inplace_ekf.P, ekf_parameters[5])
+
+
+def test_inplace_ekf_rejects_scalar_input_for_multiple_inputs(ekf_parameters):
+    F, B, Q, R, x0, P0 = ekf_parameters
+    inplace_ekf = ExtendedKalmanFilter(F, np.hstack([B, B]), Q, R, x0, P0, inplace=True)
+    inplace_ekf.predict(np.array([1.0, -1.0]))
+    with pytest.raises(ValueError):
+        inplace_ekf.predict(1.0)
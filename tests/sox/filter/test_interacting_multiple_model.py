@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from sox.filter import ExtendedKalmanFilter, InteractingMultipleModel
+
+SEED = 123
+
+
+@pytest.fixture
+def model():
+    F = np.array([[1.0, 0.1], [0.0, 0.9]])  # state transition matrix
+    B = np.array([[0.1], [0.5]])  # control input matrix
+    Q = np.diag([1e-4, 1e-4])  # process noise covariance
+    H = np.array([[1.0, 1.0]])  # measurement matrix
+    return F, B, Q, H
+
+
+def batch_hx(H):
+    return lambda x: H @ x
+
+
+def batch_h_jacobian(H):
+    return lambda x: np.broadcast_to(H, (x.shape[0], *H.shape))
+
+
+def test_identical_hypotheses_match_ekf(model):
+    F, B, Q, H = model
+    R, x0, P0 = np.array([[0.1]]), np.array([1.0, 0.0]), np.diag([0.5, 0.5])
+    ekf = ExtendedKalmanFilter(F, B, Q, R, x0, P0)
+    imm = InteractingMultipleModel(F, B, Q, R, x0, P0, transition=[[0.9, 0.1], [0.1, 0.9]])
+    for u, z in [(1.0, 1.2), (0.0, 1.1), (-1.0, 0.7)]:
+        ekf.predict(u)
+        ekf.update(z, lambda x: H @ x, lambda x: H)
+        imm.predict(u)
+        imm.update(z, batch_hx(H), batch_h_jacobian(H))
+
+    assert np.allclose(imm.x, ekf.x)
+    assert np.allclose(imm.P, ekf.P)
+    assert np.allclose(imm.mu, [0.5, 0.5])
+
+
+def test_imm_detects_measurement_offset(model):
+    F, B, Q, H = model
+    np.random.seed(SEED)
+    offsets = np.array([0.0, 0.5])  # hypotheses: healthy and offset sensor
+
+    def hx(x):
+        return H @ x + offsets[:, np.newaxis, np.newaxis]
+
+    imm = InteractingMultipleModel(
+        F, B, Q, R=0.01, x0=np.zeros(2), P0=np.diag([0.01, 0.01]), transition=[[0.98, 0.02], [0.02, 0.98]]
+    )
+    x = np.zeros((2, 1))
+    probabilities = []
+    for k in range(200):
+        u = np.sin(k / 10)
+        x = F @ x + B * u
+        z = (H @ x)[0, 0] + (0.5 if k >= 100 else 0.0) + np.random.normal(0, 0.1)
+        imm.predict(u)
+        imm.update(z, hx, batch_h_jacobian(H))
+        probabilities.append(imm.mu)
+
+    probabilities = np.array(probabilities)
+    assert np.all(np.isclose(probabilities.sum(axis=1), 1.0))
+    assert probabilities[80:100, 0].mean() > 0.9
+    assert probabilities[180:, 1].mean() > 0.9
+
+
+def test_imm_validates_transition(model):
+    F, B, Q, _ = model
+    with pytest.raises(ValueError):
+        InteractingMultipleModel(F, B, Q, 0.1, np.zeros(2), np.eye(2), transition=[[0.5, 0.4], [0.1, 0.9]])
+
+
+def test_imm_accepts_per_hypothesis_initial_states(model):
+    F, B, Q, _ = model
+    transition = [[0.9, 0.1], [0.1, 0.9]]
+    x0 = np.array([[1.0, 0.0], [0.5, 0.2]])
+    imm = InteractingMultipleModel(F, B, Q, 0.1, x0, np.eye(2), transition=transition)
+    assert np.allclose(imm.bank.x[:, :, 0], x0)
+
+    with pytest.raises(ValueError):
+        InteractingMultipleModel(F, B, Q, 0.1, np.zeros((3, 2)), np.eye(2), transition=transition)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sox.filter import ExtendedKalmanFilter, ParticleFilter, stratified_resample, systematic_resample
+
+SEED = 123
+
+
+@pytest.mark.parametrize("resample", [systematic_resample, stratified_resample])
+def test_resampling(resample):
+    np.random.seed(SEED)
+    weights = np.array([0.1, 0.0, 0.6, 0.3])
+    indices = np.concatenate([resample(weights) for _ in range(2000)])
+    frequency = np.bincount(indices, minlength=weights.size) / indices.size
+
+    assert indices.size == 2000 * weights.size
+    assert np.allclose(frequency, weights, atol=0.01)
+
+
+def test_systematic_resampling_of_uniform_weights_keeps_every_particle():
+    np.random.seed(SEED)
+    assert np.array_equal(systematic_resample(np.full(5, 0.2)), np.arange(5))
+
+
+@pytest.mark.parametrize("resampling", ["systematic", "stratified"])
+def test_particle_filter_matches_kalman_filter_on_linear_model(resampling):
+    F = np.array([[1.0, 0.1], [0.0, 0.9]])
+    Q = np.diag([1e-3, 1e-3])
+    R = np.array([[0.05]])
+    x0 = np.array([1.0, 0.5])
+    P0 = np.diag([0.5, 0.2])
+    H = np.array([[1.0, 1.0]])
+
+    kf = ExtendedKalmanFilter(F, np.zeros((2, 1)), Q, R, x0, P0)
+    pf = ParticleFilter(Q, R, x0, P0, n_particles=50000, resampling=resampling, random_seed=SEED)
+    for z in [1.6, 1.4, 1.5, 1.2, 1.3]:
+        kf.predict(0.0)
+        kf.update(z, lambda x: H @ x, lambda x: H)
+        pf.predict(lambda x: F @ x)
+        pf.update(z, lambda x: H @ x)
+
+    assert np.allclose(pf.x, kf.x, atol=0.02)
+    assert np.allclose(pf.P, kf.P, atol=0.01)
+    assert pf.weights.shape == (50000,)
+    assert np.isclose(pf.weights.sum(), 1.0)
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from sox.filter import ExtendedKalmanFilter, MerweSigmaPoints, UnscentedKalmanFilter, run
+from sox.plant import default_thevenin_inputs
+from sox.sensor import Sensor
+from sox.system import IsothermalThevenin
+
+dt = 1.0
+
+
+@pytest.fixture(scope="module")
+def system():
+    return IsothermalThevenin(
+        ocv_func=default_thevenin_inputs.open_circuit_voltage,
+        series_resistance=4e-3,
+        rc_resistors=[7e-3],
+        rc_capacitors=[8e3],
+        capacity=10,
+    )
+
+
+@pytest.fixture
+def profile():
+    time = np.arange(0, 200, dt)  # s
+    current = np.where(time % 40 < 20, 10.0, -5.0)  # A
+    voltage = 3.7 - 0.004 * current + 0.001 * np.sin(time / 10)  # V
+    return time, current, voltage
+
+
+def build_ekf(system):
+    return ExtendedKalmanFilter(
+        F=system.F(dt),
+        B=system.B(dt),
+        Q=np.diag([0.01**2, 0.1**2]),
+        R=1e-5,
+        x0=np.array([0.75, 0.0]),
+        P0=np.diag([1e-5, 1]),
+    )
+
+
+def build_ukf(system):
+    return UnscentedKalmanFilter(
+        Q=np.diag([0.01**2, 0.1**2]),
+        R=1e-5,
+        x0=np.array([0.75, 0.0]),
+        P0=np.diag([1e-5, 1]),
+        sigma_gen=MerweSigmaPoints(n=2, alpha=1e-2, beta=2.0, kappa=0.0),
+    )
+
+
+def test_run_ekf_matches_loop(system, profile):
+    time, current, voltage = profile
+    ekf = build_ekf(system)
+    soc, innovations = [], []
+    for i, v in zip(current, voltage):
+        ekf.predict(u=i)
+        ekf.update(z=v, hx=system.hx, hx_args=i, h_jacobian=system.h_jacobian)
+        soc.append(ekf.x[0, 0])
+        innovations.append(ekf.y[0, 0])
+
+    ekf.reset()
+    estimates = run(ekf, system, Sensor("current", time, current), Sensor("voltage", time, voltage))
+
+    assert estimates.states.shape == (len(time), 2)
+    assert np.allclose(estimates.states[:, 0], soc)
+    assert np.allclose(estimates.innovations[:, 0], innovations)
+    assert np.allclose(estimates.predicted_measurements[:, 0], voltage - np.array(innovations))
+
+
+def test_run_restores_ekf_matrices(system, profile):
+    time, current, voltage = profile
+    ekf = build_ekf(system)
+    F, B = ekf.F, ekf.B
+    for sampling_time in (2.0, np.full(time.size, 2.0)):
+        run(ekf, system, current, voltage, dt=sampling_time)
+        assert ekf.F is F and ekf.B is B
+
+
+def test_run_ukf_matches_loop(system, profile):
+    time, current, voltage = profile
+    ukf = build_ukf(system)
+    soc, soc_var = [], []
+    for i, v in zip(current, voltage):
+        ukf.predict(fx=system.fx, fx_args=(i, dt))
+        ukf.update(z=v, hx=system.hx, hx_args=i)
+        soc.append(ukf.x[0, 0])
+        soc_var.append(ukf.P[0, 0])
+
+    ukf.reset()
+    estimates = run(ukf, system, current, voltage, dt=dt)
+
+    assert np.allclose(estimates.states[:, 0], soc)
+    assert np.allclose(estimates.covariance_diagonal[:, 0], soc_var)
+
+
+def test_run_validates_inputs(system, profile):
+    _, current, voltage = profile
+    with pytest.raises(ValueError):
+        run(build_ukf(system), system, current, voltage)
+    with pytest.raises(ValueError):
+        run(build_ekf(system), system, current, voltage[:-1])
+    with pytest.raises(TypeError):
+        run(object(), system, current, voltage)
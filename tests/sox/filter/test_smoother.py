@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from sox.filter import (
+    ExtendedKalmanFilter,
+    ExtendedRTSSmoother,
+    MerweSigmaPoints,
+    RTSSmoother,
+    UnscentedKalmanFilter,
+    UnscentedRTSSmoother,
+    run,
+)
+from sox.plant import default_thevenin_inputs
+from sox.system import IsothermalThevenin
+
+dt = 1.0
+SEED = 123
+
+
+@pytest.fixture(scope="module")
+def system():
+    return IsothermalThevenin(default_thevenin_inputs.open_circuit_voltage, 4e-3, [7e-3], [8e3], 10)
+
+
+@pytest.fixture(scope="module")
+def measurements(system):
+    rng = np.random.default_rng(SEED)
+    time = np.arange(0, 1200, dt)  # s
+    current = np.where(time % 120 < 60, 20.0, -10.0)  # A
+    states = np.zeros((time.size, 2))
+    voltage = np.zeros(time.size)
+    x = np.array([[0.7], [0.0]])
+    for k, i in enumerate(current):
+        x = system.fx(x, i, dt)
+        states[k] = x[:, 0]
+        voltage[k] = system.hx(x, i)[0, 0] + rng.normal(0, 2e-3)
+    return current, voltage, states
+
+
+def build_ekf(system):
+    return ExtendedKalmanFilter(
+        F=system.F(dt),
+        B=system.B(dt),
+        Q=np.diag([1e-8, 1e-6]),
+        R=4e-6,
+        x0=np.array([0.6, 0.0]),
+        P0=np.diag([1e-2, 1e-4]),
+    )
+
+
+def build_ukf(system):
+    return UnscentedKalmanFilter(
+        Q=np.diag([1e-8, 1e-6]),
+        R=4e-6,
+        x0=np.array([0.6, 0.0]),
+        P0=np.diag([1e-2, 1e-4]),
+        sigma_gen=MerweSigmaPoints(n=2, alpha=0.1, beta=2.0, kappa=0.0),
+        vectorized=True,
+    )
+
+
+@pytest.mark.parametrize("smoother_cls, build", [(ExtendedRTSSmoother, build_ekf), (UnscentedRTSSmoother, build_ukf)])
+def test_rts_smoother(system, measurements, smoother_cls, build):
+    current, voltage, states = measurements
+    estimates = smoother_cls(build(system), system).smooth(current, voltage, dt=dt)
+    filtered = run(build(system), system, current, voltage, dt=dt)
+
+    assert np.allclose(estimates.filtered_states, filtered.states)
+    assert np.allclose(estimates.states[-1], filtered.states[-1])
+    assert np.all(estimates.covariance_diagonal <= estimates.filtered_covariance_diagonal + 1e-12)
+
+    smoothed_error = np.sqrt(np.mean((estimates.states[:, 0] - states[:, 0]) ** 2))
+    filtered_error = np.sqrt(np.mean((estimates.filtered_states[:, 0] - states[:, 0]) ** 2))
+    assert smoothed_error < filtered_error
+
+
+def test_fixed_lag_smoother_matches_full_smoother(system, measurements):
+    current, voltage, _ = measurements
+    full = ExtendedRTSSmoother(build_ekf(system), system).smooth(current, voltage)
+    fixed_lag = ExtendedRTSSmoother(build_ekf(system), system, lag=300, chunk_size=100).smooth(current, voltage)
+
+    assert np.allclose(fixed_lag.filtered_states, full.filtered_states)
+    assert np.allclose(fixed_lag.states, full.states, atol=5e-4)
+    assert np.allclose(fixed_lag.states[-300:], full.states[-300:])
+
+
+def test_smoother_handles_empty_record(system):
+    estimates = ExtendedRTSSmoother(build_ekf(system), system).smooth(np.array([]), np.array([]))
+    assert estimates.states.shape == (0, 2) and estimates.innovations.shape == (0, 1)
+
+
+def test_smoother_restores_ekf_matrices(system, measurements):
+    current, voltage, _ = measurements
+    ekf = build_ekf(system)
+    F, B = ekf.F, ekf.B
+    ExtendedRTSSmoother(ekf, system).smooth(current[:50], voltage[:50], dt=np.full(50, 2.0))
+    assert ekf.F is F and ekf.B is B
+
+
+def test_rts_smoother_is_abstract(system):
+    with pytest.raises(TypeError):
+        RTSSmoother(build_ekf(system), system)
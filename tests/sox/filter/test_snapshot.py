@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from sox.filter import (
+    BatchExtendedKalmanFilter,
+    CoulombCount,
+    ExtendedKalmanFilter,
+    MerweSigmaPoints,
+    ParticleFilter,
+    SquareRootUnscentedKalmanFilter,
+    TheveninUnscentedKalmanFilter,
+    UnscentedKalmanFilter,
+    load_snapshots,
+    restore,
+    save_snapshots,
+    snapshot,
+)
+from sox.plant import default_thevenin_inputs
+from sox.system import IsothermalThevenin
+
+Q = np.diag([0.1, 0.2])
+x0 = np.array([1.0, 0.5])
+P0 = np.diag([1.0, 0.5])
+
+
+def fx(state, u):  # state transition function, works on (n, 1) and (n, M)
+    return np.vstack([state[0] + 0.1 * np.sin(state[1]) + u, 0.9 * state[1]])
+
+
+def hx(state):  # measurement function, works on (n, 1) and (n, M)
+    return (state[0] ** 2 + state[1])[np.newaxis, :]
+
+
+def build_filters():
+    F, B = np.array([[1.0, 0.1], [0.0, 0.9]]), np.array([[0.1], [0.5]])
+    return [
+        ExtendedKalmanFilter(F, B, Q, 0.5, x0, P0),
+        ExtendedKalmanFilter(F, B, Q, 0.5, x0, P0, inplace=True),
+        UnscentedKalmanFilter(Q, 0.5, x0, P0, MerweSigmaPoints(2, alpha=0.5, beta=2.0, kappa=0.0)),
+        SquareRootUnscentedKalmanFilter(Q, 0.5, x0, P0, MerweSigmaPoints(2, alpha=0.5, beta=2.0, kappa=0.0)),
+        BatchExtendedKalmanFilter(F, B, Q, 0.5, np.stack([x0, 2 * x0]), P0),
+        CoulombCount(initial_soc=0.8, capacity=10, sampling_time=1),
+    ]
+
+
+def step(filters):
+    ekf, inplace_ekf, ukf, srukf, batch, cc = filters
+    for f in (ekf, inplace_ekf):
+        f.predict(1.0)
+        f.update(1.5, lambda x: np.array([[x[0, 0] ** 2]]), lambda x: np.array([[2 * x[0, 0], 0.0]]))
+    for f in (ukf, srukf):
+        f.predict(fx, 0.1)
+        f.update(1.5, hx)
+    batch.predict(1.0)
+    batch.update([1.5, 2.5], lambda x: x[:, :1] ** 2, lambda x: np.concatenate([2 * x[:, :1], 0 * x[:, :1]], axis=2))
+    cc.predict(5.0)
+
+
+def assert_same_state(filters, others):
+    for f, g in zip(filters, others):
+        if isinstance(f, CoulombCount):
+            assert f.soc == g.soc
+        else:
+            assert np.allclose(f.x, g.x)
+            assert np.allclose(f.P, g.P)
+
+
+def test_snapshot_restore_round_trip():
+    filters = build_filters()
+    step(filters)
+    records = snapshot(filters)
+    assert records.shape == (7,)  # the batched filter contributes one record per cell
+
+    restored = build_filters()
+    restore(restored, records)
+    assert_same_state(filters, restored)
+
+    # restored filters continue exactly like the originals
+    step(filters)
+    step(restored)
+    assert_same_state(filters, restored)
+
+
+def test_save_and_load_snapshots(tmp_path):
+    filters = build_filters()
+    step(filters)
+    path = tmp_path / "fleet.npy"
+    save_snapshots(path, filters)
+
+    restored = build_filters()
+    records = load_snapshots(path, restored)
+    assert isinstance(records, np.memmap)
+    assert np.allclose(records["sigma"][2], [0.5, 2.0, 0.0])
+    assert_same_state(filters, restored)
+
+
+def test_restore_validates_records():
+    records = snapshot(build_filters())
+    with pytest.raises(ValueError):
+        restore(build_filters()[:2], records)
+
+
+def test_restore_copies_shared_sigma_point_generator():
+    sigma_gen = MerweSigmaPoints(2, alpha=0.5, beta=2.0, kappa=0.0)
+    system = IsothermalThevenin(default_thevenin_inputs.open_circuit_voltage, 4e-3, [7e-3], [8e3], 10)
+    fast_ukf = TheveninUnscentedKalmanFilter(system, 1.0, Q, 1e-5, np.array([0.5, 0.0]), P0, sigma_gen)
+    other = UnscentedKalmanFilter(Q, 0.5, x0, P0, sigma_gen)
+    records = snapshot(
+        TheveninUnscentedKalmanFilter(
+            system, 1.0, Q, 1e-5, np.array([0.5, 0.0]), P0, MerweSigmaPoints(2, 0.1, 2.0, 1.0)
+        )
+    )
+
+    restore(fast_ukf, records)
+    assert (fast_ukf.sigma_gen.alpha, fast_ukf.sigma_gen.kappa) == (0.1, 1.0)
+    assert other.sigma_gen is sigma_gen and sigma_gen.alpha == 0.5
+    expected = TheveninUnscentedKalmanFilter(
+        system, 1.0, Q, 1e-5, np.array([0.5, 0.0]), P0, MerweSigmaPoints(2, 0.1, 2.0, 1.0)
+    )
+    assert np.allclose(fast_ukf.sigmas_f, expected.sigmas_f)  # the sigma point scale follows the configuration
+
+
+def test_snapshot_rejects_unsupported_filters():
+    particle_filter = ParticleFilter(Q, 0.5, x0, P0, n_particles=10)
+    with pytest.raises(TypeError):
+        snapshot([build_filters()[0], particle_filter])
+    filters = build_filters()[:1]
+    records = snapshot(filters * 2)
+    with pytest.raises(TypeError):
+        restore([filters[0], particle_filter], records)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sox.filter import MerweSigmaPoints, SquareRootUnscentedKalmanFilter, UnscentedKalmanFilter, cholupdate
+
+
+def fx(state, u):  # state transition function, works on (n, 1) and (n, M)
+    return np.vstack([state[0] + 0.1 * np.sin(state[1]) + u, 0.9 * state[1]])
+
+
+def hx(state):  # measurement function, works on (n, 1) and (n, M)
+    return (state[0] ** 2 + state[1])[np.newaxis, :]
+
+
+@pytest.mark.parametrize("sign", [1.0, -1.0])
+def test_cholupdate(sign):
+    A = np.array([[4.0, 1.0, 0.5], [1.0, 3.0, 0.2], [0.5, 0.2, 2.0]])
+    v = np.array([0.3, -0.2, 0.1])
+    L = cholupdate(np.linalg.cholesky(A), v, sign)
+
+    assert np.allclose(L @ L.T, A + sign * np.outer(v, v))
+    assert np.allclose(L, np.tril(L))
+
+
+def test_cholupdate_raises_when_not_positive_definite():
+    with pytest.raises(np.linalg.LinAlgError):
+        cholupdate(np.eye(2), np.array([2.0, 0.0]), -1.0)
+
+
+@pytest.mark.parametrize("alpha", [1.0, 0.5])
+def test_srukf_matches_ukf(alpha):
+    parameters = dict(Q=np.diag([0.1, 0.1]), R=0.5, x0=np.array([1.0, 0.5]), P0=np.diag([1.0, 0.5]))
+    ukf = UnscentedKalmanFilter(**parameters, sigma_gen=MerweSigmaPoints(n=2, alpha=alpha, beta=2.0, kappa=0.0))
+    srukf = SquareRootUnscentedKalmanFilter(
+        **parameters, sigma_gen=MerweSigmaPoints(n=2, alpha=alpha, beta=2.0, kappa=0.0), vectorized=True
+    )
+    for z in [1.2, 0.8, 1.5, 1.1]:
+        for f in (ukf, srukf):
+            f.predict(fx, fx_args=0.1)
+            f.update(z, hx)
+
+    assert np.allclose(ukf.x, srukf.x)
+    assert np.allclose(ukf.P, srukf.P)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from sox.filter import (
+    ExtendedKalmanFilter,
+    MerweSigmaPoints,
+    TheveninExtendedKalmanFilter,
+    TheveninUnscentedKalmanFilter,
+    UnscentedKalmanFilter,
+    run,
+)
+from sox.plant import default_thevenin_inputs
+from sox.system import IsothermalThevenin
+
+dt = 1.0
+
+
+@pytest.fixture(scope="module", params=[1, 2], ids=["1rc", "2rc"])
+def system(request):
+    rc_resistors, rc_capacitors = [7e-3, 2e-3][: request.param], [8e3, 5e2][: request.param]
+    return IsothermalThevenin(default_thevenin_inputs.open_circuit_voltage, 4e-3, rc_resistors, rc_capacitors, 10)
+
+
+@pytest.fixture
+def parameters(system):
+    n = 1 + system.n_rc
+    Q = np.diag([1e-4] + [1e-2] * (n - 1))
+    Q[0, 1] = Q[1, 0] = 1e-5
+    return dict(Q=Q, R=1e-5, x0=np.array([0.75] + [0.0] * (n - 1)), P0=np.diag([1e-3] + [1.0] * (n - 1)))
+
+
+@pytest.fixture
+def profile():
+    time = np.arange(0, 300, dt)  # s
+    current = np.where(time % 40 < 20, 10.0, -5.0)  # A
+    voltage = 3.7 - 0.004 * current + 0.001 * np.sin(time / 10)  # V
+    return current, voltage
+
+
+def test_thevenin_ekf_matches_ekf(system, parameters, profile):
+    ekf = ExtendedKalmanFilter(F=system.F(dt), B=system.B(dt), **parameters)
+    fast_ekf = TheveninExtendedKalmanFilter(system, dt, **parameters)
+    expected = run(ekf, system, *profile)
+    estimates = run(fast_ekf, system, *profile)
+
+    assert np.allclose(estimates.states, expected.states)
+    assert np.allclose(estimates.covariance_diagonal, expected.covariance_diagonal)
+    assert np.allclose(estimates.innovations, expected.innovations)
+    assert np.allclose(fast_ekf.P, ekf.P)
+
+
+def test_thevenin_ukf_matches_ukf(system, parameters, profile):
+    n = parameters["x0"].size
+    ukf = UnscentedKalmanFilter(**parameters, sigma_gen=MerweSigmaPoints(n, alpha=0.1, beta=2.0, kappa=0.0))
+    fast_ukf = TheveninUnscentedKalmanFilter(
+        system, dt, **parameters, sigma_gen=MerweSigmaPoints(n, alpha=0.1, beta=2.0, kappa=0.0)
+    )
+    expected = run(ukf, system, *profile, dt=dt)
+    estimates = run(fast_ukf, system, *profile)
+
+    assert np.allclose(estimates.states, expected.states)
+    assert np.allclose(estimates.covariance_diagonal, expected.covariance_diagonal)
+    assert np.allclose(fast_ukf.P, ukf.P)
+
+
+def test_thevenin_filters_reject_unsupported_models(parameters):
+    system = IsothermalThevenin(default_thevenin_inputs.open_circuit_voltage, 4e-3, [1e-3] * 3, [1e3] * 3, 10)
+    with pytest.raises(ValueError):
+        TheveninExtendedKalmanFilter(system, dt, **parameters)
+    with pytest.raises(ValueError):
+        TheveninUnscentedKalmanFilter(
+            system, dt, **parameters, sigma_gen=MerweSigmaPoints(4, alpha=0.1, beta=2.0, kappa=0.0)
+        )
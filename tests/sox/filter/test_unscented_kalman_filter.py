@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from sox.filter import MerweSigmaPoints, UnscentedKalmanFilter, unscented_transform
+
+
+@pytest.fixture
+def ukf_parameters():
+    Q = np.diag([0.1, 0.1])  # process noise covariance
+    R = np.array([[0.5]])  # measurement noise covariance
+    x0 = np.array([[1.0], [0.5]])  # initial state estimate
+    P0 = np.diag([1.0, 0.5])  # initial error covariance
+    return Q, R, x0, P0
+
+
+def fx(state, u):  # state transition function, works on (n, 1) and (n, M)
+    return np.vstack([state[0] + 0.1 * np.sin(state[1]) + u, 0.9 * state[1]])
+
+
+def hx(state):  # measurement function, works on (n, 1) and (n, M)
+    return (state[0] ** 2 + state[1])[np.newaxis, :]
+
+
+def test_unscented_transform():
+    sigma_gen = MerweSigmaPoints(n=2, alpha=1.0, beta=2.0, kappa=0.0)
+    x = np.array([[1.0], [2.0]])
+    P = np.array([[2.0, 0.5], [0.5, 1.0]])
+    mean, cov = unscented_transform(sigma_gen.points(x, P), sigma_gen.wm, sigma_gen.wc)
+
+    assert np.allclose(mean, x)
+    assert np.allclose(cov, P)
+
+
+@pytest.mark.parametrize("inplace", [False, True])
+@pytest.mark.parametrize("redraw_sigmas", [True, False])
+def test_vectorized_ukf_matches_loop(ukf_parameters, redraw_sigmas, inplace):
+    filters = [
+        UnscentedKalmanFilter(
+            *ukf_parameters,
+            sigma_gen=MerweSigmaPoints(n=2, alpha=0.5, beta=2.0, kappa=0.0),
+            vectorized=vectorized,
+            redraw_sigmas=redraw_sigmas,
+            inplace=inplace and vectorized,
+        )
+        for vectorized in (False, True)
+    ]
+    for z in [1.2, 0.8, 1.5, 1.1]:
+        for ukf in filters:
+            ukf.predict(fx, fx_args=0.1)
+            ukf.update(z, hx)
+
+    assert np.allclose(filters[0].x, filters[1].x)
+    assert np.allclose(filters[0].P, filters[1].P)
+
+
+def test_inplace_ukf_matches_default_for_two_measurements(ukf_parameters):
+    Q, _, x0, P0 = ukf_parameters
+    filters = [
+        UnscentedKalmanFilter(
+            Q,
+            np.diag([0.5, 0.2]),
+            x0,
+            P0,
+            sigma_gen=MerweSigmaPoints(n=2, alpha=0.5, beta=2.0, kappa=0.0),
+            inplace=inplace,
+        )
+        for inplace in (False, True)
+    ]
+    for z in [np.array([[1.2], [0.4]]), np.array([[0.8], [0.3]])]:
+        for ukf in filters:
+            ukf.predict(fx, fx_args=0.1)
+            ukf.update(z, lambda state: np.vstack([state[0] ** 2 + state[1], state[1]]))
+
+    assert np.allclose(filters[0].x, filters[1].x)
+    assert np.allclose(filters[0].P, filters[1].P)
@@ -0,0 +1,118 @@
+import copy
+
+import numpy as np
+import pytest
+from sox.plant import Thevenin, cc_discharge_rest, default_thevenin_inputs, single_pulse_train
+
+
+@pytest.fixture(scope="module")
+def experiment():
+    return cc_discharge_rest(c_rate=2, rest_time_h=0.05)
+
+
+def test_solve_cache_round_trip(experiment, tmp_path):
+    battery = Thevenin(default_thevenin_inputs)
+    fresh = battery.solve(experiment, cache=tmp_path)
+    assert len(list((tmp_path / "thevenin").iterdir())) == 1
+    termination, battery.termination = battery.termination, None
+
+    cached = battery.solve(experiment, cache=tmp_path)
+    assert battery.termination == termination  # stored with the outputs
+    assert isinstance(cached.voltage, np.memmap)
+    for name in ("time", "voltage", "soc", "cell_temperature"):
+        assert np.array_equal(getattr(cached, name), getattr(fresh, name))
+    assert len(cached.rc_voltage) == default_thevenin_inputs.rc_pairs
+    assert np.array_equal(cached.rc_voltage[0], fresh.rc_voltage[0])
+
+
+def test_solve_cache_key_covers_inputs_and_experiment(experiment, tmp_path):
+    inputs = copy.copy(default_thevenin_inputs)
+    Thevenin(inputs).solve(experiment, cache=tmp_path)
+
+    inputs.initial_soc = 0.7  # different inputs
+    Thevenin(inputs).solve(experiment, cache=tmp_path)
+    Thevenin(inputs).solve(cc_discharge_rest(c_rate=2, rest_time_h=0.1), cache=tmp_path)  # different experiment
+    assert len(list((tmp_path / "thevenin").iterdir())) == 3
+
+
+def test_solve_key_covers_tabulated_data(experiment):
+    import pybamm as pb
+    from sox.plant.thevenin.cache import solve_key
+    from sox.plant.thevenin.default.inputs import r0_table
+
+    inputs = copy.copy(default_thevenin_inputs)
+    key = solve_key(inputs, experiment, pb.CasadiSolver())
+    assert solve_key(copy.copy(inputs), experiment, pb.CasadiSolver()) == key
+
+    inputs.series_resistance = lambda temperature, current, soc: r0_table.scaled(1.01).interpolant(
+        [temperature, current, soc]
+    )
+    assert solve_key(inputs, experiment, pb.CasadiSolver()) != key
+    assert solve_key(default_thevenin_inputs, experiment, pb.CasadiSolver(rtol=1e-8)) != key
+
+
+def test_solve_reuses_built_simulation(experiment):
+    inputs = copy.copy(default_thevenin_inputs)
+    battery = Thevenin(inputs)
+    first = battery.solve(experiment)
+    simulation = battery.build_simulation(cc_discharge_rest(c_rate=2, rest_time_h=0.05))  # equal protocol
+    assert len(battery._simulations) == 1
+    assert np.allclose(battery.solve(experiment).voltage, first.voltage)
+
+    inputs.initial_soc = 0.6  # numeric input, no rebuild
+    assert battery.solve(experiment).soc[0] == pytest.approx(0.6)
+    assert battery.build_simulation(experiment) is simulation
+
+
+def test_solve_rebuilds_after_inputs_change(experiment, tmp_path):
+    inputs = copy.copy(default_thevenin_inputs)
+    battery = Thevenin(inputs)
+    battery.solve(experiment, cache=tmp_path)
+    simulation = battery.build_simulation(experiment)
+
+    inputs.capacity *= 2  # built into the parameters, not a solve-time input
+    changed = copy.copy(inputs)
+    outputs = battery.solve(experiment, cache=tmp_path)
+    assert battery.build_simulation(experiment) is not simulation
+    assert np.allclose(outputs.soc, Thevenin(changed).solve(experiment).soc)
+    assert np.allclose(battery.solve(experiment, cache=tmp_path).soc, outputs.soc)  # cached under the new inputs
+    assert len(list((tmp_path / "thevenin").iterdir())) == 2
+
+
+def test_solve_chunks_match_solve():
+    experiment = single_pulse_train(pulse_time_sec=30, pulse_rest_time_sec=60, number_of_pulses=3)
+    battery = Thevenin(default_thevenin_inputs)
+    expected = battery.solve(experiment)
+
+    chunks = list(battery.solve_chunks(experiment, cycles_per_chunk=2))
+    assert len(chunks) == 2
+    for name in ("time", "voltage", "soc", "cell_temperature", "jig_temperature"):
+        values = np.concatenate([getattr(chunk, name) for chunk in chunks])
+        assert np.allclose(values, getattr(expected, name), atol=1e-6)
+    assert len(battery._simulations) == 3  # the whole experiment and the two chunk protocols
+
+
+def test_solve_selected_lazy_and_compact_variables(experiment):
+    battery = Thevenin(default_thevenin_inputs)
+    expected = battery.solve(experiment)
+
+    selected = battery.solve(experiment, variables=["time", "voltage", "rc_voltage"])
+    assert selected.current is None
+    assert np.array_equal(selected.voltage, expected.voltage)
+    assert np.array_equal(selected.rc_voltage[0], expected.rc_voltage[0])
+
+    lazy = battery.solve(experiment, lazy=True)
+    assert "voltage" not in vars(lazy)
+    assert np.array_equal(lazy.voltage, expected.voltage)
+    assert "voltage" in vars(lazy) and "soc" not in vars(lazy)
+    assert np.array_equal(lazy.load().soc, expected.soc)
+
+    compact = battery.solve(experiment, variables=["time", "voltage", "soc"], dtype=np.float32)
+    assert compact.voltage.dtype == np.float32 and compact.voltage.base is compact.soc.base
+    assert compact.time.dtype == np.float64 and np.array_equal(compact.time, expected.time)
+    assert np.allclose(compact.voltage, expected.voltage, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        battery.solve(experiment, variables=["voltage", "temperature"])
+    with pytest.raises(ValueError):
+        battery.solve(experiment, lazy=True, dtype=np.float32)
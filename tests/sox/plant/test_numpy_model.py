@@ -0,0 +1,107 @@
+import copy
+
+import numpy as np
+import pybamm as pb
+import pytest
+from sox.plant import (
+    NumpyThevenin,
+    Thevenin,
+    cc_charge_cv_rest,
+    compile_experiment,
+    default_thevenin_inputs,
+    dst_schedule,
+    single_pulse_train,
+    sweep,
+)
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    inputs = copy.copy(default_thevenin_inputs)
+    inputs.initial_soc = 0.6
+    return inputs
+
+
+@pytest.mark.parametrize(
+    "experiment, voltage_atol",
+    [
+        (single_pulse_train(c_rate=2, pulse_time_sec=30, pulse_rest_time_sec=60, number_of_pulses=3), 1e-4),
+        (dst_schedule(300), 1e-3),  # power steps
+        (cc_charge_cv_rest(max_voltage=4.0, cv_hold_c_rate_limit=0.5, rest_time_h=0.02), 1e-3),  # cut-off events
+    ],
+)
+def test_matches_pybamm_backend(inputs, experiment, voltage_atol):
+    expected = Thevenin(inputs).solve(experiment)
+    outputs = NumpyThevenin(inputs).solve(experiment)
+
+    assert outputs.time.size == expected.time.size
+    assert np.allclose(outputs.time, expected.time, atol=1.0)
+    assert np.allclose(outputs.voltage, expected.voltage, atol=voltage_atol)
+    assert np.allclose(outputs.current, expected.current, atol=0.1)
+    assert np.allclose(outputs.soc, expected.soc, atol=1e-3)
+    assert np.allclose(outputs.rc_voltage[0], expected.rc_voltage[0], atol=voltage_atol)
+    assert np.allclose(outputs.cell_temperature, expected.cell_temperature, atol=0.05)
+    assert np.allclose(outputs.jig_temperature, expected.jig_temperature, atol=0.05)
+
+
+def test_voltage_cut_off_ends_experiment(inputs):
+    experiment = pb.Experiment(["Discharge at 3 C for 2 hours", "Rest for 10 minutes"], period="10 seconds")
+    battery = copy.copy(inputs)
+    battery.voltage_low_cut = 3.4
+    outputs = NumpyThevenin(battery).solve(experiment)
+    assert outputs.voltage[-1] == pytest.approx(3.4, abs=1e-3)
+    assert np.all(outputs.current == outputs.current[0])  # the rest step is not run
+
+
+def test_solve_rebuilds_after_inputs_change(inputs):
+    experiment = single_pulse_train(c_rate=2, pulse_time_sec=30, pulse_rest_time_sec=60, number_of_pulses=2)
+    changed = copy.copy(inputs)
+    battery = NumpyThevenin(changed)
+    battery.solve(experiment)
+
+    changed.series_resistance = lambda temperature, current, soc: 2 * inputs.series_resistance(
+        temperature, current, soc
+    )
+    expected = NumpyThevenin(copy.copy(changed)).solve(experiment)
+    assert np.array_equal(battery.solve(experiment).voltage, expected.voltage)
+
+
+def test_unsupported_step_raises(inputs):
+    with pytest.raises(ValueError):
+        NumpyThevenin(inputs).solve(pb.Experiment(["Hold at 1 Ohm for 10 seconds"]))
+
+
+def test_voltage_termination_needs_a_direction(inputs):
+    with pytest.raises(ValueError):
+        NumpyThevenin(inputs).solve(pb.Experiment(["Rest until 4 V"]))
+    outputs = NumpyThevenin(inputs).solve(pb.Experiment([pb.step.rest(1800, period=10, termination="> 4.5 V")]))
+    assert outputs.time[-1] == pytest.approx(1800)  # an explicit operator keeps the termination
+
+
+def test_sweep_with_numpy_backend(inputs, tmp_path):
+    experiment = single_pulse_train(number_of_pulses=2)
+    results = sweep([inputs], [experiment], directory=tmp_path, max_workers=1, plant=NumpyThevenin)
+    assert not results.errors
+    assert np.array_equal(results.case(0, 0).voltage, NumpyThevenin(inputs).solve(experiment).voltage)
+
+
+def test_solve_chunks_match_solve(inputs):
+    experiment = single_pulse_train(c_rate=3, pulse_time_sec=600, pulse_rest_time_sec=60, number_of_pulses=6)
+    battery = NumpyThevenin(inputs)
+    expected = battery.solve(experiment)  # ends at the minimum SoC cut-off
+
+    chunks = list(battery.solve_chunks(experiment))
+    assert 1 < len(chunks) < 6
+    for name in ("time", "voltage", "soc", "cell_temperature"):
+        assert np.array_equal(np.concatenate([getattr(chunk, name) for chunk in chunks]), getattr(expected, name))
+
+
+def test_drive_cycle_matches_steps(inputs):
+    experiment = single_pulse_train(c_rate=2, pulse_time_sec=30, pulse_rest_time_sec=60, number_of_pulses=3)
+    expected = NumpyThevenin(inputs).solve(experiment)
+    outputs = NumpyThevenin(inputs).solve(compile_experiment(experiment))
+
+    time, index = np.unique(expected.time, return_index=True)  # the last sample of a step is the first of the next
+    assert np.array_equal(outputs.time, time)
+    assert np.allclose(outputs.soc, expected.soc[index])
+    assert np.allclose(outputs.cell_temperature, expected.cell_temperature[index])
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pybamm as pb
+import pytest
+from sox.plant import ParameterTable
+from sox.plant.thevenin.parameters import OUTPUT_VARIABLES, Outputs
+from sox.plant.thevenin.default.inputs import path
+
+
+@pytest.mark.parametrize(
+    "filename, process",
+    [
+        ("thevenin_ocv.csv", pb.parameters.process_1D_data),
+        ("thevenin_docvdt.csv", pb.parameters.process_2D_data_csv),
+        ("thevenin_r0.csv", pb.parameters.process_3D_data_csv),
+    ],
+)
+def test_from_csv_matches_pybamm(filename, process, tmp_path):
+    name, (axes, values) = process(filename, path=path)
+    table = ParameterTable.from_csv(filename, path=path, cache_dir=tmp_path)
+    assert table.name == name
+    assert all(np.array_equal(a, b) for a, b in zip(axes, table.axes))
+    assert np.array_equal(values, table.values)
+
+
+def test_from_csv_cache_is_keyed_on_content(tmp_path):
+    csv = tmp_path / "table.csv"
+    csv.write_text("x,y,value\n0,0,1.0\n0,1,2.0\n1,0,3.0\n1,1,4.0\n")
+    cache_dir = tmp_path / "cache"
+    table = ParameterTable.from_csv("table.csv", path=tmp_path, cache_dir=cache_dir)
+    assert np.array_equal(table.values, [[1.0, 2.0], [3.0, 4.0]])
+    assert len(list(cache_dir.glob("table-*.npz"))) == 1
+
+    cached = ParameterTable.from_csv("table.csv", path=tmp_path, cache_dir=cache_dir)
+    assert np.array_equal(cached.values, table.values)
+    assert all(np.array_equal(a, b) for a, b in zip(cached.axes, table.axes))
+
+    csv.write_text("x,y,value\n0,0,1.0\n0,1,2.0\n1,0,3.0\n1,1,5.0\n")  # edited data invalidates the cache
+    assert ParameterTable.from_csv("table.csv", path=tmp_path, cache_dir=cache_dir).values[1, 1] == 5.0
+    assert len(list(cache_dir.glob("table-*.npz"))) == 2
+
+
+def test_from_csv_writes_nothing_without_cache_dir(tmp_path):
+    csv = tmp_path / "table.csv"
+    csv.write_text("x,value\n0,1.0\n1,2.0\n")
+    assert np.array_equal(ParameterTable.from_csv("table.csv", path=tmp_path).values, [1.0, 2.0])
+    assert list(tmp_path.iterdir()) == [csv]
+
+
+def test_default_inputs_import_writes_nothing(tmp_path):
+    env = {**os.environ, "HOME": str(tmp_path), "XDG_CACHE_HOME": ""}
+    env.pop("SOX_CACHE_DIR")
+    subprocess.run([sys.executable, "-c", "import sox.plant.thevenin.default.inputs"], env=env, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_from_csv_rejects_incomplete_grid(tmp_path):
+    (tmp_path / "table.csv").write_text("x,y,value\n0,0,1.0\n0,1,2.0\n1,0,3.0\n")
+    with pytest.raises(ValueError):
+        ParameterTable.from_csv("table.csv", path=tmp_path, cache_dir=tmp_path)
+
+
+def test_interpolant_and_scaling(tmp_path):
+    table = ParameterTable.from_csv("thevenin_r0.csv", path=path, cache_dir=tmp_path).scaled(2.0)
+    name, (axes, values) = table.as_data()
+    expected = pb.Interpolant(axes, values, [25.0, 10.0, 0.5], name, extrapolate=True).evaluate()
+    assert table.interpolant([25.0, 10.0, 0.5]).evaluate() == pytest.approx(expected)
+
+
+def test_compact_keeps_time_in_float64():
+    time = 2e5 + np.arange(4) * 0.01  # float32 rounds to multiples of 0.0156 s here
+    values = dict.fromkeys(OUTPUT_VARIABLES)
+    values.update(time=time, voltage=np.full(4, 3.7), rc_voltage=[-time])
+    compact = Outputs(**values).compact(np.float32)
+    assert compact.time.dtype == np.float64 and np.array_equal(compact.time, time)
+    assert compact.voltage.dtype == np.float32 and compact.voltage.base is compact.rc_voltage[0].base
+    assert compact.soc is None
@@ -0,0 +1,108 @@
+import numpy as np
+import pybamm as pb
+import pytest
+from sox.plant import (
+    NumpyThevenin,
+    Thevenin,
+    charge_discharge_cycling,
+    compile_experiment,
+    default_thevenin_inputs,
+    drive_profile,
+    dst_schedule,
+)
+from sox.plant.thevenin.cache import experiment_key
+
+
+def test_compile_experiment_merges_fixed_duration_steps():
+    experiment = dst_schedule(40, number_of_cycles=3)
+    compiled = compile_experiment(experiment)
+    assert len(compiled.steps) == 1
+    step = compiled.steps[0]
+    assert isinstance(step, pb.step.Power) and step.is_drive_cycle
+    assert step.duration == pytest.approx(sum(step.duration for step in experiment.steps))
+    assert compiled.period == experiment.period
+
+    profile = step.input_value
+    samples = np.cumsum([0] + [step.duration for step in experiment.steps])[:-1] + 1  # inside each step
+    assert np.allclose(np.interp(samples, profile[:, 0], profile[:, 1]), [step.value for step in experiment.steps])
+
+    # simulations and cached solutions are keyed on the profile
+    assert experiment_key(compile_experiment(dst_schedule(40, number_of_cycles=3))) == experiment_key(compiled)
+    assert experiment_key(compile_experiment(dst_schedule(50, number_of_cycles=3))) != experiment_key(compiled)
+
+
+def test_compile_experiment_keeps_terminated_steps():
+    experiment = charge_discharge_cycling(number_of_cycles=2)
+    compiled = compile_experiment(experiment)
+    assert [type(step) for step in compiled.steps] == [type(step) for step in experiment.steps]
+    assert not any(step.is_drive_cycle for step in compiled.steps)
+
+
+def test_compiled_experiment_matches_steps():
+    experiment = pb.Experiment(
+        ["Discharge at 2 C for 30 seconds", "Rest for 60 seconds", "Charge at 1 C for 30 seconds"] * 2
+        + ["Discharge at 1 C until 3.5 V"],
+        period="1 second",
+    )
+    compiled = compile_experiment(experiment)
+    assert [step.is_drive_cycle for step in compiled.steps] == [True, False]
+
+    battery = Thevenin(default_thevenin_inputs)
+    expected, outputs = battery.solve(experiment), battery.solve(compiled)
+    assert outputs.time.size == expected.time.size - 5  # no duplicated samples at the merged step boundaries
+    assert outputs.time[-1] == pytest.approx(expected.time[-1], abs=1.0)
+    time, index = np.unique(expected.time, return_index=True)
+    assert np.allclose(outputs.soc, np.interp(outputs.time, time, expected.soc[index]), atol=1e-5)
+
+    battery = Thevenin(default_thevenin_inputs)
+    battery.solver = pb.IDAKLUSolver()
+    outputs = battery.solve(compiled)
+    sample_time, soc = outputs.time[:-1], outputs.soc[:-1]  # the last sample is the voltage cut-off
+    offset = np.abs(sample_time - np.round(sample_time))
+    assert np.any(offset > 1e-6) and np.all(offset <= 0.5e-3 + 1e-9)  # extra samples at the knots of the ramps
+    assert np.allclose(soc, np.interp(sample_time, time, expected.soc[index]), atol=1e-5)
+
+
+def test_compile_experiment_rejects_long_ramps():
+    with pytest.raises(ValueError):
+        compile_experiment(dst_schedule(40), ramp_time_s=10)
+
+
+def test_drive_profile_resamples_and_repeats():
+    time = np.array([10.0, 10.5, 12.0, 13.2, 15.0])
+    current = np.array([1.0, 2.0, -1.0, 0.0, 3.0])
+    experiment = drive_profile(time, current, number_of_repetitions=3, sampling_time_s=1)
+    assert len(experiment.cycles) == 3
+    step = experiment.steps[0]
+    assert isinstance(step, pb.step.Current) and step.is_drive_cycle
+    assert np.array_equal(step.input_value[:, 0], [0, 1, 2, 3, 4, 5])
+    assert np.allclose(step.input_value[:, 1], np.interp([10, 11, 12, 13, 14, 15], time, current))
+    assert step.duration == 5
+    for repetition in experiment.steps[1:]:  # the repetitions share the profile instead of tiling it
+        assert repetition.value.x[0].shape == (6,)
+        assert np.shares_memory(repetition.value.y, step.value.y)
+
+    battery = Thevenin(default_thevenin_inputs)
+    outputs = battery.solve(experiment)
+    assert len(battery._simulations) == 1  # one simulation for all repetitions
+    assert np.allclose(outputs.time, [0, 1, 2, 3, 4, 5, 5, 6, 7, 8, 9, 10, 10, 11, 12, 13, 14, 15])
+    assert np.allclose(outputs.current[6:12], outputs.current[:6])
+    assert np.allclose(NumpyThevenin(default_thevenin_inputs).solve(experiment).time, outputs.time)
+
+
+def test_drive_profile_from_memory_mapped_file(tmp_path):
+    time = np.linspace(0, 100, 301)
+    np.save(tmp_path / "profile.npy", np.column_stack([time, np.full_like(time, 20.0)]))
+    experiment = drive_profile(str(tmp_path / "profile.npy"), kind="power", sampling_time_s=10)
+    step = experiment.steps[0]
+    assert isinstance(step, pb.step.Power)
+    assert step.input_value.shape == (11, 2) and step.duration == 100
+
+
+@pytest.mark.parametrize(
+    "time, values, kind",
+    [([0.0, 1.0], [1.0, 2.0], "voltage"), ([0.0, 1.0, 1.0], [1.0, 2.0, 3.0], "current"), ([0.0], [1.0], "current")],
+)
+def test_drive_profile_rejects_invalid_profiles(time, values, kind):
+    with pytest.raises(ValueError):
+        drive_profile(np.array(time), np.array(values), kind=kind)
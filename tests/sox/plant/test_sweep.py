@@ -0,0 +1,91 @@
+import copy
+import os
+
+import numpy as np
+import pybamm as pb
+import pytest
+from sox.plant import NumpyThevenin, Thevenin, cc_discharge_rest, default_thevenin_inputs, single_pulse, sweep
+from sox.plant.sweep import _join_cases
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    variants = [copy.copy(default_thevenin_inputs) for _ in range(2)]
+    variants[1].initial_soc = 0.6
+    return variants
+
+
+@pytest.fixture(scope="module")
+def experiments():
+    return [cc_discharge_rest(c_rate=2, rest_time_h=0.02), single_pulse()]
+
+
+def test_sweep_matches_individual_solves(inputs, experiments, tmp_path):
+    results = sweep(inputs, experiments + [None], directory=tmp_path, max_workers=1)
+    assert results.shape == (2, 3)
+    assert set(results.errors) == {(0, 2), (1, 2)}  # the invalid experiment fails alone
+    assert results.case(0, 2) is None
+
+    for i, variant in enumerate(inputs):
+        for j, experiment in enumerate(experiments):
+            expected = Thevenin(variant).solve(experiment)
+            case = results.case(i, j)
+            assert np.allclose(case.voltage, expected.voltage)
+            assert np.allclose(case.rc_voltage[0], expected.rc_voltage[0])
+
+    voltage = results.variable("voltage")
+    assert isinstance(voltage, np.memmap)
+    assert voltage.shape == (results.offsets[-1],)
+    assert results.variable("rc_voltage").shape == (1, results.offsets[-1])
+    assert not list(tmp_path.glob("case_*"))
+
+
+def test_sweep_in_process_pool(inputs, experiments, tmp_path):
+    results = sweep(inputs, experiments[:1], directory=tmp_path, max_workers=2)
+    assert not results.errors
+    assert results.case(1, 0).soc[0] == pytest.approx(0.6)
+
+
+def test_sweep_selected_variables(inputs, experiments, tmp_path):
+    results = sweep(inputs, experiments, directory=tmp_path, max_workers=1, variables=["voltage"], dtype=np.float32)
+    assert results.variables == ("time", "voltage")
+    assert not (tmp_path / "soc.npy").exists()
+    case = results.case(1, 0)
+    assert case.soc is None and case.voltage.dtype == np.float32
+    assert results.variable("time").dtype == np.float64
+    assert np.allclose(case.voltage, Thevenin(inputs[1]).solve(experiments[0]).voltage, atol=1e-5)
+
+
+def test_join_cases_opens_one_case_file_at_a_time(tmp_path):
+    resource = pytest.importorskip("resource")
+    n_cases, variables = 100, ("time", "voltage", "rc_voltage")
+    for case in range(n_cases):
+        os.makedirs(tmp_path / f"case_{case}")
+        np.save(tmp_path / f"case_{case}" / "time.npy", np.arange(case % 7 + 1.0))
+        np.save(tmp_path / f"case_{case}" / "voltage.npy", np.full(case % 7 + 1, float(case)))
+        np.save(tmp_path / f"case_{case}" / "rc_voltage.npy", np.full((1, case % 7 + 1), -float(case)))
+    errors = {3: "ValueError: failed"}
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (len(os.listdir("/proc/self/fd")) + 32, hard))
+    try:  # more case files than the limit allows to be open at once
+        offsets = _join_cases(str(tmp_path), n_cases, 1, errors, variables, float)
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    assert offsets[4] - offsets[3] == 0 and offsets[-1] == sum(k % 7 + 1 for k in range(n_cases) if k != 3)
+    voltage, rc_voltage = np.load(tmp_path / "voltage.npy"), np.load(tmp_path / "rc_voltage.npy")
+    assert np.array_equal(voltage[offsets[10] : offsets[11]], np.full(4, 10.0))
+    assert np.array_equal(rc_voltage[:, offsets[99] : offsets[100]], np.full((1, 2), -99.0))
+    assert not list(tmp_path.glob("case_*"))
+
+
+@pytest.mark.parametrize("plant", [Thevenin, NumpyThevenin])
+def test_sweep_reports_cut_off_cases(inputs, experiments, plant, tmp_path):
+    cut_off = pb.Experiment(["Discharge at 2C for 1 hour"], period="10 seconds")  # hits a cut-off before 1 hour
+    results = sweep(inputs[:1], [experiments[1], cut_off], directory=tmp_path, max_workers=1, plant=plant)
+    assert not results.errors
+    assert results.cut_off == [(0, 1)]
+    assert results.terminations[(0, 0)] == "final time"
+    assert results.terminations[(0, 1)].startswith("event: Minimum")
+    assert results.case(0, 1).time[-1] < 3600
@@ -0,0 +1,120 @@
+import numpy as np
+import pybamm as pb
+import pytest
+from sox.plant import default_thevenin_inputs
+from sox.system import IsothermalThevenin, ocv_table
+
+rc_resistors, rc_capacitors, capacity = [7e-3, 2e-3], [8e3, 5e2], 10
+
+
+@pytest.fixture(scope="module")
+def system():
+    return IsothermalThevenin(default_thevenin_inputs.open_circuit_voltage, 4e-3, rc_resistors, rc_capacitors, capacity)
+
+
+@pytest.mark.parametrize("dt", [0.1, 1.0, 1.37, 30.0])
+def test_discretization_matches_closed_form(system, dt):
+    r, c = np.array(rc_resistors), np.array(rc_capacitors)
+    decay = np.exp(-dt / (r * c))
+    assert np.allclose(system.F(dt), np.diag([1.0, *decay]), rtol=1e-12, atol=0)
+    expected_B = np.array([[-dt / (capacity * 3600.0)], *(r * (1 - decay))[:, np.newaxis]])
+    assert np.allclose(system.B(dt), expected_B, rtol=1e-12, atol=0)
+
+
+def test_discretization_is_cached(system):
+    F, B = system.discretize(0.5)
+    assert system.discretize(0.5)[0] is F
+    assert system.discretize(np.float64(0.5))[1] is B
+    assert not F.flags.writeable and not B.flags.writeable
+
+    F_copy = system.F(0.5)  # F and B return copies that callers may modify
+    F_copy[0, 0] = 2.0
+    assert F[0, 0] == 1.0 and system.B(0.5).flags.writeable
+
+
+def test_fx_shapes(system):
+    dt, current = 1.0, np.array([2.0, -1.0])
+    columns = np.array([[0.5, 0.6], [0.01, 0.02], [0.003, 0.0]])
+    F, B = system.discretize(dt)
+    assert np.allclose(system.fx(columns, 2.0, dt), F @ columns + 2.0 * B)
+
+    stacked = np.stack([columns[:, :1], columns[:, 1:]])
+    result = system.fx(stacked, current, dt)
+    assert result.shape == (2, 3, 1)
+    for i in range(2):
+        assert np.allclose(result[i], F @ stacked[i] + current[i] * B)
+
+
+def test_ocv_table_matches_pointwise_evaluation():
+    ocv_func = default_thevenin_inputs.open_circuit_voltage
+    soc, ocv = ocv_table(ocv_func)
+    assert soc.shape == ocv.shape == (1001,)
+    for i in (0, 137, 500, 1000):
+        assert ocv[i] == pytest.approx(ocv_func([soc[i]]).evaluate()[0, 0], abs=1e-12)
+    assert ocv_table(ocv_func)[1] is ocv  # memoized per OCV source
+
+
+def test_ocv_and_docv_functions_share_one_build():
+    ocv_func = default_thevenin_inputs.open_circuit_voltage
+    ocv, docv = IsothermalThevenin.build_ocv_func(ocv_func), IsothermalThevenin.build_docv_func(ocv_func)
+    assert ocv.y.base is docv.y.base
+    assert IsothermalThevenin.build_ocv_tables(ocv_func) == (ocv, docv)
+
+
+def test_ocv_table_disk_cache(tmp_path):
+    ocv_func = default_thevenin_inputs.open_circuit_voltage
+    _, ocv = ocv_table(ocv_func, delta_soc=0.01, cache_dir=tmp_path)
+    files = list(tmp_path.glob("ocv_*.npy"))
+    assert len(files) == 1
+    assert np.array_equal(np.load(files[0]), ocv)
+
+    system = IsothermalThevenin(ocv_func, 4e-3, rc_resistors, rc_capacitors, capacity, cache_dir=tmp_path)
+    assert system.ocv(0.5) == pytest.approx(np.interp(0.5, *ocv_table(ocv_func)))
+
+
+def test_ocv_table_tolerates_unwritable_cache(tmp_path):
+    cache_dir = tmp_path / "file"
+    cache_dir.write_text("")  # not a directory
+    ocv_func = default_thevenin_inputs.open_circuit_voltage
+    _, ocv = ocv_table(ocv_func, delta_soc=0.02, cache_dir=str(cache_dir))
+    assert np.allclose(ocv, ocv_table(ocv_func)[1][::20])
+    assert [path.name for path in tmp_path.iterdir()] == ["file"]
+
+
+def test_ocv_table_disk_cache_hashes_interpolant_data(tmp_path):
+    x = np.linspace(0, 1, 9)
+    y = 3.0 + x
+    bumped = y.copy()
+    bumped[1::2] += 0.1  # agrees with y at 0, 0.25, 0.5, 0.75 and 1
+
+    def curve(values):
+        return lambda soc: pb.Interpolant(x, values, soc, interpolator="linear")
+
+    _, ocv = ocv_table(curve(y), delta_soc=0.01, cache_dir=tmp_path)
+    _, ocv_bumped = ocv_table(curve(bumped), delta_soc=0.01, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("ocv_*.npy"))) == 2
+    assert not np.allclose(ocv, ocv_bumped)
+
+
+def test_per_cell_parameters_match_single_cells():
+    ocv_func = default_thevenin_inputs.open_circuit_voltage
+    r0, capacities = np.array([4e-3, 5e-3, 6e-3]), np.array([10.0, 9.0, 11.0])
+    r, c = np.array([[7e-3, 2e-3], [8e-3, 1e-3], [6e-3, 3e-3]]), np.array([[8e3, 5e2], [7e3, 6e2], [9e3, 4e2]])
+    fleet = IsothermalThevenin(ocv_func, r0, r, c, capacities)
+    cells = [IsothermalThevenin(ocv_func, r0[i], list(r[i]), list(c[i]), capacities[i]) for i in range(3)]
+    assert fleet.is_batched and fleet.n_rc == 2
+
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.uniform(0.2, 0.9, (3, 1, 5)), rng.normal(0, 0.01, (3, 2, 5))], axis=1)  # (N, n, M)
+    current, dt = np.array([2.0, -1.0, 5.0]), np.array([1.0, 0.9, 1.1])
+
+    F, B = fleet.discretize(dt)
+    fx, hx = fleet.fx(x, current, dt), fleet.hx(x, current)
+    jac = fleet.h_jacobian(x[..., :1])
+    assert F.shape == (3, 3, 3) and B.shape == (3, 3, 1)
+    assert fx.shape == x.shape and hx.shape == (3, 1, 5) and jac.shape == (3, 1, 3)
+    for i, cell in enumerate(cells):
+        assert np.allclose(F[i], cell.F(dt[i])) and np.allclose(B[i], cell.B(dt[i]))
+        assert np.allclose(fx[i], cell.fx(x[i], current[i], dt[i]))
+        assert np.allclose(hx[i], cell.hx(x[i], current[i]))
+        assert np.allclose(jac[i], cell.h_jacobian(x[i, :, :1]))
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from sox.filter import (
+    ExtendedKalmanFilter,
+    MerweSigmaPoints,
+    TheveninExtendedKalmanFilter,
+    TheveninUnscentedKalmanFilter,
+    UnscentedKalmanFilter,
+    run,
+)
+from sox.plant import default_thevenin_inputs
+from sox.system import IsothermalThevenin, ParameterVaryingThevenin
+
+
+@pytest.fixture(scope="module")
+def system():
+    return ParameterVaryingThevenin.from_default_inputs(temperature=25.0)
+
+
+def test_parameters_match_plant_interpolants(system):
+    inputs = default_thevenin_inputs
+    for soc, current in [(0.1, 5.0), (0.55, -20.0), (0.93, 0.0)]:
+        r0, r, c = system.parameters(soc, current)
+        assert r0 == pytest.approx(inputs.series_resistance(25.0, current, soc).evaluate().item(), rel=1e-12)
+        assert r[0] == pytest.approx(inputs.rc_resistance[0](25.0, current, soc).evaluate().item(), rel=1e-12)
+        assert c[0] == pytest.approx(inputs.rc_capacitance[0](25.0, current, soc).evaluate().item(), rel=1e-12)
+
+
+def test_model_functions_match_frozen_parameters(system):
+    x = np.array([[0.3, 0.6, 0.9], [0.01, -0.02, 0.0]])
+    current, dt = 7.0, 1.0
+    fx, hx = system.fx(x, current, dt), system.hx(x, current)
+    for j in range(x.shape[1]):  # each column sees the parameters at its own state of charge
+        r0, r, c = system.parameters(x[0, j], current)
+        frozen = IsothermalThevenin(
+            default_thevenin_inputs.open_circuit_voltage, float(r0), list(r), list(c), system.capacity
+        )
+        assert np.allclose(fx[:, j : j + 1], frozen.fx(x[:, j : j + 1], current, dt))
+        assert np.allclose(hx[:, j : j + 1], frozen.hx(x[:, j : j + 1], current))
+
+    stacked = np.stack([x, x[:, ::-1]])  # (N, n, M) with per-cell current
+    result = system.fx(stacked, np.array([current, -current]), np.array([dt, dt]))
+    assert result.shape == stacked.shape
+    assert np.allclose(result[0], fx)
+    assert system.hx(stacked, np.array([current, -current])).shape == (2, 1, 3)
+
+
+def test_runs_with_unscented_kalman_filter(system):
+    sigma_gen = MerweSigmaPoints(2, alpha=1e-3, beta=2.0, kappa=0.0)
+    ukf = UnscentedKalmanFilter(
+        np.diag([1e-6, 1e-4]), 1e-4, np.array([0.5, 0.0]), np.diag([1e-2, 1e-4]), sigma_gen, vectorized=True
+    )
+    current = np.full(50, 10.0)
+    voltage = system.hx(np.array([[0.6], [0.0]]), 10.0)[0, 0] * np.ones(50)
+    estimates = run(ukf, system, current, voltage, dt=1.0)
+    assert estimates.states.shape == (50, 2)
+    assert np.all(np.isfinite(estimates.states))
+
+
+def test_discretize_matches_frozen_parameters_per_cell(system):
+    dt, soc, current = 2.0, np.array([0.2, 0.8]), np.array([15.0, -5.0])
+    batched = ParameterVaryingThevenin.from_default_inputs(temperature=np.array([10.0, 40.0]))
+    batched.capacity = np.array([10.0, 12.0])
+    F, B = batched.discretize(dt, soc, current)
+    assert F.shape == (2, 2, 2) and B.shape == (2, 2, 1)
+    for i in range(2):
+        _, r, c = batched.parameters(soc[i], current[i], batched.temperature[i])
+        frozen = IsothermalThevenin(
+            default_thevenin_inputs.open_circuit_voltage, 0.0, list(r), list(c), batched.capacity[i]
+        )
+        assert np.allclose(F[i], frozen.F(dt)) and np.allclose(B[i], frozen.B(dt))
+    assert np.allclose(system.F(dt, 0.2, 15.0), system.discretize(dt, 0.2, 15.0)[0])
+    x = np.array([[0.2], [0.01]])  # frozen parameters reproduce fx at the operating point
+    assert np.allclose(system.F(dt, 0.2, 15.0) @ x + system.B(dt, 0.2, 15.0) * 15.0, system.fx(x, 15.0, dt))
+
+
+def test_h_jacobian_includes_series_resistance_slope(system):
+    x, current, step = np.array([[0.42], [0.01]]), 30.0, 1e-5
+    jac = system.h_jacobian(x, current)
+    up, down = x.copy(), x.copy()
+    up[0, 0] += step
+    down[0, 0] -= step
+    slope = (system.hx(up, current) - system.hx(down, current)) / (2 * step)
+    assert jac.shape == (1, 2)
+    assert jac[0, 0] == pytest.approx(slope[0, 0], rel=1e-6)
+    assert jac[0, 0] != pytest.approx(system.docv(0.42), rel=1e-6)  # R0 varies with state of charge here
+    assert system.h_jacobian(np.stack([x, x]), np.array([current, 0.0])).shape == (2, 1, 2)
+
+
+def test_supports_models_without_rc_pairs(system):
+    no_rc = ParameterVaryingThevenin(
+        default_thevenin_inputs.open_circuit_voltage, system.series_resistance_table, [], [], system.capacity
+    )
+    x = np.array([[0.3, 0.6]])
+    _, r, c = no_rc.parameters(x[0], 5.0)
+    assert r.shape == c.shape == (0, 2)
+    assert np.allclose(no_rc.fx(x, 5.0, 1.0), x - 5.0 / (system.capacity * 3600.0))
+    assert np.allclose(no_rc.hx(x, 5.0), system.ocv(x[0]) - 5.0 * system.series_resistance_table(25.0, 5.0, x[0]))
+    F, B = no_rc.discretize(1.0, 0.5, 5.0)
+    assert F.shape == (1, 1) and B.shape == (1, 1)
+
+
+def test_thevenin_filters_reject_parameter_varying_models(system):
+    parameters = dict(Q=np.diag([1e-6, 1e-4]), R=1e-4, x0=np.array([0.5, 0.0]), P0=np.diag([1e-2, 1e-4]))
+    with pytest.raises(TypeError):
+        TheveninExtendedKalmanFilter(system, 1.0, **parameters)
+    with pytest.raises(TypeError):
+        TheveninUnscentedKalmanFilter(
+            system, 1.0, **parameters, sigma_gen=MerweSigmaPoints(2, alpha=1e-3, beta=2.0, kappa=0.0)
+        )
+
+
+def test_run_relinearizes_extended_kalman_filter(system):
+    current = np.where(np.arange(40) % 20 < 10, 20.0, -10.0)
+    voltage = np.linspace(3.9, 3.6, 40)
+    F, B = system.discretize(1.0, 0.5, 0.0)
+    parameters = dict(Q=np.diag([1e-6, 1e-4]), R=1e-4, x0=np.array([0.5, 0.0]), P0=np.diag([1e-2, 1e-4]))
+    ekf, reference = ExtendedKalmanFilter(F=F, B=B, **parameters), ExtendedKalmanFilter(F=F, B=B, **parameters)
+    with pytest.raises(ValueError):
+        run(ekf, system, current, voltage)
+
+    estimates = run(ekf, system, current, voltage, dt=1.0)
+    for k in range(current.size):
+        reference.F, reference.B = system.discretize(1.0, reference.x[0, 0], current[k])
+        reference.predict(u=current[k])
+        reference.update(voltage[k], system.hx, system.h_jacobian, hx_args=current[k], hj_args=(current[k],))
+        assert np.allclose(estimates.states[k], reference.x[:, 0])
+    assert ekf.F is F and ekf.B is B
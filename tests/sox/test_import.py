@@ -0,0 +1,41 @@
+import ast
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["pybamm", "matplotlib", "scipy.interpolate", "scipy.signal"]
+
+
+def loaded_modules(statement):
+    """Runs statement in a fresh interpreter and returns the heavy modules it loaded and its import time (s)."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules], elapsed)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    modules, elapsed = output.rsplit(" ", 1)
+    return ast.literal_eval(modules), float(elapsed)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import sox",
+        "from sox.filter import CoulombCount, ExtendedKalmanFilter",
+        "from sox.filter import UnscentedKalmanFilter, run",
+        "from sox.sensor import Sensor",
+        "from sox.system import IsothermalThevenin",
+    ],
+)
+def test_fast_imports_skip_heavy_dependencies(statement):
+    modules, elapsed = loaded_modules(statement)
+    assert modules == [], f"{statement!r} imported {modules} in {elapsed:.2f} s"
+
+
+def test_lazy_attributes_resolve():
+    modules, _ = loaded_modules("import sox\nsox.plant.default_thevenin_inputs\nfrom sox.filter import *")
+    assert "pybamm" in modules
@@ -1,6 +1,7 @@
 import numpy as np
 import pytest
-from sox.utils import handle_matrix, handle_vector
+from scipy.interpolate import interp1d
+from sox.utils import RegularGridLookupTable, UniformLookupTable, handle_matrix, handle_vector
 
 
 @pytest.mark.parametrize(
@@ -25,3 +26,49 @@ def test_vector_handling(raw_input, expected_output):
 )
 def test_matrix_handling(raw_input, expected_output):
     assert np.array_equal(handle_matrix(raw_input), expected_output)
+
+
+def test_uniform_lookup_table_matches_interp1d():
+    x = np.linspace(0, 1, 101)
+    y, dy = np.sin(5 * x) + x**3, 5 * np.cos(5 * x) + 3 * x**2
+    table, derivative = UniformLookupTable.from_grid(x, y, dy)
+    assert table.y.base is derivative.y.base  # one shared buffer
+
+    query = np.linspace(-0.3, 1.3, 1001)  # includes extrapolation on both sides
+    assert np.allclose(table(query), interp1d(x, y, kind="linear", fill_value="extrapolate")(query), atol=1e-14)
+    assert np.allclose(derivative(query), interp1d(x, dy, kind="linear", fill_value="extrapolate")(query), atol=1e-14)
+    for value in (-0.3, 0.0, 0.555, 1.0, 1.2):
+        assert table(value) == pytest.approx(table(np.array([value]))[0], abs=1e-14)
+    assert table(query.reshape(7, 11, 13)).shape == (7, 11, 13)
+
+
+def test_uniform_lookup_table_maps_nan_to_nan():
+    table = UniformLookupTable(0.0, 0.5, [1.0, 2.0, 4.0])
+    assert np.isnan(table(float("nan")))
+    assert np.array_equal(table(np.array([np.nan, 0.25, np.nan])), [np.nan, 1.5, np.nan], equal_nan=True)
+
+
+def test_uniform_lookup_table_extrapolates_to_infinity():
+    table = UniformLookupTable(0.0, 0.5, [1.0, 2.0, 4.0])
+    assert table(float("inf")) == float("inf") and table(float("-inf")) == float("-inf")
+    assert np.array_equal(table(np.array([-np.inf, 0.25, np.inf])), [-np.inf, 1.5, np.inf])
+
+
+@pytest.mark.parametrize("ndim", [1, 2, 3, 4])
+def test_regular_grid_lookup_table_scalar_path_matches_arrays(ndim):
+    rng = np.random.default_rng(0)
+    axes = [np.linspace(0, 1, 5), np.linspace(-1, 2, 7), np.linspace(3, 4, 4), np.linspace(0, 2, 3)][:ndim]
+    table = RegularGridLookupTable(axes, rng.normal(size=[axis.size for axis in axes]))
+    points = rng.uniform(-2, 5, size=(200, ndim))  # includes extrapolation on both sides
+    expected = table(*points.T)
+    lookup = table.scalar_function()
+    for point, value in zip(points.tolist(), expected):
+        assert lookup(*point) == pytest.approx(value, abs=1e-12)
+        assert table(*point) == pytest.approx(value, abs=1e-12)
+
+
+def test_regular_grid_lookup_table_maps_nan_to_nan():
+    table = RegularGridLookupTable([np.linspace(0, 1, 5), np.linspace(-1, 1, 3)], np.arange(15.0).reshape(5, 3))
+    values = table(np.array([0.5, 0.5, 0.25]), np.array([0.0, np.nan, 0.5]))
+    assert np.array_equal(values, [table(0.5, 0.0), np.nan, table(0.25, 0.5)], equal_nan=True)
+    assert np.isnan(table(0.5, float("nan")))